@@ -0,0 +1,195 @@
+# imports
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+# columns of the per stock summary
+SUMMARY_COLUMNS = ['stock', 'observations', 'mean_log_return', 'volatility', 'correlation', 'beta']
+
+
+###########################################################################
+#####
+##### method to get log returns of every stock at once
+#####
+##### @param prices - the aligned prices [rows x stocks]
+#####
+##### @return log returns [rows - 1 x stocks], NaN where a price is missing
+#####         or not positive
+#####
+###########################################################################
+def log_returns(prices):
+    matrix = np.asarray(prices, dtype = float)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(-1, 1)
+
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        logPrices = np.log(np.where(matrix > 0, matrix, np.nan))
+
+    return np.diff(logPrices, axis = 0)
+
+
+###########################################################################
+#####
+##### method to get pairwise-complete moments of every pair of stocks
+#####
+##### each pair uses the rows where both stocks have a return, so stocks
+##### with different histories can be compared. every sum is one matrix
+##### product over the whole return matrix.
+#####
+##### @param returns - the returns [rows x stocks]
+#####
+##### @return dictionary of [stocks x stocks] matrices
+#####         counts - rows both stocks have
+#####         covariance - covariance of the pair
+#####         variance - variance of the row stock over the pair's rows
+#####
+###########################################################################
+def pairwise_moments(returns):
+    valid = ~np.isnan(returns)
+    mask = valid.astype(float)
+
+    # centering first keeps the sums small, covariances do not change
+    centered = _centered(returns, valid)
+
+    counts = mask.T @ mask
+    sums = centered.T @ mask
+    squares = (centered ** 2).T @ mask
+    products = centered.T @ centered
+
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        degrees = np.where(counts > 1, counts - 1, np.nan)
+        covariance = (products - sums * sums.T / counts) / degrees
+        variance = (squares - sums ** 2 / counts) / degrees
+
+    return {'counts': counts, 'covariance': covariance, 'variance': variance}
+
+
+###########################################################################
+#####
+##### method to get the covariance matrix of the returns
+#####
+##### @param returns - the returns [rows x stocks]
+#####
+###########################################################################
+def covariance_matrix(returns):
+    return pairwise_moments(returns)['covariance']
+
+
+###########################################################################
+#####
+##### method to get the correlation matrix of the returns
+#####
+##### @param returns - the returns [rows x stocks]
+#####
+###########################################################################
+def correlation_matrix(returns):
+    moments = pairwise_moments(returns)
+
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        correlation = moments['covariance'] / np.sqrt(moments['variance'] * moments['variance'].T)
+
+    return np.clip(correlation, -1.0, 1.0)
+
+
+###########################################################################
+#####
+##### method to get trailing-window correlation and beta against one stock
+#####
+##### the window for row i is the returns rows (i - window, i]. rolling
+##### sums come from cumulative sums, so every stock and row is computed at
+##### once; a window with a missing return is NaN.
+#####
+##### @param returns - the returns [rows x stocks]
+##### @param benchmark - the column number of the benchmark stock
+##### @param window - the amount of returns in each window
+#####
+##### @return [correlations, betas] - both [rows x stocks]
+#####
+###########################################################################
+def rolling_correlation_beta(returns, benchmark, window):
+    rows = returns.shape[0]
+    correlations = np.full(returns.shape, np.nan)
+    betas = np.full(returns.shape, np.nan)
+    if rows < window or window < 2:
+        return [correlations, betas]
+
+    valid = ~np.isnan(returns)
+    centered = _centered(returns, valid)
+    benchmarkReturns = centered[:, [benchmark]]
+    pairValid = valid & valid[:, [benchmark]]
+
+    def window_sums(values):
+        sums = np.zeros((rows + 1, values.shape[1]))
+        np.cumsum(values, axis = 0, out = sums[1:])
+        return sums[window:] - sums[:-window]
+
+    counts = window_sums(pairValid.astype(float))
+    x = window_sums(np.where(pairValid, centered, 0.0))
+    y = window_sums(np.where(pairValid, benchmarkReturns, 0.0))
+    xx = window_sums(np.where(pairValid, centered ** 2, 0.0))
+    yy = window_sums(np.where(pairValid, benchmarkReturns ** 2, 0.0))
+    xy = window_sums(np.where(pairValid, centered * benchmarkReturns, 0.0))
+
+    full = counts == window
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        covariance = xy - x * y / window
+        varianceX = xx - x ** 2 / window
+        varianceY = yy - y ** 2 / window
+        correlations[window - 1:] = np.where(full, np.clip(covariance / np.sqrt(varianceX * varianceY), -1.0, 1.0), np.nan)
+        betas[window - 1:] = np.where(full, covariance / varianceY, np.nan)
+
+    return [correlations, betas]
+
+
+###########################################################################
+#####
+##### method to summarize every stock against a benchmark
+#####
+##### @param prices - the aligned prices [rows x stocks]
+##### @param stocks - the stock symbols
+##### @param benchmark - the benchmark stock symbol
+#####
+##### @return dataframe with one row per stock [SUMMARY_COLUMNS]
+#####
+###########################################################################
+def summary(prices, stocks, benchmark):
+    returns = log_returns(prices)
+    column = list(stocks).index(benchmark)
+    moments = pairwise_moments(returns)
+    valid = ~np.isnan(returns)
+
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        variance = np.diag(moments['variance'])
+        covariance = moments['covariance'][:, column]
+        correlation = covariance / np.sqrt(moments['variance'][:, column] * moments['variance'][column, :])
+        beta = covariance / moments['variance'][column, :]
+        means = np.where(valid, returns, 0.0).sum(axis = 0) / valid.sum(axis = 0)
+
+    return pd.DataFrame({'stock': list(stocks),
+                         'observations': valid.sum(axis = 0),
+                         'mean_log_return': means,
+                         'volatility': np.sqrt(variance),
+                         'correlation': np.clip(correlation, -1.0, 1.0),
+                         'beta': beta}, columns = SUMMARY_COLUMNS)
+
+
+###########################################################################
+#####
+##### method to take the mean of every column away from its returns
+#####
+##### the means are sums over counts, so a column with no returns [ex. an
+##### outer join without fill] is all zeros instead of warning about the
+##### mean of an empty slice like np.nanmean
+#####
+##### @param returns - the returns [rows x stocks]
+##### @param valid - True where a return is not NaN
+#####
+###########################################################################
+def _centered(returns, valid):
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        means = np.where(valid, returns, 0.0).sum(axis = 0) / valid.sum(axis = 0)
+
+    return np.nan_to_num(np.where(valid, returns - means, 0.0))
@@ -0,0 +1,198 @@
+# imports
+import argparse
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+# render without a display, before pyplot is loaded by the chart modules
+import matplotlib
+matplotlib.use('Agg')
+
+from census import Visualize_Census
+from frame_cache import LRU_Cache
+from visualize import Visualize_Stocks
+
+
+# chart classes by job type
+CHART_TYPES = {'stock': Visualize_Stocks, 'census': Visualize_Census}
+
+# parsed data kept by each worker process
+_frameCache = None
+
+
+###########################################################################
+#####
+##### method to get the key of the input data a job reads
+#####
+##### jobs with the same key are rendered by the same worker so the data
+##### is only loaded once
+#####
+##### @param job - the job parameters
+#####
+###########################################################################
+def _input_key(job):
+    if job['type'] == 'census':
+        return ('census', job.get('data_folder_path'), job.get('is_wealth', True), job.get('table_number'))
+
+    paths = [job.get('file_path_one'), job.get('file_path_two')] + list(job.get('other_file_paths') or [])
+    return ('stock',) + tuple(path for path in paths if path != None)
+
+
+###########################################################################
+#####
+##### method to render a group of jobs that share input data
+#####
+##### @param jobs - the jobs, as [index, parameters]
+##### @param cache_bytes - the size of the in-memory data cache
+#####
+##### @return list of [index, report] for every job
+#####
+###########################################################################
+def _render_group(jobs, cache_bytes):
+    global _frameCache
+    if _frameCache == None:
+        _frameCache = LRU_Cache(cache_bytes)
+
+    reports = []
+
+    for index, job in jobs:
+        report = {'id': job.get('id', index), 'type': job['type'], 'status': 'ok', 'error': None}
+        wallStart = time.perf_counter()
+        cpuStart = time.process_time()
+
+        try:
+            if job['type'] not in CHART_TYPES:
+                raise ValueError('unknown job type {0}, expected one of {1}'.format(
+                    job['type'], list(CHART_TYPES.keys())))
+
+            parameters = {key: value for key, value in job.items() if key not in ['id', 'type']}
+            parameters['frame_cache'] = _frameCache
+            CHART_TYPES[job['type']](**parameters).main()
+        except Exception as error:
+            report['status'] = 'error'
+            report['error'] = '{0}: {1}'.format(type(error).__name__, error)
+            report['traceback'] = traceback.format_exc()
+
+        report['seconds'] = round(time.perf_counter() - wallStart, 4)
+        report['cpu_seconds'] = round(time.process_time() - cpuStart, 4)
+        reports.append([index, report])
+
+    return reports
+
+
+# class to render many stock and census charts from one manifest
+class Batch_Render:
+
+    # initialize parameters
+    def __init__(self, manifest_path, report_path = None, workers = 1, cache_megabytes = 512):
+        self._manifest_path = manifest_path
+        self._report_path = report_path
+        self._workers = workers
+        self._cache_bytes = cache_megabytes * 1024 * 1024
+
+        if report_path == None:
+            self._report_path = os.path.splitext(manifest_path)[0] + '_report.json'
+
+
+    # main method
+    def main(self):
+        jobs = self._read_manifest()
+        groups = {}
+
+        # keep jobs that share inputs together, in manifest order
+        for index, job in enumerate(jobs):
+            groups.setdefault(_input_key(job), []).append([index, job])
+
+        start = time.perf_counter()
+        results = []
+
+        if self._workers > 1:
+            with ProcessPoolExecutor(max_workers = self._workers) as executor:
+                futures = [executor.submit(_render_group, group, self._cache_bytes) for group in groups.values()]
+                for future in futures:
+                    results += future.result()
+        else:
+            for group in groups.values():
+                results += _render_group(group, self._cache_bytes)
+
+        reports = [report for index, report in sorted(results, key = lambda result: result[0])]
+        summary = {'jobs': len(reports),
+                   'failed': sum(report['status'] != 'ok' for report in reports),
+                   'seconds': round(time.perf_counter() - start, 4),
+                   'reports': reports}
+
+        with open(self._report_path, 'w') as reportFile:
+            json.dump(summary, reportFile, indent = 2, default = str)
+
+        return summary
+
+
+    ###########################################################################
+    #####
+    ##### method to read the job manifest
+    #####
+    ##### a json list of jobs, or an object with a 'jobs' list. every job
+    ##### has a 'type' ['stock' or 'census'], an optional 'id', and the
+    ##### parameters of Visualize_Stocks or Visualize_Census by name.
+    #####
+    ###########################################################################
+    def _read_manifest(self):
+        with open(self._manifest_path) as manifest:
+            jobs = json.load(manifest)
+
+        if isinstance(jobs, dict):
+            jobs = jobs['jobs']
+
+        for job in jobs:
+            if 'type' not in job:
+                raise ValueError('every job needs a type, one of {0}'.format(list(CHART_TYPES.keys())))
+
+        return jobs
+
+
+
+if __name__ == '__main__':
+    descrip = 'render many charts from a manifest'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-m',
+                           '--manifest',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='.json file of chart jobs')
+    arguments.add_argument('-r',
+                           '--report_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='the file path of the job report [default = <manifest>_report.json]')
+    arguments.add_argument('-j',
+                           '--workers',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=os.cpu_count(),
+                           help='the amount of render processes [default = cpu count]')
+    arguments.add_argument('-c',
+                           '--cache_megabytes',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=512,
+                           help='the size of the in-memory data cache of each process [default = 512]')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    summary = Batch_Render(variables['manifest'], variables['report_path'],
+                           variables['workers'], variables['cache_megabytes']).main()
+    print('rendered {0} jobs, {1} failed, in {2} seconds'.format(
+        summary['jobs'], summary['failed'], summary['seconds']))
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/batch_render.py -m '/Users/mtjen/Desktop/395/nightly.json' -j 8
@@ -0,0 +1,261 @@
+# imports
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+# render without a display, before pyplot is loaded by the chart modules
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+from census import Visualize_Census
+from price_store import Price_Store, convert_csv
+from summary_stats import summary_statistics
+from synthetic_data import CENSUS_CATEGORIES, CENSUS_GROUPS, write_census_workbooks, write_price_csvs
+from visualize import Visualize_Stocks
+
+
+# benchmarks that can be run, in run order
+BENCHMARKS = ['csv_load', 'store_load', 'csv_window_load', 'store_window_load', 'moving_average', 'one_stock_statistics', 'census_create_dataframe',
+              'census_create_dataframe_cached', 'stock_main', 'many_stock_main', 'census_main']
+
+
+# class to time the hot paths of the charts on synthetic data, writing the
+# timings as json so runs can be compared
+class Benchmark:
+
+    # initialize parameters
+    def __init__(self, result_file_path = None, rows = 2520, tickers = 5, repeats = 5,
+                     work_folder_path = None, benchmarks = None, compare_file_path = None, frequency = 'B'):
+        self._result_file_path = result_file_path
+        self._rows = rows
+        self._tickers = max(tickers, 2)
+        self._repeats = repeats
+        self._work_folder_path = work_folder_path
+        self._benchmarks = benchmarks if benchmarks != None else BENCHMARKS
+        self._compare_file_path = compare_file_path
+        self._frequency = frequency
+
+
+    # main method
+    def main(self):
+        for name in self._benchmarks:
+            if name not in BENCHMARKS:
+                raise ValueError('unknown benchmark {0}, expected one of {1}'.format(name, BENCHMARKS))
+
+        if self._work_folder_path == None:
+            with tempfile.TemporaryDirectory() as folder:
+                results = self._run(folder)
+        else:
+            results = self._run(self._work_folder_path)
+
+        if self._compare_file_path != None:
+            with open(self._compare_file_path) as file:
+                results['compared_to'] = self._compare_file_path
+                results['ratios'] = self.compare(json.load(file), results)
+
+        if self._result_file_path != None:
+            with open(self._result_file_path, 'w') as file:
+                json.dump(results, file, indent = 2)
+
+        return results
+
+
+    ###########################################################################
+    #####
+    ##### method to compare the median times of two runs
+    #####
+    ##### @param baseline - the results of the earlier run
+    ##### @param results - the results of this run
+    #####
+    ##### @return dictionary of benchmark to this median / baseline median
+    #####
+    ###########################################################################
+    @staticmethod
+    def compare(baseline, results):
+        ratios = {}
+
+        for name, timing in results['benchmarks'].items():
+            if name in baseline['benchmarks'] and baseline['benchmarks'][name]['median_seconds'] > 0:
+                ratios[name] = round(timing['median_seconds'] / baseline['benchmarks'][name]['median_seconds'], 3)
+
+        return ratios
+
+
+    ###########################################################################
+    #####
+    ##### method to write the synthetic data and run every benchmark
+    #####
+    ##### @param folder - the folder to write the synthetic data into
+    #####
+    ###########################################################################
+    def _run(self, folder):
+        priceFolder = os.path.join(folder, 'prices')
+        censusFolder = os.path.join(folder, 'census') + '/'
+        imagePath = os.path.join(folder, 'chart.png')
+
+        prices = write_price_csvs(priceFolder, self._rows, self._tickers, self._frequency)
+        write_census_workbooks(censusFolder, tables = 2)
+
+        stocks = list(prices.keys())
+        path = prices[stocks[0]]
+        storePath = convert_csv(path, os.path.join(folder, 'store.prices'))
+        category = list(CENSUS_CATEGORIES.keys())[0]
+        subCategory = CENSUS_CATEGORIES[category][1]
+        group = list(CENSUS_GROUPS.keys())[0]
+        subGroup = CENSUS_GROUPS[group][1]
+
+        def stock_chart(filePath = path, period = '1Y', **parameters):
+            return Visualize_Stocks(stocks[0], filePath, 'Close', period, result_file_path = imagePath,
+                                    days_per_average = [7, 30], **parameters)
+
+        def census_chart(use_cache):
+            return Visualize_Census(censusFolder, True, 1, category, subCategory, group, subGroup,
+                                    use_cache = use_cache, result_file_path = imagePath)
+
+        loaded = stock_chart()._read_csv(path, ['Date', 'Close'])
+        cases = {
+            'csv_load': lambda: stock_chart()._read_csv(path, ['Date', 'Close']),
+            'store_load': lambda: Price_Store(storePath).frame(['Date', 'Close']),
+            'csv_window_load': lambda: stock_chart(period = '1M')._load_data(),
+            'store_window_load': lambda: stock_chart(storePath, '1M')._load_data(),
+            'moving_average': lambda: stock_chart()._one_graph_moving_average(loaded.copy(), 'Close', [7, 30]),
+            'one_stock_statistics': lambda: summary_statistics(loaded, ['Close']),
+            'census_create_dataframe': lambda: [census_chart(False)._create_dataframe(year) for year in range(2013, 2021)],
+            'census_create_dataframe_cached': lambda: [census_chart(True)._create_dataframe(year) for year in range(2013, 2021)],
+            'stock_main': lambda: stock_chart().main(),
+            'many_stock_main': lambda: stock_chart(other_stocks = stocks[1:], other_file_paths = [prices[stock] for stock in stocks[1:]]).main(),
+            'census_main': lambda: census_chart(True).main()}
+
+        timings = {}
+        for name in self._benchmarks:
+            timings[name] = self._time(cases[name])
+
+        return {'environment': self._environment(),
+                'parameters': {'rows': self._rows, 'tickers': self._tickers, 'repeats': self._repeats,
+                               'frequency': self._frequency},
+                'benchmarks': timings}
+
+
+    ###########################################################################
+    #####
+    ##### method to time a benchmark, after one untimed warm up run
+    #####
+    ##### @param case - the function to time
+    #####
+    ###########################################################################
+    def _time(self, case):
+        case()
+
+        seconds = []
+        for repeat in range(self._repeats):
+            start = time.perf_counter()
+            case()
+            seconds.append(time.perf_counter() - start)
+
+        return {'min_seconds': round(min(seconds), 6),
+                'median_seconds': round(statistics.median(seconds), 6),
+                'max_seconds': round(max(seconds), 6),
+                'runs': len(seconds)}
+
+
+    ###########################################################################
+    #####
+    ##### method to describe the machine and library versions of a run
+    #####
+    ###########################################################################
+    def _environment(self):
+        return {'python': platform.python_version(),
+                'platform': platform.platform(),
+                'numpy': np.__version__,
+                'pandas': pd.__version__,
+                'matplotlib': matplotlib.__version__,
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+
+if __name__ == '__main__':
+    descrip = 'time the chart hot paths on synthetic data'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-r',
+                           '--result_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='json file to write the timings to [default = print only]')
+    arguments.add_argument('-n',
+                           '--rows',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=2520,
+                           help='the amount of price rows per stock [default = 2520]')
+    arguments.add_argument('-k',
+                           '--tickers',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=5,
+                           help='the amount of stocks in the many stock chart, at least 2 [default = 5]')
+    arguments.add_argument('-i',
+                           '--repeats',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=5,
+                           help='the amount of timed runs per benchmark [default = 5]')
+    arguments.add_argument('-f',
+                           '--frequency',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default='B',
+                           help='the pandas frequency of the price rows, use min for long histories [default = B]')
+    arguments.add_argument('-b',
+                           '--benchmarks',
+                           action='store',
+                           type=str,
+                           nargs='+',
+                           choices=BENCHMARKS,
+                           required=False,
+                           default=None,
+                           help='the benchmarks to run [default = all]')
+    arguments.add_argument('-w',
+                           '--work_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='folder to keep the synthetic data in [default = a temporary folder]')
+    arguments.add_argument('-c',
+                           '--compare_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='json file of an earlier run to compare median times against')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    if variables['repeats'] < 1:
+        arguments.error('--repeats must be positive')
+
+    results = Benchmark(variables['result_path'], variables['rows'], variables['tickers'], variables['repeats'],
+                        variables['work_path'], variables['benchmarks'], variables['compare_path'],
+                        variables['frequency']).main()
+    json.dump(results, sys.stdout, indent = 2)
+    print()
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/benchmark.py -n 100000 -f min -r /Users/mtjen/Desktop/395/benchmark.json
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/benchmark.py -n 100000 -f min -c /Users/mtjen/Desktop/395/benchmark.json
@@ -1,8 +1,164 @@
 # imports
 import argparse
-import matplotlib.pyplot as plot
-import pandas as pd
+import os
+from census_cache import Census_Cache
+from census_panel import Census_Panel
+from census_schema import Census_Schema, LEVELS
 from datetime import datetime
+from figures import figure_bytes, new_figure, release_figure
+from lazy_import import lazy_import
+from profiling import Stage_Profiler
+from render_cache import Render_Cache, parameter_digest, save_figure
+
+# heavy modules load on first use, after the command line is checked
+pd = lazy_import('pandas')
+futures = lazy_import('concurrent.futures')
+
+
+# error raised when census years fail to load, holding the error of each year
+class Census_Load_Error(Exception):
+
+    def __init__(self, errors):
+        self.errors = errors
+        message = '; '.join('{0}: {1}'.format(year, error) for year, error in errors.items())
+        super().__init__('failed to load census years -> ' + message)
+
+
+###########################################################################
+#####
+##### method to label every row of a sheet with its group
+#####
+##### rows with no values are group headers [ex. 'Race'], and the rows
+##### under a header are its sub_groups. rows before the first header
+##### [ex. 'Total'] are their own group.
+#####
+##### @param sheet - the excel sheet
+#####
+##### @return MultiIndex of (group, sub_group) for every row
+#####
+###########################################################################
+def group_index(sheet):
+    labels = pd.Series(sheet.index.astype(str), index = range(len(sheet)))
+    isHeader = sheet.isna().all(axis = 1).to_numpy()
+    groups = labels.where(isHeader).ffill().fillna(labels)
+
+    return pd.MultiIndex.from_arrays([groups.to_numpy(), labels.to_numpy()], names = ['group', 'sub_group'])
+
+
+###########################################################################
+#####
+##### method to check a query against the schema index, where a missing
+##### sub_category or sub_group stands for every one of them
+#####
+##### @param schema - the Census_Schema
+##### @param is_wealth - True for the wealth tables, False for debt
+##### @param table_number - the sheet index in the workbook
+##### @param category, sub_category, group, sub_group - the query
+#####
+##### @return list of years any of the queried values is in
+#####
+###########################################################################
+def schema_years(schema, is_wealth, table_number, category, sub_category, group, sub_group):
+    # an empty level is checked as None, so validate names the bad level
+    subCategories = [sub_category]
+    if sub_category == None:
+        subCategories = schema.values(is_wealth, table_number, [category]) or [None]
+    
+    years = set()
+    for subCategory in subCategories:
+        subGroups = [sub_group]
+        if sub_group == None:
+            subGroups = schema.values(is_wealth, table_number, [category, subCategory, group]) or [None]
+        for subGroup in subGroups:
+            years.update(schema.validate(is_wealth, table_number, category, subCategory, group, subGroup))
+    
+    return sorted(years)
+
+
+###########################################################################
+#####
+##### method to read an excel table, through the parsed sheet cache
+#####
+##### @param file_path - the path to the excel workbook
+##### @param table_number - the sheet index in the workbook
+##### @param cache - the Census_Cache, None to always parse the workbook
+#####
+###########################################################################
+def read_sheet(file_path, table_number, cache = None):
+    if cache != None:
+        return cache.load(file_path, table_number)
+    
+    sheet = pd.read_excel(file_path, 
+                  header = [2, 3],
+                  index_col = [0],
+                  sheet_name = table_number)
+    
+    return sheet
+
+
+###########################################################################
+#####
+##### method to get the desired value of a sheet, or every value of the
+##### group when sub_category or sub_group is None
+#####
+##### the sub_group has to be one of the group's own rows, the same rule
+##### the schema index validates queries with
+#####
+##### @param sheet - the excel sheet
+##### @param category, sub_category, group, sub_group - the query
+#####
+##### @return the value, or a series indexed by (sub_category, sub_group)
+#####         in sheet order
+#####
+###########################################################################
+def sheet_value(sheet, category, sub_category, group, sub_group):
+    if sub_category != None and sub_group != None:
+        labels = group_index(sheet)
+        rows = ((labels.get_level_values('group') == group) & (labels.get_level_values('sub_group') == sub_group)).nonzero()[0]
+        if len(rows) == 0:
+            raise KeyError('group {0!r} has no sub_group {1!r}'.format(group, sub_group))
+        return sheet[category][sub_category].iloc[rows[0]]
+    
+    if category not in sheet.columns.get_level_values(0):
+        return pd.Series(dtype = float)
+    
+    # rows of the group, leaving out its header row
+    labels = group_index(sheet)
+    rows = (labels.get_level_values('group') == group) & ~sheet.isna().all(axis = 1).to_numpy()
+    if sub_group != None:
+        rows &= labels.get_level_values('sub_group') == sub_group
+    
+    values = sheet[category]
+    if sub_category != None:
+        values = values[[sub_category]]
+    values = values[rows].apply(pd.to_numeric, errors = 'coerce')
+    values.index = labels.get_level_values('sub_group')[rows]
+    
+    return values.T.stack()
+
+
+###########################################################################
+#####
+##### method to get the desired value of one data year, run in the worker
+##### processes of a parallel load
+#####
+##### only plain values are passed, so nothing holding a lock [ex. the
+##### shared frame cache of the render service] has to be pickled
+#####
+##### @param data_folder_path - the census data folder
+##### @param is_wealth - True for the wealth tables, False for debt
+##### @param table_number - the sheet index in the workbook
+##### @param year - the data year
+##### @param query - [category, sub_category, group, sub_group]
+##### @param use_cache - True to read through the parsed sheet cache
+#####
+###########################################################################
+def year_value(data_folder_path, is_wealth, table_number, year, query, use_cache = True):
+    folder = 'wealth/' if is_wealth == True else 'debt/'
+    cache = Census_Cache(data_folder_path) if use_cache == True else None
+    sheet = read_sheet(data_folder_path + folder + str(year) + '.xlsx', table_number, cache)
+    
+    return sheet_value(sheet, *query)
 
 
 # class to visualize census data via graphs
@@ -10,7 +166,9 @@ class Visualize_Census:
 
     # initialize parameters
     def __init__(self, data_folder_path, is_wealth, table_number, category, sub_category,
-                     group, sub_group):
+                     group, sub_group, use_cache = True, workers = 1, schema_path = None,
+                     result_file_path = None, frame_cache = None, profiler = None, render_cache = None,
+                     panel_path = None, schema = None, panel = None):
         self._data_folder_path = data_folder_path
         self._is_wealth = is_wealth
         self._table_number = table_number
@@ -19,6 +177,39 @@ class Visualize_Census:
         self._group = group
         self._sub_group = sub_group
         self._years = [2013, 2014, 2015, 2016, 2017, 2018, 2019, 2020]
+        self._cache = None
+        self._workers = workers
+        self._schema = None
+        self._result_file_path = result_file_path
+        self._frame_cache = frame_cache
+        self._profiler = profiler if profiler != None else Stage_Profiler(enabled = False)
+        self._render_cache = render_cache
+        self._panel = None
+        
+        # without a sub_group [or sub_category] every one of them is drawn
+        self._faceted = sub_group == None or sub_category == None
+        
+        # keep parsed sheets on disk unless turned off
+        if use_cache == True:
+            self._cache = Census_Cache(data_folder_path)
+        
+        # a long running caller passes the schema and panel it keeps, so they are read once
+        if schema == None:
+            if schema_path == None:
+                schema_path = Census_Schema.default_path(data_folder_path)
+            schema = Census_Schema(schema_path)
+        if panel == None:
+            if panel_path == None:
+                panel_path = Census_Panel.default_path(data_folder_path)
+            panel = Census_Panel(panel_path)
+        
+        # use the schema index to check queries when it is built and up to date
+        if schema.is_current():
+            self._schema = schema
+        
+        # read values from the census panel when it is built and up to date
+        if panel.is_current():
+            self._panel = panel
         
         
     # main method
@@ -31,12 +222,81 @@ class Visualize_Census:
         minute = curr.strftime("%M")
         second = curr.strftime("%S")
         dateString = year + month + day + '_' + hour + minute + second
-        outputPath = self._data_folder_path + 'census_viz_' + dateString + '.jpg'
         
-        plot = self._graph()
-        plot.savefig(outputPath)
-            
+        # runs in the same second only share a name when they draw the same chart
+        outputPath = self._data_folder_path + 'census_viz_' + dateString + '_' + parameter_digest(self._chart_parameters()) + '.jpg'
+        if self._result_file_path != None:
+            outputPath = self._result_file_path
         
+        # an unchanged chart is linked from the render cache
+        key = None
+        if self._render_cache != None:
+            key = self._render_cache.key(self._chart_parameters(os.path.splitext(outputPath)[1]), self._input_paths())
+            if self._render_cache.fetch(key, outputPath) == True:
+                return
+        
+        graphFigure = self._graph()
+        self._profiler.begin('save')
+        try:
+            save_figure(graphFigure, outputPath)
+        finally:
+            release_figure(graphFigure)
+        if key != None:
+            self._render_cache.put(key, outputPath)
+        self._profiler.end()
+    
+    
+    ###########################################################################
+    #####
+    ##### method to render the graph to image bytes instead of a file
+    ##### 
+    ##### @param image_format - the image format [ex. 'png', 'jpeg']
+    #####
+    ###########################################################################
+    def render(self, image_format = 'png'):
+        graphFigure = self.figure()
+        
+        self._profiler.begin('save')
+        image = figure_bytes(graphFigure, image_format)
+        self._profiler.end()
+        
+        return image
+    
+    
+    ###########################################################################
+    #####
+    ##### method to draw the graph into a new figure, for notebooks and
+    ##### callers that save it themselves
+    #####
+    ##### the figure is not kept by pyplot, it is freed once it is dropped
+    #####
+    ###########################################################################
+    def figure(self):
+        return self._graph()
+    
+    
+    ###########################################################################
+    #####
+    ##### method to get every parameter that changes the graph
+    ##### 
+    ##### @param image_format - the image format [default = any]
+    #####
+    ###########################################################################
+    def _chart_parameters(self, image_format = None):
+        return {'format': image_format, 'is_wealth': self._is_wealth, 'table_number': self._table_number,
+                'category': self._category, 'sub_category': self._sub_category, 'group': self._group,
+                'sub_group': self._sub_group, 'years': self._years}
+    
+    
+    ###########################################################################
+    #####
+    ##### method to get the workbooks the graph reads
+    #####
+    ###########################################################################
+    def _input_paths(self):
+        folder = 'wealth/' if self._is_wealth == True else 'debt/'
+        return [self._data_folder_path + folder + str(year) + '.xlsx' for year in self._years]
+    
     
     ###########################################################################
     #####
@@ -55,12 +315,27 @@ class Visualize_Census:
             dataLocation += 'debt/'
         filePath = dataLocation + year + '.xlsx'
         
-        sheet = pd.read_excel(filePath, 
-                      header = [2, 3],
-                      index_col = [0],
-                      sheet_name = self._table_number)
+        # sheets already in memory are reused
+        if self._frame_cache != None:
+            key = ('sheet', os.path.abspath(filePath), os.stat(filePath).st_mtime_ns, self._table_number)
+            sheet = self._frame_cache.get(key)
+            if sheet is None:
+                sheet = self._read_sheet(filePath)
+                self._frame_cache.put(key, sheet)
+            return sheet
         
-        return sheet
+        return self._read_sheet(filePath)
+    
+    
+    ###########################################################################
+    #####
+    ##### method to read the excel table, through the parsed sheet cache
+    ##### 
+    ##### @param file_path - the path to the excel workbook
+    #####
+    ###########################################################################
+    def _read_sheet(self, file_path):
+        return read_sheet(file_path, self._table_number, self._cache)
     
     
     ###########################################################################
@@ -71,8 +346,7 @@ class Visualize_Census:
     #####
     ###########################################################################
     def _get_value(self, sheet):
-        value = sheet[self._category][self._sub_category][self._sub_group]
-        return value
+        return sheet_value(sheet, self._category, self._sub_category, self._group, self._sub_group)
     
     
     ###########################################################################
@@ -81,24 +355,147 @@ class Visualize_Census:
     #####
     ###########################################################################
     def _generate_data(self):
-        dataVals = []
+        years = self._available_years()
+        
+        if self._panel != None:
+            values = self._panel_values(years)
+        elif self._workers > 1:
+            values = self._generate_data_parallel(years)
+        else:
+            values = []
+            for year in years:
+                sheet = self._create_dataframe(year)
+                value = self._get_value(sheet)
+                values.append(value)
         
-        for year in self._years:
-            sheet = self._create_dataframe(year)
-            value = self._get_value(sheet)
-            dataVals.append(value)
+        # years without the value are left empty
+        yearValues = dict(zip(years, values))
+        if self._faceted == True:
+            return self._facet_frame(yearValues)
+        dataVals = [yearValues.get(year, float('nan')) for year in self._years]
             
         return dataVals
     
     
+    ###########################################################################
+    #####
+    ##### method to line the faceted values of every year up in one table
+    #####
+    ##### @param year_values - dictionary of year to its facet values
+    #####
+    ##### @return dataframe indexed by year with (sub_category, sub_group)
+    #####         columns in sheet order
+    #####
+    ###########################################################################
+    def _facet_frame(self, year_values):
+        if len(year_values) == 0:
+            return pd.DataFrame(index = self._years)
+        
+        years = list(year_values.keys())
+        frame = pd.concat([year_values[year] for year in years], axis = 1, keys = years, sort = False).T
+        frame.columns = frame.columns.set_names(['sub_category', 'sub_group'])
+        
+        return frame.reindex(self._years).astype(float)
+    
+    
+    ###########################################################################
+    #####
+    ##### method to get the years that have the desired value
+    #####
+    ##### without a schema index every year is assumed to have it; with one
+    ##### the query is checked before any workbook is opened
+    #####
+    ###########################################################################
+    def _available_years(self):
+        if self._schema == None:
+            return self._years
+        
+        years = schema_years(self._schema, self._is_wealth, self._table_number, self._category,
+                             self._sub_category, self._group, self._sub_group)
+        
+        return [year for year in self._years if year in years]
+    
+    
+    ###########################################################################
+    #####
+    ##### method to create data for the graph with a process pool, parsing
+    ##### the yearly workbooks at the same time
+    #####
+    ##### @param years - the data years to load
+    #####
+    ##### values stay in year order; if any year fails every failure is
+    ##### reported together in a Census_Load_Error
+    #####
+    ###########################################################################
+    def _generate_data_parallel(self, years):
+        if len(years) == 0:
+            return []
+        workers = min(self._workers, len(years))
+        
+        with futures.ProcessPoolExecutor(max_workers = workers) as executor:
+            query = [self._category, self._sub_category, self._group, self._sub_group]
+            yearFutures = [executor.submit(year_value, self._data_folder_path, self._is_wealth, self._table_number,
+                                           year, query, self._cache != None) for year in years]
+        
+        dataVals = []
+        errors = {}
+        
+        for year, future in zip(years, yearFutures):
+            error = future.exception()
+            if error != None:
+                errors[year] = '{0}: {1}'.format(type(error).__name__, error)
+            else:
+                dataVals.append(future.result())
+        
+        if len(errors) > 0:
+            raise Census_Load_Error(errors)
+        
+        return dataVals
+    
+    
+    ###########################################################################
+    #####
+    ##### method to get the desired values of every year in one panel query
+    #####
+    ##### like the sheet lookup, a year that has the table but not the
+    ##### group's sub_group raises a KeyError
+    #####
+    ##### @param years - the data years to get
+    #####
+    ###########################################################################
+    def _panel_values(self, years):
+        rows = self._panel.query(self._is_wealth, self._table_number, self._category, self._sub_category,
+                                 self._group, self._sub_group, years)
+        
+        if self._faceted == True:
+            table = rows.pivot_table(index = 'year', columns = ['sub_category', 'sub_group'], values = 'value',
+                                     aggfunc = 'first', observed = True)
+            return [table.loc[year].dropna() if year in table.index else pd.Series(dtype = float) for year in years]
+        
+        tableRows = self._panel.query(self._is_wealth, self._table_number, years = years)
+        isPair = ((tableRows['group'] == self._group) & (tableRows['sub_group'] == self._sub_group)).to_numpy()
+        missing = sorted(set(tableRows['year']) - set(tableRows.loc[isPair, 'year']))
+        if len(missing) > 0:
+            raise KeyError('group {0!r} has no sub_group {1!r} in {2}'.format(self._group, self._sub_group, missing))
+        
+        yearValues = rows.drop_duplicates('year').set_index('year')['value']
+        
+        return [yearValues.get(year, float('nan')) for year in years]
+    
+    
     ###########################################################################
     #####
     ##### method to create graph
     #####
     ###########################################################################
     def _graph(self):
+        self._profiler.begin('load')
         dataValues = self._generate_data()
         
+        self._profiler.begin('plot')
+        if self._faceted == True:
+            return self._graph_facets(dataValues)
+        
         wealthOrDebt = 'Wealth'
         if self._is_wealth == False:
             wealthOrDebt = 'Debt'
@@ -106,17 +503,77 @@ class Visualize_Census:
         title = '{0} from 2013-2020\n Category: {1} - {2}\n Group: {3}'.format(
             wealthOrDebt, self._category, self._sub_category, self._sub_group)
         
-        fig, ax = plot.subplots()
+        fig = new_figure()
+        ax = fig.subplots()
         ax.set_xlabel('Year')
         ax.set_ylabel('Value')
         ax.set_title(title)
         barVals = ax.bar(self._years, dataValues)
         ax.bar_label(barVals)
-        plot.tight_layout()
+        fig.tight_layout()
         
-        return plot
+        return fig
     
     
+    ###########################################################################
+    #####
+    ##### method to create a grid of graphs, one row per sub_category and one
+    ##### column per sub_group, sharing both axes
+    #####
+    ##### @param data - the faceted values [see _facet_frame]
+    #####
+    ###########################################################################
+    def _graph_facets(self, data):
+        wealthOrDebt = 'Wealth'
+        if self._is_wealth == False:
+            wealthOrDebt = 'Debt'
+        
+        subCategories = list(pd.unique(data.columns.get_level_values('sub_category')))
+        subGroups = list(pd.unique(data.columns.get_level_values('sub_group')))
+        if len(subCategories) == 0 or len(subGroups) == 0:
+            raise ValueError('no values for group {0!r} in category {1!r}'.format(self._group, self._category))
+        
+        fig = new_figure(figsize = (max(6.4, 2.4 * len(subGroups)), max(4.8, 2 * len(subCategories) + 1.5)))
+        axes = fig.subplots(len(subCategories), len(subGroups), sharex = True, sharey = True, squeeze = False)
+        
+        for row, subCategory in enumerate(subCategories):
+            for column, subGroup in enumerate(subGroups):
+                ax = axes[row][column]
+                if (subCategory, subGroup) in data.columns:
+                    ax.bar(self._years, data[(subCategory, subGroup)].to_numpy())
+                if row == 0:
+                    ax.set_title(subGroup, fontsize = 'small')
+                if column == 0:
+                    ax.set_ylabel(subCategory, fontsize = 'small')
+                if row == len(subCategories) - 1:
+                    ax.set_xlabel('Year')
+                    ax.set_xticks(self._years)
+                    ax.tick_params(axis = 'x', labelrotation = 90)
+        
+        fig.suptitle('{0} from 2013-2020\n Category: {1}\n Group: {2}'.format(wealthOrDebt, self._category, self._group))
+        fig.tight_layout()
+        
+        return fig
+    
+    
+###########################################################################
+#####
+##### method to read a true/false command line value
+#####
+##### argparse's type=bool treats any text, even 'False', as True
+#####
+##### @param value - the command line text
+#####
+###########################################################################
+def str_to_bool(value):
+    text = str(value).strip().lower()
+    if text in ['true', 't', 'yes', 'y', '1', 'wealth']:
+        return True
+    if text in ['false', 'f', 'no', 'n', '0', 'debt']:
+        return False
+    raise argparse.ArgumentTypeError('expected True or False, got {0!r}'.format(value))
+
+
 if __name__ == '__main__':
     descrip = 'visualize census data'
     arguments = argparse.ArgumentParser(description = descrip)
@@ -130,7 +587,7 @@ if __name__ == '__main__':
     arguments.add_argument('-w',
                            '--is_wealth',
                            action='store',
-                           type=bool,
+                           type=str_to_bool,
                            required=False,
                            default=True,
                            help='set False if looking for debt [default = True]')
@@ -144,26 +601,74 @@ if __name__ == '__main__':
                            '--category',
                            action='store',
                            type=str,
-                           required=True,
+                           required=False,
+                           default=None,
                            help='the category for data')
     arguments.add_argument('-s_c',
                            '--sub_category',
                            action='store',
                            type=str,
-                           required=True,
-                           help='the subcategory for data')
+                           required=False,
+                           default=None,
+                           help='the subcategory for data [default = every one, as a grid]')
     arguments.add_argument('-g',
                            '--group',
                            action='store',
                            type=str,
-                           required=True,
+                           required=False,
+                           default=None,
                            help='the group for data')
     arguments.add_argument('-s_g',
                            '--sub_group',
                            action='store',
                            type=str,
-                           required=True,
-                           help='the subgroup for data')
+                           required=False,
+                           default=None,
+                           help='the subgroup for data [default = every one of the group, as a grid]')
+    arguments.add_argument('-j',
+                           '--workers',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=1,
+                           help='the amount of processes used to load the yearly workbooks [default = 1]')
+    arguments.add_argument('--no_cache',
+                           action='store_true',
+                           help='always parse the workbooks instead of using the parsed sheet cache')
+    arguments.add_argument('--schema_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='file path of the schema index [default = <data_folder_path>/census_schema.json]')
+    arguments.add_argument('--panel_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='file path of the census panel, used when built [default = <data_folder_path>/census_panel.pkl]')
+    arguments.add_argument('-l',
+                           '--list',
+                           action='store_true',
+                           help='list the valid values of the first query level not given, using the schema index')
+    arguments.add_argument('--no_render_cache',
+                           action='store_true',
+                           help='always draw the graph instead of linking an unchanged one from <data_folder_path>/.render_cache')
+    arguments.add_argument('--render_cache_megabytes',
+                           action='store',
+                           type=float,
+                           required=False,
+                           default=256,
+                           help='the size limit of the render cache [default = 256]')
+    arguments.add_argument('--profile',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='json file to write the time and peak memory of each stage to')
+    arguments.add_argument('--profile_memory',
+                           action='store_true',
+                           help='also trace python allocations of each stage with tracemalloc, which slows the stages down')
 
     parsed = arguments.parse_args()
     variables = vars(parsed)
@@ -175,9 +680,73 @@ if __name__ == '__main__':
     subCat = variables['sub_category']
     group = variables['group']
     subGroup = variables['sub_group']
+    useCache = not variables['no_cache']
+    workers = variables['workers']
+    schemaPath = variables['schema_path']
+    if schemaPath == None:
+        schemaPath = Census_Schema.default_path(path)
+    query = [cat, subCat, group, subGroup]
+
+    # check the inputs before any heavy module is loaded
+    if not os.path.isdir(path):
+        arguments.error('data folder {0} does not exist'.format(path))
+    wealthOrDebt = 'wealth' if wealth == True else 'debt'
+    if not os.path.isdir(os.path.join(path, wealthOrDebt)):
+        arguments.error('data folder {0} has no {1} folder'.format(path, wealthOrDebt))
+
+    # list valid values from the schema index instead of drawing
+    if variables['list'] == True:
+        if not os.path.exists(schemaPath):
+            arguments.error('no schema index at {0}, build it with census_schema.py'.format(schemaPath))
+        if not Census_Schema(schemaPath).is_current():
+            arguments.error('the schema index at {0} is older than the workbooks, rebuild it with census_schema.py'.format(schemaPath))
+        prefix = query[:query.index(None)] if None in query else query[:-1]
+        level = LEVELS[len(prefix)]
+        schema = Census_Schema(schemaPath)
+        try:
+            schema.validate_prefix(wealth, table, prefix)
+        except ValueError as error:
+            arguments.error(str(error))
+        values = schema.values(wealth, table, prefix)
+        print('valid {0} values:'.format(level))
+        for value in values:
+            print('  ' + value)
+        arguments.exit()
+
+    # without a sub_category or sub_group every one of them is drawn
+    missing = [LEVELS[index] for index in range(len(query)) if query[index] == None and LEVELS[index] in ['category', 'group']]
+    if len(missing) > 0:
+        arguments.error('the following arguments are required: ' + ', '.join(missing))
+
+    # check the query before any workbook is parsed, unless a workbook changed since the index was built
+    schema = Census_Schema(schemaPath)
+    if schema.is_current():
+        try:
+            schema_years(schema, wealth, table, cat, subCat, group, subGroup)
+        except ValueError as error:
+            arguments.error(str(error))
 
-    Visualize_Census(path, wealth, table, cat, subCat, group, subGroup).main()
+    if variables['profile_memory'] == True and variables['profile'] == None:
+        arguments.error('--profile_memory needs --profile')
+
+    profiler = None
+    if variables['profile'] != None:
+        # tracemalloc slows the stages it times, so it is only on when asked for
+        profiler = Stage_Profiler(trace_memory = variables['profile_memory'])
+
+    renderCache = None
+    if variables['no_render_cache'] == False:
+        renderCache = Render_Cache(os.path.join(path, '.render_cache'), variables['render_cache_megabytes'])
+
+    Visualize_Census(path, wealth, table, cat, subCat, group, subGroup, useCache, workers, schemaPath,
+                     profiler = profiler, render_cache = renderCache, panel_path = variables['panel_path']).main()
+
+    if profiler != None:
+        profiler.write(variables['profile'])
     
 
 # example
-# /usr/local/bin/python3 /Users/mtjen/Desktop/395/census.py -p '/Users/mtjen/desktop/table_data/' -w True -t 2 -c 'Percent Owning Assets at Financial Institutions' -s_c 'Total' -g 'Race' -s_g 'White alone'
\ No newline at end of file
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/census.py -p '/Users/mtjen/desktop/table_data/' -w True -t 2 -c 'Percent Owning Assets at Financial Institutions' -s_c 'Total' -g 'Race' -s_g 'White alone'
+
+# every sub_group of a group example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/census.py -p '/Users/mtjen/desktop/table_data/' -w True -t 2 -c 'Percent Owning Assets at Financial Institutions' -g 'Race'
\ No newline at end of file
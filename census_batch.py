@@ -0,0 +1,204 @@
+# imports
+import argparse
+import json
+from census import group_index
+from census_cache import Census_Cache
+from datetime import datetime
+from lazy_import import lazy_import
+
+# heavy modules load on first use, after the command line is checked
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+# columns every query in a manifest needs
+QUERY_COLUMNS = ['is_wealth', 'table_number', 'category', 'sub_category', 'group', 'sub_group']
+
+
+# class to extract many census values with one read of each workbook table
+class Census_Batch:
+
+    # initialize parameters
+    def __init__(self, data_folder_path, manifest_path, result_file_path = None, use_cache = True):
+        self._data_folder_path = data_folder_path
+        self._manifest_path = manifest_path
+        self._result_file_path = result_file_path
+        self._years = [2013, 2014, 2015, 2016, 2017, 2018, 2019, 2020]
+        self._cache = None
+
+        # keep parsed sheets on disk unless turned off
+        if use_cache == True:
+            self._cache = Census_Cache(data_folder_path)
+
+
+    # main method
+    def main(self):
+        if self._result_file_path != None:
+            outputPath = self._result_file_path
+        else:
+            dateString = datetime.now().strftime('%Y%m%d_%H%M%S')
+            outputPath = self._data_folder_path + 'census_batch_' + dateString + '.csv'
+
+        queries = self._read_manifest()
+        results = self.extract(queries)
+        results.to_csv(outputPath, index = False)
+
+        return outputPath
+
+
+    ###########################################################################
+    #####
+    ##### method to get the values of many queries
+    #####
+    ##### queries are grouped by wealth/debt and table so each year's table
+    ##### is read once, then every cell is taken in one selection
+    #####
+    ##### @param queries - dataframe with one query per row [QUERY_COLUMNS]
+    #####
+    ##### @return tidy dataframe with one row per query and year
+    #####
+    ###########################################################################
+    def extract(self, queries):
+        queries = queries[QUERY_COLUMNS].reset_index(drop = True)
+        results = []
+
+        for (isWealth, tableNumber), tableQueries in queries.groupby(['is_wealth', 'table_number'], sort = False):
+            for year in self._years:
+                sheet = self._create_dataframe(isWealth, tableNumber, year)
+                yearResults = tableQueries.copy()
+                yearResults.insert(0, 'year', year)
+                yearResults['value'] = self._get_values(sheet, tableQueries)
+                results.append(yearResults)
+
+        if len(results) == 0:
+            return pd.DataFrame(columns = ['year'] + QUERY_COLUMNS + ['value'])
+
+        return pd.concat(results, ignore_index = True)
+
+
+    ###########################################################################
+    #####
+    ##### method to read the query manifest [.json list of objects or .csv]
+    #####
+    ###########################################################################
+    def _read_manifest(self):
+        if self._manifest_path.endswith('.json'):
+            with open(self._manifest_path) as manifest:
+                queries = pd.DataFrame(json.load(manifest))
+        else:
+            queries = pd.read_csv(self._manifest_path, dtype = str)
+
+        missing = [column for column in QUERY_COLUMNS if column not in queries.columns]
+        if len(missing) > 0:
+            raise ValueError('manifest is missing columns {0}'.format(missing))
+
+        # csv values arrive as strings
+        queries['is_wealth'] = queries['is_wealth'].map(
+            lambda value: str(value).strip().lower() in ['true', '1', 'yes', 'wealth'])
+        queries['table_number'] = queries['table_number'].astype(int)
+
+        return queries
+
+
+    ###########################################################################
+    #####
+    ##### method to create a dataframe for excel table
+    #####
+    ##### @param is_wealth - True for the wealth tables, False for debt
+    ##### @param table_number - the sheet index in the workbook
+    ##### @param year - the data year
+    #####
+    ###########################################################################
+    def _create_dataframe(self, is_wealth, table_number, year):
+        dataLocation = self._data_folder_path
+
+        if is_wealth == True:
+            dataLocation += 'wealth/'
+        else:
+            dataLocation += 'debt/'
+        filePath = dataLocation + str(year) + '.xlsx'
+
+        if self._cache != None:
+            return self._cache.load(filePath, table_number)
+
+        sheet = pd.read_excel(filePath,
+                              header = [2, 3],
+                              index_col = [0],
+                              sheet_name = table_number)
+
+        return sheet
+
+
+    ###########################################################################
+    #####
+    ##### method to take the values of every query from one sheet at once
+    #####
+    ##### rows are matched on (group, sub_group), so the sub_group has to be
+    ##### one of the group's own rows like in Visualize_Census and the schema
+    ##### index. cells that do not exist are NaN.
+    #####
+    ##### @param sheet - the excel sheet
+    ##### @param queries - the queries for this sheet
+    #####
+    ###########################################################################
+    def _get_values(self, sheet, queries):
+        rowIndex = group_index(sheet)
+        positions = pd.Series(np.arange(len(rowIndex), dtype = float))
+
+        pairRows = positions.set_axis(rowIndex)
+        pairRows = pairRows[~pairRows.index.duplicated()]
+        queryPairs = pd.MultiIndex.from_arrays([queries['group'], queries['sub_group']])
+        rows = pairRows.reindex(queryPairs).to_numpy()
+
+        columnKeys = list(zip(queries['category'], queries['sub_category']))
+        columns = sheet.columns.get_indexer(columnKeys)
+
+        found = ~np.isnan(rows) & (columns != -1)
+        result = np.full(len(queries), np.nan)
+        cells = sheet.to_numpy()[rows[found].astype(int), columns[found]]
+        result[found] = pd.to_numeric(pd.Series(cells, dtype = object), errors = 'coerce').to_numpy(dtype = float)
+
+        return result
+
+
+
+if __name__ == '__main__':
+    descrip = 'extract many census values without drawing charts'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-p',
+                           '--data_folder_path',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='file path of data')
+    arguments.add_argument('-m',
+                           '--manifest',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='.json or .csv file of queries with columns ' + ', '.join(QUERY_COLUMNS))
+    arguments.add_argument('-r',
+                           '--result_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='the file path of the result .csv')
+    arguments.add_argument('--no_cache',
+                           action='store_true',
+                           help='always parse the workbooks instead of using the parsed sheet cache')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    path = variables['data_folder_path']
+    manifest = variables['manifest']
+    result = variables['result_path']
+    useCache = not variables['no_cache']
+
+    print(Census_Batch(path, manifest, result, useCache).main())
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/census_batch.py -p '/Users/mtjen/desktop/table_data/' -m '/Users/mtjen/desktop/queries.json'
@@ -0,0 +1,192 @@
+# imports
+import argparse
+import hashlib
+import os
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+pd = lazy_import('pandas')
+
+
+# class to keep parsed census sheets on disk so workbooks are parsed once
+class Census_Cache:
+
+    # initialize parameters
+    def __init__(self, data_folder_path, cache_folder_path = None):
+        self._data_folder_path = data_folder_path
+        self._cache_folder_path = cache_folder_path
+        self._years = [2013, 2014, 2015, 2016, 2017, 2018, 2019, 2020]
+
+        if cache_folder_path == None:
+            self._cache_folder_path = os.path.join(data_folder_path, '.census_cache')
+
+
+    ###########################################################################
+    #####
+    ##### method to get a parsed sheet, only parsing the workbook on a miss
+    #####
+    ##### @param file_path - the path to the excel workbook
+    ##### @param table_number - the sheet index in the workbook
+    #####
+    ###########################################################################
+    def load(self, file_path, table_number):
+        cachePath = self._cache_path(file_path, table_number)
+
+        if os.path.exists(cachePath):
+            return pd.read_pickle(cachePath)
+
+        sheet = self._read_sheet(file_path, table_number)
+        self._store(file_path, table_number, sheet)
+
+        return sheet
+
+
+    ###########################################################################
+    #####
+    ##### method to parse every table of every workbook into the cache
+    #####
+    ##### each workbook is opened once and all of its sheets are stored
+    #####
+    ###########################################################################
+    def warm(self):
+        warmed = []
+
+        for folder in ['wealth', 'debt']:
+            for year in self._years:
+                filePath = os.path.join(self._data_folder_path, folder, str(year) + '.xlsx')
+                if not os.path.exists(filePath):
+                    continue
+
+                sheets = pd.read_excel(filePath,
+                                       header = [2, 3],
+                                       index_col = [0],
+                                       sheet_name = None)
+                for tableNumber, sheet in enumerate(sheets.values()):
+                    self._store(filePath, tableNumber, sheet)
+                    warmed.append([filePath, tableNumber])
+
+        return warmed
+
+
+    ###########################################################################
+    #####
+    ##### method to delete every cached sheet
+    #####
+    ###########################################################################
+    def clear(self):
+        removed = 0
+
+        if os.path.isdir(self._cache_folder_path):
+            for name in os.listdir(self._cache_folder_path):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self._cache_folder_path, name))
+                    removed += 1
+
+        return removed
+
+
+    ###########################################################################
+    #####
+    ##### method to parse one sheet of a workbook
+    #####
+    ##### @param file_path - the path to the excel workbook
+    ##### @param table_number - the sheet index in the workbook
+    #####
+    ###########################################################################
+    def _read_sheet(self, file_path, table_number):
+        sheet = pd.read_excel(file_path,
+                              header = [2, 3],
+                              index_col = [0],
+                              sheet_name = table_number)
+
+        return sheet
+
+
+    ###########################################################################
+    #####
+    ##### method to write a parsed sheet and drop older versions of it
+    #####
+    ##### @param file_path - the path to the excel workbook
+    ##### @param table_number - the sheet index in the workbook
+    ##### @param sheet - the parsed sheet
+    #####
+    ###########################################################################
+    def _store(self, file_path, table_number, sheet):
+        os.makedirs(self._cache_folder_path, exist_ok = True)
+        cachePath = self._cache_path(file_path, table_number)
+        prefix = os.path.basename(cachePath).split('_')[0]
+
+        # remove entries written for older versions of the workbook
+        for name in os.listdir(self._cache_folder_path):
+            if name.startswith(prefix + '_') and name.endswith('.pkl') and name != os.path.basename(cachePath):
+                try:
+                    os.remove(os.path.join(self._cache_folder_path, name))
+                except FileNotFoundError:
+                    pass
+
+        # write to a temporary file first so readers never see a partial file
+        tempPath = '{0}.{1}.tmp'.format(cachePath, os.getpid())
+        sheet.to_pickle(tempPath)
+        os.replace(tempPath, cachePath)
+
+
+    ###########################################################################
+    #####
+    ##### method to get the cache file for a workbook sheet
+    #####
+    ##### the name is keyed on the workbook path and table number, plus the
+    ##### workbook size and modification time so edits cause a re-parse
+    #####
+    ##### @param file_path - the path to the excel workbook
+    ##### @param table_number - the sheet index in the workbook
+    #####
+    ###########################################################################
+    def _cache_path(self, file_path, table_number):
+        fileStats = os.stat(file_path)
+        source = '{0}|{1}'.format(os.path.abspath(file_path), table_number)
+        version = '{0}|{1}'.format(fileStats.st_mtime_ns, fileStats.st_size)
+
+        sourceKey = hashlib.sha1(source.encode()).hexdigest()[:16]
+        versionKey = hashlib.sha1(version.encode()).hexdigest()[:16]
+
+        return os.path.join(self._cache_folder_path, sourceKey + '_' + versionKey + '.pkl')
+
+
+
+if __name__ == '__main__':
+    descrip = 'warm or clear the parsed census sheet cache'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-p',
+                           '--data_folder_path',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='file path of data')
+    arguments.add_argument('-c',
+                           '--cache_folder_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='file path of the cache [default = <data_folder_path>/.census_cache]')
+    arguments.add_argument('--warm',
+                           action='store_true',
+                           help='parse every workbook table into the cache')
+    arguments.add_argument('--clear',
+                           action='store_true',
+                           help='delete every cached table')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    cache = Census_Cache(variables['data_folder_path'], variables['cache_folder_path'])
+
+    if variables['clear'] == True:
+        print('removed {0} cached tables'.format(cache.clear()))
+    if variables['warm'] == True:
+        print('cached {0} tables'.format(len(cache.warm())))
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/census_cache.py -p '/Users/mtjen/desktop/table_data/' --warm
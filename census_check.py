@@ -0,0 +1,130 @@
+# imports
+import argparse
+import json
+import os
+import sys
+import tempfile
+from census import Visualize_Census, schema_years
+from census_panel import Census_Panel
+from census_schema import Census_Schema
+from lazy_import import lazy_import
+from synthetic_data import CENSUS_CATEGORIES, CENSUS_GROUPS, write_census_workbooks
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+
+
+# ways a census query can be answered
+LOOKUPS = ['sheet', 'panel', 'schema_sheet', 'schema_panel']
+
+
+# class to check a census query gets the same answer whichever index has
+# been built: read from the sheets, from the census panel, and checked
+# against the schema index first
+#
+# a query whose group owns its sub_group has the same values on every
+# path, and one whose group does not is rejected on every path
+class Census_Check:
+
+    # initialize parameters
+    def __init__(self, tables = 1):
+        self._tables = tables
+
+
+    # main method
+    def main(self):
+        with tempfile.TemporaryDirectory() as folder:
+            return self._run(folder + '/')
+
+
+    ###########################################################################
+    #####
+    ##### method to write the synthetic workbooks and indexes and compare
+    ##### the answers of every lookup
+    #####
+    ##### @param folder - the folder to write the data into
+    #####
+    ###########################################################################
+    def _run(self, folder):
+        write_census_workbooks(folder, tables = self._tables)
+        Census_Schema(Census_Schema.default_path(folder)).build(folder)
+        Census_Panel(Census_Panel.default_path(folder)).build(folder)
+
+        category = list(CENSUS_CATEGORIES.keys())[0]
+        subCategory = CENSUS_CATEGORIES[category][0]
+        groups = list(CENSUS_GROUPS.keys())
+        queries = {'owned': [category, subCategory, groups[0], CENSUS_GROUPS[groups[0]][1]],
+                   'mismatched': [category, subCategory, groups[1], CENSUS_GROUPS[groups[0]][1]]}
+
+        results = {'queries': {}, 'failures': []}
+        for name, query in queries.items():
+            answers = {lookup: self._answer(folder, lookup, query) for lookup in LOOKUPS}
+            results['queries'][name] = {'query': query, 'answers': answers}
+
+            kinds = set(answer['kind'] for answer in answers.values())
+            if len(kinds) > 1:
+                results['failures'].append('{0} query is rejected by some lookups only: {1}'.format(name, answers))
+            elif kinds == {'values'}:
+                values = [answer['values'] for answer in answers.values()]
+                if any(not np.array_equal(values[0], other, equal_nan = True) for other in values[1:]):
+                    results['failures'].append('{0} query has different values per lookup: {1}'.format(name, answers))
+
+        if results['queries']['mismatched']['answers']['sheet']['kind'] != 'rejected':
+            results['failures'].append('a group that does not own its sub_group is not rejected')
+
+        return results
+
+
+    ###########################################################################
+    #####
+    ##### method to answer a query one way
+    #####
+    ##### @param folder - the census data folder
+    ##### @param lookup - one of LOOKUPS
+    ##### @param query - [category, sub_category, group, sub_group]
+    #####
+    ##### @return dictionary with a 'kind' of values or rejected
+    #####
+    ###########################################################################
+    def _answer(self, folder, lookup, query):
+        missing = os.path.join(folder, 'missing')
+        schemaPath = Census_Schema.default_path(folder) if lookup.startswith('schema') else missing
+        panelPath = Census_Panel.default_path(folder) if lookup.endswith('panel') else missing
+
+        try:
+            if lookup.startswith('schema'):
+                schema_years(Census_Schema(schemaPath), True, 0, *query)
+            chart = Visualize_Census(folder, True, 0, *query, use_cache = False,
+                                     schema_path = schemaPath, panel_path = panelPath)
+            values = [float(value) for value in chart._generate_data()]
+        except (KeyError, ValueError) as error:
+            return {'kind': 'rejected', 'error': '{0}: {1}'.format(type(error).__name__, error)}
+
+        return {'kind': 'values', 'values': values}
+
+
+
+if __name__ == '__main__':
+    descrip = 'check census queries get the same answer from the sheets, the panel and the schema index'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-t',
+                           '--tables',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=1,
+                           help='the amount of synthetic tables per workbook [default = 1]')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    results = Census_Check(variables['tables']).main()
+    print(json.dumps(results, indent = 2))
+
+    if len(results['failures']) > 0:
+        sys.exit(1)
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/census_check.py
@@ -0,0 +1,320 @@
+# imports
+import argparse
+import os
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+# columns of the panel, one row per census value
+PANEL_COLUMNS = ['year', 'is_wealth', 'table', 'category', 'sub_category', 'group', 'sub_group', 'value']
+
+# text columns, stored as categoricals
+LABEL_COLUMNS = ['category', 'sub_category', 'group', 'sub_group']
+
+
+# class to build and query one long-format panel of every census value
+#
+# every year, wealth/debt workbook and table is flattened into rows of
+# (year, is_wealth, table, category, sub_category, group, sub_group, value).
+# labels are categoricals and the keys small integers, so the panel is a
+# few megabytes and every query is a vectorized filter.
+class Census_Panel:
+
+    # initialize parameters
+    def __init__(self, panel_path):
+        self._panel_path = panel_path
+        self._panel = None
+
+
+    ###########################################################################
+    #####
+    ##### method to get the default panel path of a data folder
+    #####
+    ##### @param data_folder_path - the census data folder
+    #####
+    ###########################################################################
+    @staticmethod
+    def default_path(data_folder_path):
+        return os.path.join(data_folder_path, 'census_panel.pkl')
+
+
+    ###########################################################################
+    #####
+    ##### method to build the panel from the workbooks
+    #####
+    ##### sheets are read through the parsed sheet cache, so a warm cache
+    ##### makes this a few seconds
+    #####
+    ##### @param data_folder_path - the census data folder
+    ##### @param years - the data years to read
+    #####
+    ###########################################################################
+    def build(self, data_folder_path, years = None):
+        from census_cache import Census_Cache
+
+        if years == None:
+            years = [2013, 2014, 2015, 2016, 2017, 2018, 2019, 2020]
+
+        cache = Census_Cache(data_folder_path)
+        frames = []
+        sources = {}
+
+        for folder in ['wealth', 'debt']:
+            for year in years:
+                filePath = os.path.join(data_folder_path, folder, str(year) + '.xlsx')
+                if not os.path.exists(filePath):
+                    continue
+                sources[os.path.abspath(filePath)] = os.stat(filePath).st_mtime_ns
+
+                with pd.ExcelFile(filePath) as workbook:
+                    tables = len(workbook.sheet_names)
+                for tableNumber in range(tables):
+                    sheet = cache.load(filePath, tableNumber)
+                    frames.append(self._flatten(sheet, year, folder == 'wealth', tableNumber))
+
+        panel = pd.concat(frames, ignore_index = True) if len(frames) > 0 else pd.DataFrame(columns = PANEL_COLUMNS)
+        panel = panel.astype({'year': 'int16', 'is_wealth': 'bool', 'table': 'int16', 'value': 'float64'})
+        # categories keep the order of the sheets, not alphabetical order
+        for column in LABEL_COLUMNS:
+            panel[column] = pd.Categorical(panel[column], categories = pd.unique(panel[column]))
+        panel.attrs['sources'] = sources
+
+        temporaryPath = '{0}.{1}.tmp'.format(self._panel_path, os.getpid())
+        panel.to_pickle(temporaryPath)
+        os.replace(temporaryPath, self._panel_path)
+        self._panel = panel
+
+        return panel
+
+
+    ###########################################################################
+    #####
+    ##### method to check the panel exists and no workbook changed since it
+    ##### was built
+    #####
+    ###########################################################################
+    def is_current(self):
+        if not os.path.exists(self._panel_path):
+            return False
+
+        for filePath, modified in self.load().attrs.get('sources', {}).items():
+            if not os.path.exists(filePath) or os.stat(filePath).st_mtime_ns != modified:
+                return False
+
+        return True
+
+
+    ###########################################################################
+    #####
+    ##### method to read the panel file once
+    #####
+    ###########################################################################
+    def load(self):
+        if self._panel is None:
+            self._panel = pd.read_pickle(self._panel_path)
+
+        return self._panel
+
+
+    ###########################################################################
+    #####
+    ##### method to get the rows matching every given filter
+    #####
+    ##### each filter is a single value or a list of values, None matches
+    ##### everything. years can also be a (first, last) range tuple.
+    #####
+    ##### @param is_wealth - True for the wealth tables, False for debt
+    ##### @param table - the sheet index in the workbook
+    ##### @param category, sub_category, group, sub_group - the labels
+    ##### @param years - a year, list of years or (first, last) tuple
+    #####
+    ##### @return dataframe of the matching panel rows
+    #####
+    ###########################################################################
+    def query(self, is_wealth = None, table = None, category = None, sub_category = None,
+                  group = None, sub_group = None, years = None):
+        panel = self.load()
+        keep = np.ones(len(panel), dtype = bool)
+
+        filters = {'is_wealth': is_wealth, 'table': table, 'category': category,
+                   'sub_category': sub_category, 'group': group, 'sub_group': sub_group}
+        for column, wanted in filters.items():
+            if wanted is None:
+                continue
+            if isinstance(wanted, (list, tuple, set)):
+                keep &= panel[column].isin(list(wanted)).to_numpy()
+            else:
+                keep &= (panel[column] == wanted).to_numpy()
+
+        if isinstance(years, tuple):
+            keep &= ((panel['year'] >= years[0]) & (panel['year'] <= years[1])).to_numpy()
+        elif years is not None:
+            keep &= panel['year'].isin(np.atleast_1d(years)).to_numpy()
+
+        return panel[keep]
+
+
+    ###########################################################################
+    #####
+    ##### method to get a year by label table of the matching values
+    #####
+    ##### ex. by = 'sub_group' with a group gives every sub_group of the
+    ##### group over all years in one call
+    #####
+    ##### @param by - the label column to spread into columns
+    ##### @param filters - the query filters [see query]
+    #####
+    ##### @return dataframe indexed by year with one column per label
+    #####
+    ###########################################################################
+    def by_year(self, by = 'sub_group', **filters):
+        rows = self.query(**filters)
+
+        return rows.pivot_table(index = 'year', columns = by, values = 'value', aggfunc = 'first', observed = True)
+
+
+    ###########################################################################
+    #####
+    ##### method to flatten one table into panel rows
+    #####
+    ##### @param sheet - the table read with header = [2, 3]
+    ##### @param year - the data year
+    ##### @param is_wealth - True for the wealth tables, False for debt
+    ##### @param table_number - the sheet index in the workbook
+    #####
+    ###########################################################################
+    def _flatten(self, sheet, year, is_wealth, table_number):
+        from census import group_index
+
+        labels = group_index(sheet)
+        values = sheet.apply(pd.to_numeric, errors = 'coerce').to_numpy(dtype = float)
+        rowNumbers, columnNumbers = np.nonzero(~np.isnan(values))
+
+        return pd.DataFrame({'year': year,
+                             'is_wealth': is_wealth,
+                             'table': table_number,
+                             'category': sheet.columns.get_level_values(0).astype(str)[columnNumbers],
+                             'sub_category': sheet.columns.get_level_values(1).astype(str)[columnNumbers],
+                             'group': labels.get_level_values('group')[rowNumbers],
+                             'sub_group': labels.get_level_values('sub_group')[rowNumbers],
+                             'value': values[rowNumbers, columnNumbers]},
+                            columns = PANEL_COLUMNS)
+
+
+
+if __name__ == '__main__':
+    from census import str_to_bool
+
+    descrip = 'build or query the census panel'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-p',
+                           '--data_folder_path',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='file path of data')
+    arguments.add_argument('-o',
+                           '--panel_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='file path of the panel [default = <data_folder_path>/census_panel.pkl]')
+    arguments.add_argument('--build',
+                           action='store_true',
+                           help='build the panel from the workbooks')
+    arguments.add_argument('-w',
+                           '--is_wealth',
+                           action='store',
+                           type=str_to_bool,
+                           required=False,
+                           default=None,
+                           help='only wealth [True] or debt [False] values')
+    arguments.add_argument('-t',
+                           '--table',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=None,
+                           help='only this table')
+    arguments.add_argument('-c',
+                           '--category',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='only this category')
+    arguments.add_argument('-s_c',
+                           '--sub_category',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='only this sub category')
+    arguments.add_argument('-g',
+                           '--group',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='only this group')
+    arguments.add_argument('-s_g',
+                           '--sub_group',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='only this sub group')
+    arguments.add_argument('-y',
+                           '--years',
+                           action='store',
+                           type=int,
+                           nargs=2,
+                           required=False,
+                           default=None,
+                           help='only the years from the first to the last [ex. 2015 2019]')
+    arguments.add_argument('-b',
+                           '--by',
+                           action='store',
+                           type=str,
+                           choices=LABEL_COLUMNS,
+                           required=False,
+                           default=None,
+                           help='print a year by label table instead of the matching rows')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    path = variables['data_folder_path']
+    panelPath = variables['panel_path']
+    if panelPath == None:
+        panelPath = Census_Panel.default_path(path)
+    if not os.path.isdir(path):
+        arguments.error('data folder {0} does not exist'.format(path))
+
+    panel = Census_Panel(panelPath)
+    if variables['build'] == True:
+        built = panel.build(path)
+        print('built {0} with {1} values [{2:.2f} MB]'.format(panelPath, len(built),
+                                                              built.memory_usage(deep = True).sum() / 1024 / 1024))
+    elif not os.path.exists(panelPath):
+        arguments.error('no panel at {0}, build it with --build'.format(panelPath))
+
+    years = tuple(variables['years']) if variables['years'] != None else None
+    filters = {'is_wealth': variables['is_wealth'], 'table': variables['table'], 'category': variables['category'],
+               'sub_category': variables['sub_category'], 'group': variables['group'],
+               'sub_group': variables['sub_group'], 'years': years}
+
+    if variables['by'] != None:
+        print(panel.by_year(variables['by'], **filters).to_string())
+    elif variables['build'] == False:
+        print(panel.query(**filters).to_string(index = False))
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/census_panel.py -p '/Users/mtjen/desktop/table_data/' --build
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/census_panel.py -p '/Users/mtjen/desktop/table_data/' -t 2 -c 'Percent Owning Assets at Financial Institutions' -s_c 'Total' -g 'Race' -b sub_group
@@ -0,0 +1,305 @@
+# imports
+import argparse
+import json
+import os
+
+
+# levels of a census query, in the order the schema tree is nested
+LEVELS = ['category', 'sub_category', 'group', 'sub_group']
+
+
+# class to build and look up the census schema index
+#
+# the index is one json file covering every year, wealth/debt and table:
+#   {"years": [...],
+#    "sources": {workbook path: modified time},
+#    "tables": {"wealth|2": {"titles": {"2013": "..."},
+#                            "tree": {category: {sub_category: {group: {sub_group: [years]}}}}}}}
+class Census_Schema:
+
+    # initialize parameters
+    def __init__(self, schema_path):
+        self._schema_path = schema_path
+        self._schema = None
+
+
+    ###########################################################################
+    #####
+    ##### method to get the default schema path of a data folder
+    #####
+    ##### @param data_folder_path - the census data folder
+    #####
+    ###########################################################################
+    @staticmethod
+    def default_path(data_folder_path):
+        return os.path.join(data_folder_path, 'census_schema.json')
+
+
+    ###########################################################################
+    #####
+    ##### method to build the schema index from the workbooks
+    #####
+    ##### the Get_Categories scan of the notebook, done once for every
+    ##### workbook: the sheet title, then every (category, sub_category,
+    ##### group, sub_group) cell and the years it appears in
+    #####
+    ##### @param data_folder_path - the census data folder
+    ##### @param years - the data years to scan
+    #####
+    ###########################################################################
+    def build(self, data_folder_path, years = None):
+        import pandas as pd
+        from census import group_index
+        from census_cache import Census_Cache
+
+        if years == None:
+            years = [2013, 2014, 2015, 2016, 2017, 2018, 2019, 2020]
+
+        cache = Census_Cache(data_folder_path)
+        tables = {}
+        sources = {}
+
+        for folder in ['wealth', 'debt']:
+            for year in years:
+                filePath = os.path.join(data_folder_path, folder, str(year) + '.xlsx')
+                if not os.path.exists(filePath):
+                    continue
+                sources[os.path.abspath(filePath)] = os.stat(filePath).st_mtime_ns
+
+                # titles come from the first row under the default header, like the notebook
+                titleRows = pd.read_excel(filePath, nrows = 1, sheet_name = None)
+
+                for tableNumber, rawSheet in enumerate(titleRows.values()):
+                    tableKey = self._table_key(folder == 'wealth', tableNumber)
+                    table = tables.setdefault(tableKey, {'titles': {}, 'tree': {}})
+                    table['titles'][str(year)] = self._title(rawSheet)
+
+                    sheet = cache.load(filePath, tableNumber)
+                    rows = group_index(sheet)
+                    cells = sheet.notna().to_numpy()
+
+                    for columnNumber, (category, subCategory) in enumerate(sheet.columns):
+                        for rowNumber in cells[:, columnNumber].nonzero()[0]:
+                            group, subGroup = rows[rowNumber]
+                            subGroups = table['tree'].setdefault(str(category), {}).setdefault(
+                                str(subCategory), {}).setdefault(group, {})
+                            subGroups.setdefault(subGroup, []).append(year)
+
+        self._schema = {'years': list(years), 'sources': sources, 'tables': tables}
+
+        with open(self._schema_path, 'w') as schemaFile:
+            json.dump(self._schema, schemaFile)
+
+        return self._schema
+
+
+    ###########################################################################
+    #####
+    ##### method to check if the schema index file exists
+    #####
+    ###########################################################################
+    def exists(self):
+        return os.path.exists(self._schema_path)
+
+
+    ###########################################################################
+    #####
+    ##### method to check the index exists and no workbook changed since it
+    ##### was built
+    #####
+    ##### an index built before workbooks were tracked is never current
+    #####
+    ###########################################################################
+    def is_current(self):
+        if not os.path.exists(self._schema_path):
+            return False
+
+        sources = self._load().get('sources')
+        if sources == None:
+            return False
+        for filePath, modified in sources.items():
+            if not os.path.exists(filePath) or os.stat(filePath).st_mtime_ns != modified:
+                return False
+
+        return True
+
+
+    ###########################################################################
+    #####
+    ##### method to get the years a query has a value in
+    #####
+    ##### @param is_wealth - True for the wealth tables, False for debt
+    ##### @param table_number - the sheet index in the workbook
+    ##### @param category, sub_category, group, sub_group - the query
+    #####
+    ##### @return list of years, empty if the query never exists
+    #####
+    ###########################################################################
+    def years_for(self, is_wealth, table_number, category, sub_category, group, sub_group):
+        node = self._tree(is_wealth, table_number)
+
+        for value in [category, sub_category, group, sub_group]:
+            if node == None or value not in node:
+                return []
+            node = node[value]
+
+        return node
+
+
+    ###########################################################################
+    #####
+    ##### method to list the valid values of the next query level
+    #####
+    ##### @param is_wealth - True for the wealth tables, False for debt
+    ##### @param table_number - the sheet index in the workbook
+    ##### @param prefix - the known levels [ex. [category, sub_category]]
+    #####
+    ###########################################################################
+    def values(self, is_wealth, table_number, prefix = []):
+        node = self._tree(is_wealth, table_number)
+
+        for value in prefix:
+            if node == None or value not in node:
+                return []
+            node = node[value]
+
+        if node == None or isinstance(node, list):
+            return []
+        return list(node.keys())
+
+
+    ###########################################################################
+    #####
+    ##### method to check a query, raising a ValueError that lists the valid
+    ##### values of the first level that does not exist
+    #####
+    ##### @param is_wealth - True for the wealth tables, False for debt
+    ##### @param table_number - the sheet index in the workbook
+    ##### @param category, sub_category, group, sub_group - the query
+    #####
+    ##### @return list of years the query has a value in
+    #####
+    ###########################################################################
+    def validate(self, is_wealth, table_number, category, sub_category, group, sub_group):
+        self.validate_prefix(is_wealth, table_number, [category, sub_category, group, sub_group])
+
+        return self.years_for(is_wealth, table_number, category, sub_category, group, sub_group)
+
+
+    ###########################################################################
+    #####
+    ##### method to check the table and the first levels of a query, raising
+    ##### a ValueError that lists the valid values of the first wrong one
+    #####
+    ##### @param is_wealth - True for the wealth tables, False for debt
+    ##### @param table_number - the sheet index in the workbook
+    ##### @param prefix - the known levels [ex. [category, sub_category]]
+    #####
+    ###########################################################################
+    def validate_prefix(self, is_wealth, table_number, prefix):
+        if self._tree(is_wealth, table_number) == None:
+            raise ValueError('table {0} does not exist, valid tables are {1}'.format(
+                self._table_key(is_wealth, table_number), sorted(self._load()['tables'].keys())))
+
+        for level in range(len(prefix)):
+            options = self.values(is_wealth, table_number, prefix[:level])
+            if prefix[level] not in options:
+                raise ValueError('{0} {1!r} does not exist, valid values are {2}'.format(
+                    LEVELS[level], prefix[level], options))
+
+
+    ###########################################################################
+    #####
+    ##### method to get the schema tree of one table
+    #####
+    ##### @param is_wealth - True for the wealth tables, False for debt
+    ##### @param table_number - the sheet index in the workbook
+    #####
+    ###########################################################################
+    def _tree(self, is_wealth, table_number):
+        table = self._load()['tables'].get(self._table_key(is_wealth, table_number))
+        if table == None:
+            return None
+        return table['tree']
+
+
+    ###########################################################################
+    #####
+    ##### method to read the schema index file once
+    #####
+    ###########################################################################
+    def _load(self):
+        if self._schema == None:
+            with open(self._schema_path) as schemaFile:
+                self._schema = json.load(schemaFile)
+
+        return self._schema
+
+
+    ###########################################################################
+    #####
+    ##### method to get the key of a table in the index
+    #####
+    ##### @param is_wealth - True for the wealth tables, False for debt
+    ##### @param table_number - the sheet index in the workbook
+    #####
+    ###########################################################################
+    def _table_key(self, is_wealth, table_number):
+        wealthOrDebt = 'wealth'
+        if is_wealth == False:
+            wealthOrDebt = 'debt'
+
+        return '{0}|{1}'.format(wealthOrDebt, table_number)
+
+
+    ###########################################################################
+    #####
+    ##### method to get a sheet title, the cell the notebook's get_title
+    ##### reads: iloc[0, 0] of the sheet read with the default header [A2]
+    #####
+    ##### @param sheet - the top of the sheet read with the default header
+    #####
+    ###########################################################################
+    def _title(self, sheet):
+        if sheet.shape[0] == 0 or sheet.shape[1] == 0:
+            return ''
+
+        value = sheet.iloc[0, 0]
+        if str(value) == 'nan':
+            return ''
+        return str(value)
+
+
+
+if __name__ == '__main__':
+    descrip = 'build the census schema index'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-p',
+                           '--data_folder_path',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='file path of data')
+    arguments.add_argument('-o',
+                           '--schema_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='file path of the index [default = <data_folder_path>/census_schema.json]')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    path = variables['data_folder_path']
+    schemaPath = variables['schema_path']
+    if schemaPath == None:
+        schemaPath = Census_Schema.default_path(path)
+
+    schema = Census_Schema(schemaPath).build(path)
+    print('indexed {0} tables into {1}'.format(len(schema['tables']), schemaPath))
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/census_schema.py -p '/Users/mtjen/desktop/table_data/'
@@ -0,0 +1,367 @@
+# imports
+import argparse
+import io
+import os
+import re
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+# units of a relative period [ex. 6M] and the offset each one stands for
+PERIOD_UNITS = {'D': 'days', 'W': 'weeks', 'M': 'months', 'Y': 'years'}
+
+# periods that keep every row
+WHOLE_PERIODS = ['ALL', 'MAX']
+
+# a date of a start:end period, with an optional time of day
+DATE_PATTERN = r'\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?'
+
+# bytes read at a time when walking back over csv lines
+BLOCK_BYTES = 65536
+
+
+###########################################################################
+#####
+##### method to check a time period and split it into its parts
+#####
+##### a period is ALL [or MAX], YTD, an amount and unit counted back from
+##### the last date [ex. 5D, 2W, 6M, 1Y], or 'start:end' dates where either
+##### side may be left out [ex. 2019-01-01:2019-06-30, 2020-03-01:]
+#####
+##### @param period - the time period text
+#####
+##### @return dictionary with a 'kind' of whole, relative, ytd or range
+#####
+###########################################################################
+def parse_period(period):
+    text = str(period).strip().upper()
+
+    if text in WHOLE_PERIODS:
+        return {'kind': 'whole'}
+    if text == 'YTD':
+        return {'kind': 'ytd'}
+
+    match = re.fullmatch(r'(\d+)\s*([DWMY])', text)
+    if match != None:
+        if int(match.group(1)) < 1:
+            raise ValueError('time period {0!r} must cover at least one {1}'.format(period, PERIOD_UNITS[match.group(2)][:-1]))
+        return {'kind': 'relative', 'amount': int(match.group(1)), 'unit': match.group(2)}
+
+    if ':' in text:
+        match = re.fullmatch(r'\s*({0})?\s*:\s*({0})?\s*'.format(DATE_PATTERN), text)
+        if match == None:
+            raise ValueError('time period {0!r} needs start:end dates as YYYY-MM-DD [HH:MM[:SS]]'.format(period))
+        return {'kind': 'range', 'start': match.group(1), 'end': match.group(2)}
+
+    raise ValueError('unknown time period {0!r}, expected {1}, YTD, an amount and unit '
+                     '[ex. 1M, 6M, 1Y] or start:end dates'.format(period, ' or '.join(WHOLE_PERIODS)))
+
+
+###########################################################################
+#####
+##### method to get the dates a time period covers
+#####
+##### bounds are half open, start <= date < stop. an end date without a
+##### time of day keeps that whole day.
+#####
+##### @param period - the time period text
+##### @param last_date - the last date of the data, for relative periods
+#####
+##### @return [start, stop] as datetime64[ns], None where unbounded
+#####
+###########################################################################
+def period_bounds(period, last_date = None):
+    parts = parse_period(period)
+
+    if parts['kind'] == 'whole':
+        return [None, None]
+
+    if parts['kind'] == 'range':
+        start = None
+        stop = None
+        if parts['start'] != None:
+            start = pd.Timestamp(parts['start']).to_datetime64()
+        if parts['end'] != None:
+            end = pd.Timestamp(parts['end'])
+            stop = end + (pd.Timedelta(days = 1) if len(parts['end']) == 10 else pd.Timedelta(1, 'ns'))
+            stop = stop.to_datetime64()
+        return [start, stop]
+
+    if last_date is None:
+        return [None, None]
+    last = pd.Timestamp(last_date)
+
+    if parts['kind'] == 'ytd':
+        return [pd.Timestamp(year = last.year, month = 1, day = 1).to_datetime64(), None]
+
+    offset = pd.DateOffset(**{PERIOD_UNITS[parts['unit']]: parts['amount']})
+    return [(last - offset).to_datetime64(), None]
+
+
+###########################################################################
+#####
+##### method to get the rows of sorted dates inside the bounds by binary
+##### search, so only log(rows) dates are looked at
+#####
+##### @param dates - sorted datetime64 dates [a memory map is not read]
+##### @param start - the first date kept, None for the first row
+##### @param stop - the first date past the period, None for the end
+##### @param lead_rows - rows to keep before start [ex. moving average warm up]
+#####
+##### @return slice of the rows
+#####
+###########################################################################
+def row_bounds(dates, start, stop, lead_rows = 0):
+    first = 0
+    last = len(dates)
+    if start is not None:
+        first = max(int(np.searchsorted(dates, np.datetime64(start, 'ns'), 'left')) - lead_rows, 0)
+    if stop is not None:
+        last = int(np.searchsorted(dates, np.datetime64(stop, 'ns'), 'left'))
+
+    return slice(first, max(first, last))
+
+
+###########################################################################
+#####
+##### method to get the last date of a csv from its final lines
+#####
+##### @param path - the csv path
+#####
+###########################################################################
+def csv_last_date(path):
+    with open(path, 'rb') as file:
+        header = file.readline()
+        dataStart = file.tell()
+        column = _date_column(header, path)
+
+        end = file.seek(0, os.SEEK_END)
+        position = end
+        while position > dataStart:
+            position = max(dataStart, position - BLOCK_BYTES)
+            file.seek(position)
+            lines = file.read(end - position).splitlines()
+            # the first line of a block may be cut off, unless it is the first row
+            for line in reversed(lines if position == dataStart else lines[1:]):
+                date = _line_date(line, column)
+                if date is not None:
+                    return date
+
+    return None
+
+
+###########################################################################
+#####
+##### method to get the offset of the first line of a date sorted csv
+##### dated at or after a date, by binary search over byte offsets
+#####
+##### @param path - the csv path
+##### @param date - the date to look for
+##### @param lead_rows - rows to start before the date [ex. moving average warm up]
+#####
+###########################################################################
+def csv_offset(path, date, lead_rows = 0):
+    with open(path, 'rb') as file:
+        header = file.readline()
+        dataStart = file.tell()
+        end = file.seek(0, os.SEEK_END)
+        column = _date_column(header, path)
+
+        return _lines_back(file, _first_line_from(file, np.datetime64(date, 'ns'), column, dataStart, end),
+                           lead_rows, dataStart)
+
+
+###########################################################################
+#####
+##### method to read only the rows of a date sorted csv inside the bounds
+#####
+##### the first row of the period is found by binary search over byte
+##### offsets, reading one line per step, so the time taken follows the
+##### size of the period and not of the file
+#####
+##### @param path - the csv path
+##### @param columns - the columns to read
+##### @param start - the first date kept, None for the first row
+##### @param stop - the first date past the period, None for the end
+##### @param lead_rows - rows to keep before start [ex. moving average warm up]
+##### @param index - the column to index by [default = None]
+#####
+###########################################################################
+def read_csv_range(path, columns, start, stop, lead_rows = 0, index = None):
+    with open(path, 'rb') as file:
+        header = file.readline()
+        dataStart = file.tell()
+        end = file.seek(0, os.SEEK_END)
+        column = _date_column(header, path)
+
+        begin = dataStart
+        if start is not None:
+            begin = _lines_back(file, _first_line_from(file, np.datetime64(start, 'ns'), column, dataStart, end),
+                                lead_rows, dataStart)
+        if stop is not None:
+            end = _first_line_from(file, np.datetime64(stop, 'ns'), column, begin, end)
+
+        file.seek(begin)
+        body = file.read(end - begin)
+
+    return pd.read_csv(io.BytesIO(header + body), usecols = columns, index_col = index)
+
+
+###########################################################################
+#####
+##### method to find the offset of the first line dated at or after a date
+#####
+##### @param file - the csv, opened in binary mode
+##### @param date - the date to look for
+##### @param column - the position of Date in a line
+##### @param low - the first line offset to look at
+##### @param end - the end of the lines to look at
+#####
+###########################################################################
+def _first_line_from(file, date, column, low, end):
+    high = end
+
+    # smallest offset whose next line is at or after the date [or past end]
+    while low < high:
+        middle = (low + high) // 2
+        lineStart = _next_line(file, middle)
+        if lineStart >= end:
+            high = middle
+            continue
+
+        lineDate = _line_date(file.readline(), column)
+        if lineDate is None or lineDate >= date:
+            high = middle
+        else:
+            low = middle + 1
+
+    return min(_next_line(file, low), end)
+
+
+###########################################################################
+#####
+##### method to get the offset of the first line starting at or after an
+##### offset, leaving the file there
+#####
+##### @param file - the csv, opened in binary mode
+##### @param offset - the offset
+#####
+###########################################################################
+def _next_line(file, offset):
+    if offset == 0:
+        file.seek(0)
+        return 0
+
+    # a line starts at offset when the byte before it ends a line
+    file.seek(offset - 1)
+    file.readline()
+    return file.tell()
+
+
+###########################################################################
+#####
+##### method to walk back a number of lines from a line offset
+#####
+##### @param file - the csv, opened in binary mode
+##### @param offset - a line offset
+##### @param count - the amount of lines to walk back
+##### @param data_start - the offset of the first row, never passed
+#####
+###########################################################################
+def _lines_back(file, offset, count, data_start):
+    position = offset
+    found = 0
+
+    while count > 0 and position > data_start:
+        size = min(BLOCK_BYTES, position - data_start)
+        file.seek(position - size)
+        block = file.read(size)
+
+        # the newline just before offset ends the line before it
+        index = len(block)
+        while True:
+            index = block.rfind(b'\n', 0, index)
+            if index < 0:
+                break
+            found += 1
+            if found == count + 1:
+                return position - size + index + 1
+        position -= size
+
+    return data_start if count > 0 else offset
+
+
+###########################################################################
+#####
+##### method to find the Date column of a csv header
+#####
+##### @param header - the header line
+##### @param path - the csv path, for the error
+#####
+###########################################################################
+def _date_column(header, path):
+    names = [name.strip().strip('"') for name in header.decode('utf-8-sig').strip().split(',')]
+    if 'Date' not in names:
+        raise ValueError('{0} has no Date column'.format(path))
+
+    return names.index('Date')
+
+
+###########################################################################
+#####
+##### method to read the date of one csv line
+#####
+##### @param line - the line
+##### @param column - the position of Date in the line
+#####
+##### @return datetime64[ns], None for a blank or cut off line
+#####
+###########################################################################
+def _line_date(line, column):
+    fields = line.decode('utf-8', 'replace').strip().split(',')
+    if len(fields) <= column or fields[column].strip() == '':
+        return None
+
+    try:
+        return np.datetime64(pd.Timestamp(fields[column].strip().strip('"')), 'ns')
+    except ValueError:
+        return None
+
+
+
+if __name__ == '__main__':
+    descrip = 'print the rows of a date sorted price csv inside a time period'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-p',
+                           '--path',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='the file path of the stock data')
+    arguments.add_argument('-t',
+                           '--time_period',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='the time period: ALL, YTD, an amount and unit [ex. 1M, 6M, 1Y] or start:end dates')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    try:
+        parse_period(variables['time_period'])
+    except ValueError as error:
+        arguments.error(str(error))
+    if not os.path.isfile(variables['path']):
+        arguments.error('stock data file {0} does not exist'.format(variables['path']))
+
+    start, stop = period_bounds(variables['time_period'], csv_last_date(variables['path']))
+    print(read_csv_range(variables['path'], None, start, stop).to_string(index = False))
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/date_range.py -p '/Users/mtjen/Desktop/395/AAPL.csv' -t 2020-03-01:2020-03-31
@@ -0,0 +1,153 @@
+# imports
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+
+
+# supported downsampling methods
+DOWNSAMPLE_METHODS = ['lttb', 'minmax', 'none']
+
+
+###########################################################################
+#####
+##### method to turn values into a 2d float matrix [rows x series]
+#####
+##### @param values - a list, array, series or dataframe of values
+#####
+###########################################################################
+def _as_matrix(values):
+    matrix = np.asarray(values, dtype = float)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(-1, 1)
+
+    return matrix
+
+
+###########################################################################
+#####
+##### method to pick rows with largest-triangle-three-buckets
+#####
+##### the first and last rows are kept, the rest are split into equal
+##### buckets and each series keeps the row of every bucket that makes the
+##### largest triangle with the previous pick and the next bucket's mean.
+##### all series are handled together, one bucket at a time.
+#####
+##### @param values - the values [rows x series, or one series]
+##### @param points - the amount of rows to keep per series
+#####
+##### @return sorted array of kept row numbers, the union over all series
+#####
+###########################################################################
+def lttb_indices(values, points):
+    matrix = _as_matrix(values)
+    rows = matrix.shape[0]
+    if points >= rows or points < 3:
+        return np.arange(rows)
+
+    # NaN rows can not form triangles, treat them as the series mean
+    matrix = np.where(np.isnan(matrix), np.nanmean(matrix, axis = 0), matrix)
+    matrix = np.nan_to_num(matrix)
+
+    edges = np.linspace(1, rows - 1, points - 1).astype(int)
+    columns = np.arange(matrix.shape[1])
+    previous = np.zeros(matrix.shape[1], dtype = int)
+    kept = [np.zeros(1, dtype = int)]
+
+    for bucket in range(points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        nextStart, nextStop = stop, edges[bucket + 2] if bucket + 2 < len(edges) else rows
+        if stop <= start:
+            continue
+
+        # mean point of the next bucket, or the last row
+        if nextStop > nextStart:
+            nextX = (nextStart + nextStop - 1) / 2.0
+            nextY = matrix[nextStart:nextStop].mean(axis = 0)
+        else:
+            nextX = rows - 1.0
+            nextY = matrix[-1]
+
+        bucketX = np.arange(start, stop).reshape(-1, 1)
+        previousX = previous.astype(float)
+        previousY = matrix[previous, columns]
+        areas = np.abs((previousX - nextX) * (matrix[start:stop] - previousY)
+                       - (previousX - bucketX) * (nextY - previousY))
+
+        previous = start + areas.argmax(axis = 0)
+        kept.append(previous)
+
+    kept.append(np.array([rows - 1]))
+
+    return np.unique(np.concatenate(kept))
+
+
+###########################################################################
+#####
+##### method to pick the min and max row of equal buckets
+#####
+##### @param values - the values [rows x series, or one series]
+##### @param points - the amount of rows to keep per series [2 per bucket]
+#####
+##### @return sorted array of kept row numbers, the union over all series
+#####
+###########################################################################
+def min_max_indices(values, points):
+    matrix = _as_matrix(values)
+    rows = matrix.shape[0]
+    buckets = max(points // 2, 1)
+    if points >= rows:
+        return np.arange(rows)
+
+    # pad to equal buckets so every bucket is reduced at once
+    bucketSize = -(-rows // buckets)
+    padded = np.full((buckets * bucketSize, matrix.shape[1]), np.nan)
+    padded[:rows] = matrix
+    padded = padded.reshape(buckets, bucketSize, matrix.shape[1])
+
+    starts = (np.arange(buckets) * bucketSize).reshape(-1, 1)
+    minRows = starts + np.where(np.isnan(padded), np.inf, padded).argmin(axis = 1)
+    maxRows = starts + np.where(np.isnan(padded), -np.inf, padded).argmax(axis = 1)
+
+    kept = np.concatenate([[0, rows - 1], minRows.ravel(), maxRows.ravel()])
+
+    return np.unique(kept[kept < rows])
+
+
+###########################################################################
+#####
+##### method to pick the rows worth plotting
+#####
+##### every series is drawn at the kept rows, so the budget is shared: each
+##### series gets its part of the points, and when the union of their rows
+##### is still over the budget [ex. hundreds of stocks] it is thinned evenly.
+##### the first and last rows always stay.
+#####
+##### @param values - the values [rows x series, or one series]
+##### @param points - the most rows to keep over all series, besides keep
+##### @param method - 'lttb', 'minmax' or 'none'
+##### @param keep - row numbers that must stay [ex. the annotated min/max]
+#####
+##### @return sorted array of at most points + len(keep) row numbers
+#####
+###########################################################################
+def downsample_indices(values, points, method = 'lttb', keep = []):
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError('unknown downsample method {0}, expected one of {1}'.format(method, DOWNSAMPLE_METHODS))
+
+    rows = len(values)
+    if method == 'none' or points >= rows:
+        return np.arange(rows)
+
+    series = _as_matrix(values).shape[1]
+    if method == 'lttb':
+        kept = lttb_indices(values, max(points // series, 3))
+    else:
+        kept = min_max_indices(values, max(points // series, 2))
+
+    if len(kept) > points:
+        kept = np.unique(kept[np.linspace(0, len(kept) - 1, max(points, 2)).round().astype(int)])
+
+    keep = np.asarray([row for row in keep if 0 <= row < rows], dtype = int)
+
+    return np.union1d(kept, keep)
@@ -0,0 +1,111 @@
+# imports
+import argparse
+import json
+import sys
+from downsample import downsample_indices
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+
+
+# downsampling methods checked
+METHODS = ['lttb', 'minmax']
+
+
+# class to check downsampling keeps the amount of plotted rows within the
+# point budget, however many series share the rows
+#
+# every chart draws all of its lines at the kept rows, so the budget has to
+# bound the union over the series [ex. a price and its moving averages, or
+# hundreds of stocks] and not each series on its own
+class Downsample_Check:
+
+    # initialize parameters
+    def __init__(self, rows = 100000, points = 1280, series_counts = [1, 3, 20, 500]):
+        self._rows = rows
+        self._points = points
+        self._series_counts = series_counts
+
+
+    # main method
+    def main(self):
+        results = {'rows': self._rows, 'points': self._points, 'cases': [], 'failures': []}
+        generator = np.random.default_rng(0)
+
+        for seriesCount in self._series_counts:
+            values = np.cumsum(generator.normal(size = (self._rows, seriesCount)), axis = 0)
+            keep = [int(row) for row in values.argmin(axis = 0)] + [int(row) for row in values.argmax(axis = 0)]
+            keep = sorted(set(keep))
+
+            for method in METHODS:
+                rows = downsample_indices(values, self._points, method, keep)
+                results['cases'].append({'method': method, 'series': seriesCount, 'kept_rows': len(rows),
+                                         'keep_rows': len(keep)})
+                results['failures'] += self._problems(rows, keep, method, seriesCount)
+
+        return results
+
+
+    ###########################################################################
+    #####
+    ##### method to list what is wrong with the kept rows of one case
+    #####
+    ##### @param rows - the kept row numbers
+    ##### @param keep - the row numbers that had to stay
+    ##### @param method - the downsampling method
+    ##### @param series_count - the amount of series
+    #####
+    ###########################################################################
+    def _problems(self, rows, keep, method, series_count):
+        problems = []
+        case = '{0} with {1} series'.format(method, series_count)
+
+        if len(rows) > self._points + len(keep):
+            problems.append('{0} kept {1} rows, over {2} points + {3} kept rows'.format(
+                case, len(rows), self._points, len(keep)))
+        if rows[0] != 0 or rows[-1] != self._rows - 1:
+            problems.append('{0} dropped the first or last row'.format(case))
+        if len(np.setdiff1d(keep, rows)) > 0:
+            problems.append('{0} dropped rows it had to keep'.format(case))
+        if np.any(np.diff(rows) <= 0):
+            problems.append('{0} rows are not sorted and unique'.format(case))
+
+        return problems
+
+
+
+if __name__ == '__main__':
+    descrip = 'check downsampling keeps plotted rows within the point budget'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-r',
+                           '--rows',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=100000,
+                           help='the amount of rows per series [default = 100000]')
+    arguments.add_argument('-n',
+                           '--points',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=1280,
+                           help='the point budget [default = 1280, two per pixel of a 640 pixel chart]')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    if variables['points'] < 2 or variables['rows'] < 2:
+        arguments.error('--rows and --points must be at least 2')
+
+    results = Downsample_Check(variables['rows'], variables['points']).main()
+    print(json.dumps(results, indent = 2))
+
+    if len(results['failures']) > 0:
+        sys.exit(1)
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/downsample_check.py -r 200000
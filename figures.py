@@ -0,0 +1,51 @@
+# imports
+import io
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+figure_module = lazy_import('matplotlib.figure')
+
+
+###########################################################################
+#####
+##### method to create a figure that is not registered with pyplot
+#####
+##### pyplot keeps every figure it creates until it is closed; a figure
+##### made here is freed as soon as nothing refers to it, so long running
+##### processes do not grow with every chart
+#####
+##### @param options - Figure options [ex. figsize = (6.4, 4.8)]
+#####
+###########################################################################
+def new_figure(**options):
+    return figure_module.Figure(**options)
+
+
+###########################################################################
+#####
+##### method to drop the artists of a figure that is no longer needed
+#####
+##### @param figure - the figure
+#####
+###########################################################################
+def release_figure(figure):
+    figure.clear()
+
+
+###########################################################################
+#####
+##### method to render a figure to image bytes and release it
+#####
+##### @param figure - the figure
+##### @param image_format - the image format [ex. 'png', 'jpeg']
+##### @param options - savefig options [ex. bbox_inches = 'tight']
+#####
+###########################################################################
+def figure_bytes(figure, image_format = 'png', **options):
+    buffer = io.BytesIO()
+    try:
+        figure.savefig(buffer, format = image_format, **options)
+    finally:
+        release_figure(figure)
+
+    return buffer.getvalue()
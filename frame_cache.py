@@ -0,0 +1,100 @@
+# imports
+import sys
+from collections import OrderedDict
+from threading import Lock
+
+
+###########################################################################
+#####
+##### method to estimate the memory size of a cached value in bytes
+#####
+##### @param value - the cached value [dataframe, series, bytes, ...]
+#####
+###########################################################################
+def size_of(value):
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep = True)
+        if hasattr(usage, 'sum'):
+            usage = usage.sum()
+        return int(usage)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+
+    return sys.getsizeof(value)
+
+
+# class to keep recently used values in memory up to a total size,
+# evicting the least recently used values first
+class LRU_Cache:
+
+    # initialize parameters
+    def __init__(self, max_bytes = 256 * 1024 * 1024):
+        self._max_bytes = max_bytes
+        self._values = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+
+    ###########################################################################
+    #####
+    ##### method to get a cached value, or None on a miss
+    #####
+    ##### @param key - the key of the value
+    #####
+    ###########################################################################
+    def get(self, key):
+        with self._lock:
+            if key not in self._values:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._values.move_to_end(key)
+            return self._values[key]
+
+
+    ###########################################################################
+    #####
+    ##### method to cache a value, evicting old values to make room
+    #####
+    ##### a value larger than the whole cache is not kept
+    #####
+    ##### @param key - the key of the value
+    ##### @param value - the value
+    #####
+    ###########################################################################
+    def put(self, key, value):
+        size = size_of(value)
+
+        with self._lock:
+            if key in self._values:
+                self._bytes -= self._sizes.pop(key)
+                del self._values[key]
+
+            if size > self._max_bytes:
+                return
+
+            self._values[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+
+            while self._bytes > self._max_bytes:
+                oldKey, oldValue = self._values.popitem(last = False)
+                self._bytes -= self._sizes.pop(oldKey)
+
+
+    ###########################################################################
+    #####
+    ##### method to get the total size of the cached values in bytes
+    #####
+    ###########################################################################
+    def size(self):
+        return self._bytes
+
+
+    # number of cached values
+    def __len__(self):
+        return len(self._values)
@@ -0,0 +1,443 @@
+# imports
+import argparse
+import hashlib
+import io
+import json
+import math
+import os
+from lazy_import import lazy_import
+from rolling import moving_averages, weighted_moving_average
+from summary_stats import summary_statistics
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+# moving average types that can be extended row by row and still match a
+# full recomputation bit for bit. the exponential average depends on every
+# earlier row through pandas' ewm, so it is always recomputed.
+INCREMENTAL_AVERAGE_TYPES = ['simple', 'weighted']
+
+# bytes before the processed offset that must not change between updates
+TAIL_BYTES = 4096
+
+
+###########################################################################
+#####
+##### method to add values into an exact sum
+#####
+##### the sum is kept as non-overlapping partials [Shewchuk], so adding
+##### more values later gives the same total as summing everything at once.
+##### each chunk is first turned into exact partials with a few math.fsum
+##### passes, then merged into the running partials.
+#####
+##### @param partials - the running exact sum, changed in place
+##### @param values - list of floats to add
+#####
+###########################################################################
+def add_exact(partials, values):
+    chunkPartials = []
+    remainder = math.fsum(values)
+    while remainder != 0.0 and math.isfinite(remainder):
+        chunkPartials.append(remainder)
+        remainder = math.fsum(values + [-partial for partial in chunkPartials])
+    if not math.isfinite(remainder):
+        chunkPartials = [remainder]
+
+    for value in chunkPartials:
+        index = 0
+        for partial in partials:
+            if abs(value) < abs(partial):
+                value, partial = partial, value
+            high = value + partial
+            low = partial - (high - value)
+            if low != 0.0:
+                partials[index] = low
+                index += 1
+            value = high
+        partials[index:] = [value]
+
+
+# class to keep the statistics and moving averages of one price series on
+# disk, so rows appended to the csv are processed once
+#
+# the state file holds running sums, the last window of cumulative sums
+# and values, the extrema with their dates and the byte offset processed
+# so far. the chart series [dates, values, averages] is appended to two
+# binary files next to it and read back with memory maps.
+class Incremental_Indicators:
+
+    # initialize parameters
+    def __init__(self, state_path, file_path, desired_variable, windows, average_type = 'simple'):
+        if average_type not in INCREMENTAL_AVERAGE_TYPES:
+            raise ValueError('incremental mode supports the {0} moving averages, got {1}'.format(
+                INCREMENTAL_AVERAGE_TYPES, average_type))
+
+        self._state_path = state_path
+        self._dates_path = state_path + '.dates'
+        self._series_path = state_path + '.series'
+        self._file_path = file_path
+        self._desired_variable = desired_variable
+        self._windows = sorted(set(int(window) for window in windows))
+        self._average_type = average_type
+        self._max_window = max(self._windows)
+
+
+    ###########################################################################
+    #####
+    ##### method to process the rows added since the last update
+    #####
+    ##### the state is rebuilt from the start when the query changed or the
+    ##### already processed part of the file was edited
+    #####
+    ##### @return [data, stats, averages]
+    #####         data - dataframe of Date [datetime64] and the variable
+    #####         stats - dictionary like one row of summary_statistics
+    #####         averages - dictionary of window size to averages
+    #####
+    ###########################################################################
+    def update(self):
+        state = self._load_state()
+        if state == None:
+            state = self._new_state()
+
+        newRows = self._read_new_rows(state)
+        if newRows != None:
+            self._add_rows(state, *newRows)
+            self._save_state(state)
+
+        return self._results(state)
+
+
+    ###########################################################################
+    #####
+    ##### method to get a new, empty state
+    #####
+    ###########################################################################
+    def _new_state(self):
+        for path in [self._dates_path, self._series_path]:
+            if os.path.exists(path):
+                os.remove(path)
+
+        with open(self._file_path, 'rb') as file:
+            headerLine = file.readline()
+
+        emptyStat = {'value': float('nan'), 'date': None, 'index': -1}
+        return {'file_path': os.path.abspath(self._file_path),
+                'desired_variable': self._desired_variable,
+                'windows': self._windows,
+                'average_type': self._average_type,
+                'columns': headerLine.decode().strip().split(','),
+                'offset': len(headerLine),
+                'tail_hash': None,
+                'rows': 0,
+                'count': 0,
+                'sum_partials': [],
+                'cumulative_sums': [0.0],
+                'cumulative_counts': [0],
+                'last_values': [],
+                'last_date': None,
+                'begin': dict(emptyStat), 'close': dict(emptyStat),
+                'min': dict(emptyStat), 'max': dict(emptyStat)}
+
+
+    ###########################################################################
+    #####
+    ##### method to load the saved state, if it still fits the query and file
+    #####
+    ###########################################################################
+    def _load_state(self):
+        if not os.path.exists(self._state_path):
+            return None
+
+        with open(self._state_path) as file:
+            state = json.load(file)
+
+        query = [os.path.abspath(self._file_path), self._desired_variable, self._windows, self._average_type]
+        if [state['file_path'], state['desired_variable'], state['windows'], state['average_type']] != query:
+            return None
+
+        # the processed part of the file must be unchanged
+        if os.path.getsize(self._file_path) < state['offset'] or self._tail_hash(state['offset']) != state['tail_hash']:
+            return None
+
+        # an update that stopped before saving may have left extra rows
+        columns = len(self._windows) + 1
+        for path, rowBytes in [[self._dates_path, 8], [self._series_path, 8 * columns]]:
+            if not os.path.exists(path) or os.path.getsize(path) < state['rows'] * rowBytes:
+                return None
+            if os.path.getsize(path) > state['rows'] * rowBytes:
+                os.truncate(path, state['rows'] * rowBytes)
+
+        return state
+
+
+    ###########################################################################
+    #####
+    ##### method to write the state, moving a temporary file into place
+    #####
+    ##### @param state - the state to write
+    #####
+    ###########################################################################
+    def _save_state(self, state):
+        state['tail_hash'] = self._tail_hash(state['offset'])
+
+        temporaryPath = '{0}.{1}.tmp'.format(self._state_path, os.getpid())
+        with open(temporaryPath, 'w') as file:
+            json.dump(state, file)
+        os.replace(temporaryPath, self._state_path)
+
+
+    ###########################################################################
+    #####
+    ##### method to hash the bytes just before an offset of the price file
+    #####
+    ##### @param offset - the processed byte offset
+    #####
+    ###########################################################################
+    def _tail_hash(self, offset):
+        with open(self._file_path, 'rb') as file:
+            file.seek(max(0, offset - TAIL_BYTES))
+            tail = file.read(min(offset, TAIL_BYTES))
+
+        return hashlib.sha1(tail).hexdigest()
+
+
+    ###########################################################################
+    #####
+    ##### method to read the complete rows after the processed offset
+    #####
+    ##### a last line without a newline is still being written and is left
+    ##### for the next update
+    #####
+    ##### @param state - the state, its offset is moved past the rows read
+    #####
+    ##### @return [values, dates, date text] or None when nothing was added
+    #####
+    ###########################################################################
+    def _read_new_rows(self, state):
+        with open(self._file_path, 'rb') as file:
+            file.seek(state['offset'])
+            added = file.read()
+
+        added = added[:added.rfind(b'\n') + 1]
+        if len(added.strip()) == 0:
+            return None
+        state['offset'] += len(added)
+
+        chunk = pd.read_csv(io.BytesIO(added), header = None, names = state['columns'],
+                            usecols = ['Date', self._desired_variable])
+        values = chunk[self._desired_variable].to_numpy(dtype = float)
+        dateText = chunk['Date'].astype(str).to_numpy()
+        dates = pd.to_datetime(dateText).to_numpy(dtype = 'datetime64[ns]').view('int64')
+
+        return [values, dates, dateText]
+
+
+    ###########################################################################
+    #####
+    ##### method to fold new rows into the state and the stored series
+    #####
+    ##### @param state - the state, changed in place
+    ##### @param values - the new values
+    ##### @param dates - the new dates as int64 nanoseconds
+    ##### @param date_text - the new dates as written in the csv
+    #####
+    ###########################################################################
+    def _add_rows(self, state, values, dates, date_text):
+        rows = state['rows']
+        valid = ~np.isnan(values)
+
+        # extrema, first and last values, earliest row kept on ties
+        chunkStats = summary_statistics(values, dates = date_text).iloc[0]
+        if chunkStats['count'] > 0:
+            for name, isBetter in [['begin', lambda old, new: old['index'] < 0],
+                                   ['close', lambda old, new: True],
+                                   ['min', lambda old, new: old['index'] < 0 or new < old['value']],
+                                   ['max', lambda old, new: old['index'] < 0 or new > old['value']]]:
+                if isBetter(state[name], chunkStats[name]):
+                    state[name] = {'value': float(chunkStats[name]), 'date': str(chunkStats[name + '_date']),
+                                   'index': rows + int(chunkStats[name + '_index'])}
+
+        add_exact(state['sum_partials'], values[valid].tolist())
+        state['count'] += int(valid.sum())
+
+        # cumulative sums continue the same sequential sum a full pass makes
+        sums = np.cumsum(np.concatenate([state['cumulative_sums'][-1:], np.where(valid, values, 0.0)]))[1:]
+        counts = np.cumsum(np.concatenate([state['cumulative_counts'][-1:], valid]))[1:]
+        allSums = np.concatenate([state['cumulative_sums'], sums])
+        allCounts = np.concatenate([state['cumulative_counts'], counts])
+        allValues = np.concatenate([np.asarray(state['last_values'], dtype = float), values])
+        start = rows + 1 - len(state['cumulative_sums'])
+
+        series = np.full((len(values), len(self._windows) + 1), np.nan)
+        series[:, 0] = values
+        for column, window in enumerate(self._windows, 1):
+            if self._average_type == 'simple':
+                positions = np.arange(rows, rows + len(values))
+                hasWindow = positions >= window
+                current = positions[hasWindow] - start
+                windowSums = allSums[current] - allSums[current - window]
+                windowCounts = allCounts[current] - allCounts[current - window]
+                series[hasWindow, column] = np.where(windowCounts == window, windowSums / window, np.nan)
+            else:
+                averages = weighted_moving_average(allValues, window)
+                series[:, column] = averages[len(state['last_values']):]
+
+        with open(self._dates_path, 'ab') as file:
+            file.write(dates.astype('int64').tobytes())
+        with open(self._series_path, 'ab') as file:
+            file.write(series.tobytes())
+
+        # keep just enough history for the largest window
+        state['rows'] = rows + len(values)
+        state['cumulative_sums'] = allSums[-(self._max_window + 1):].tolist()
+        state['cumulative_counts'] = allCounts[-(self._max_window + 1):].tolist()
+        state['last_values'] = allValues[-self._max_window:].tolist()
+        state['last_date'] = str(date_text[-1])
+
+
+    ###########################################################################
+    #####
+    ##### method to turn the state and stored series into chart inputs
+    #####
+    ##### @param state - the state
+    #####
+    ###########################################################################
+    def _results(self, state):
+        rows = state['rows']
+        columns = len(self._windows) + 1
+
+        if rows == 0:
+            dates = np.zeros(0, dtype = 'datetime64[ns]')
+            series = np.zeros((0, columns))
+        else:
+            dates = np.memmap(self._dates_path, dtype = 'int64', mode = 'r', shape = (rows,)).view('datetime64[ns]')
+            series = np.memmap(self._series_path, dtype = 'float64', mode = 'r', shape = (rows, columns))
+
+        data = pd.DataFrame({'Date': dates, self._desired_variable: series[:, 0]}, copy = False)
+        averages = {window: series[:, column] for column, window in enumerate(self._windows, 1)}
+
+        stats = {'count': state['count'],
+                 'mean': math.fsum(state['sum_partials']) / state['count'] if state['count'] > 0 else float('nan')}
+        for name in ['begin', 'close', 'min', 'max']:
+            stats[name] = state[name]['value']
+            stats[name + '_date'] = state[name]['date']
+            stats[name + '_index'] = state[name]['index']
+
+        return [data, stats, averages]
+
+
+###########################################################################
+#####
+##### method to check an update against a full recomputation
+#####
+##### the mean is recomputed with an exact sum, like the running one, so
+##### it does not depend on how the rows were split into updates
+#####
+##### @param file_path - the path to the stock price csv
+##### @param desired_variable - the variable to look at [ex. 'Close']
+##### @param average_type - 'simple' or 'weighted'
+##### @param stats - the incremental statistics
+##### @param averages - the incremental moving averages
+#####
+##### @return list of the values that differ, empty when all match exactly
+#####
+###########################################################################
+def verify(file_path, desired_variable, average_type, stats, averages):
+    data = pd.read_csv(file_path, usecols = ['Date', desired_variable])
+    fullStats = summary_statistics(data, [desired_variable]).iloc[0]
+    # the running mean is an exact sum, the shared kernel's is a fast one
+    values = data[desired_variable].to_numpy(dtype = float)
+    if fullStats['count'] > 0:
+        fullStats['mean'] = math.fsum(values[~np.isnan(values)].tolist()) / fullStats['count']
+    fullAverages = moving_averages(data[desired_variable].to_numpy(), list(averages.keys()), average_type)
+
+    differences = []
+    for name in ['begin', 'close', 'mean', 'min', 'max', 'begin_index', 'close_index', 'min_index', 'max_index', 'count']:
+        same = stats[name] == fullStats[name] or (pd.isna(stats[name]) and pd.isna(fullStats[name]))
+        if not same:
+            differences.append('{0}: {1} != {2}'.format(name, stats[name], fullStats[name]))
+    for name in ['begin_date', 'close_date', 'min_date', 'max_date']:
+        if stats[name] != (None if fullStats[name] is None else str(fullStats[name])):
+            differences.append('{0}: {1} != {2}'.format(name, stats[name], fullStats[name]))
+    for window in averages:
+        if not np.array_equal(np.asarray(averages[window]), fullAverages[window], equal_nan = True):
+            differences.append('moving average {0}'.format(window))
+
+    return differences
+
+
+
+if __name__ == '__main__':
+    descrip = 'update the saved statistics and moving averages of a growing price file'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-p',
+                           '--path',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='the file path of the stock data')
+    arguments.add_argument('-v',
+                           '--desired_variable',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default='Close',
+                           help='the variable to look at [default = Close]')
+    arguments.add_argument('-d',
+                           '--days',
+                           action='store',
+                           type=int,
+                           nargs='+',
+                           required=False,
+                           default=[7],
+                           help='the moving average window sizes [default = 7]')
+    arguments.add_argument('-a',
+                           '--average_type',
+                           action='store',
+                           type=str,
+                           choices=INCREMENTAL_AVERAGE_TYPES,
+                           required=False,
+                           default='simple',
+                           help='the type of moving average [default = simple]')
+    arguments.add_argument('-s',
+                           '--state_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='file path of the saved state [default = <path>.state.json]')
+    arguments.add_argument('--verify',
+                           action='store_true',
+                           help='recompute everything from scratch and check the results match exactly')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    path = variables['path']
+    if not os.path.isfile(path):
+        arguments.error('stock data file {0} does not exist'.format(path))
+    if min(variables['days']) < 1:
+        arguments.error('--days must be positive')
+    statePath = variables['state_path']
+    if statePath == None:
+        statePath = path + '.state.json'
+
+    indicators = Incremental_Indicators(statePath, path, variables['desired_variable'], variables['days'],
+                                        variables['average_type'])
+    data, stats, averages = indicators.update()
+    print(json.dumps(stats, indent = 2))
+
+    if variables['verify'] == True:
+        differences = verify(path, variables['desired_variable'], variables['average_type'], stats, averages)
+        if len(differences) > 0:
+            print('differs from a full recomputation: ' + '; '.join(differences))
+            raise SystemExit(1)
+        print('matches a full recomputation exactly')
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/incremental.py -p /Users/mtjen/Desktop/395/AAPL.csv -d 7 30 --verify
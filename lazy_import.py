@@ -0,0 +1,35 @@
+# imports
+import importlib
+
+
+# class standing in for a module until one of its attributes is used, so
+# heavy modules [pandas, numpy, matplotlib] only load on code paths that
+# need them and command line parsing stays fast
+class Lazy_Module:
+
+    # initialize parameters
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+
+
+    # load the module on first use and pass the attribute through
+    def __getattr__(self, name):
+        if name.startswith('__') and name.endswith('__'):
+            raise AttributeError(name)
+
+        if self._module is None:
+            self._module = importlib.import_module(self._module_name)
+
+        return getattr(self._module, name)
+
+
+###########################################################################
+#####
+##### method to get a module that is only imported when first used
+#####
+##### @param module_name - the module to import [ex. 'matplotlib.pyplot']
+#####
+###########################################################################
+def lazy_import(module_name):
+    return Lazy_Module(module_name)
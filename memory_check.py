@@ -0,0 +1,149 @@
+# imports
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+# render without a display, before pyplot is loaded by the chart modules
+import matplotlib
+matplotlib.use('Agg')
+
+from census import Visualize_Census
+from profiling import current_rss_megabytes
+from synthetic_data import CENSUS_CATEGORIES, CENSUS_GROUPS, write_census_workbooks, write_price_csvs
+from visualize import Visualize_Stocks
+
+
+# charts rendered in turn, to files and to bytes
+RENDERS = ['stock_main', 'stock_render', 'many_stock_render', 'census_main', 'census_render']
+
+
+# class to check resident memory stays flat over many chart renders in one
+# process, like a notebook or render worker
+#
+# memory is sampled after a warm up, so fonts, caches and lazily loaded
+# modules are in place before the growth is measured
+class Memory_Check:
+
+    # initialize parameters
+    def __init__(self, renders = 200, tolerance_megabytes = 25, rows = 250, samples = 20):
+        self._renders = renders
+        self._tolerance_megabytes = tolerance_megabytes
+        self._rows = rows
+        self._samples = samples
+
+
+    # main method
+    def main(self):
+        with tempfile.TemporaryDirectory() as folder:
+            return self._run(folder)
+
+
+    ###########################################################################
+    #####
+    ##### method to write the synthetic data and render it over and over
+    #####
+    ##### @param folder - the folder to write the data and images into
+    #####
+    ###########################################################################
+    def _run(self, folder):
+        prices = write_price_csvs(os.path.join(folder, 'prices'), self._rows, 3)
+        censusFolder = os.path.join(folder, 'census') + '/'
+        write_census_workbooks(censusFolder, tables = 1)
+
+        stocks = list(prices.keys())
+        path = prices[stocks[0]]
+        imagePath = os.path.join(folder, 'chart.png')
+        category = list(CENSUS_CATEGORIES.keys())[0]
+        group = list(CENSUS_GROUPS.keys())[0]
+
+        def stock_chart(**parameters):
+            return Visualize_Stocks(stocks[0], path, 'Close', '1Y', days_per_average = [7, 30], **parameters)
+
+        def census_chart(**parameters):
+            return Visualize_Census(censusFolder, True, 0, category, CENSUS_CATEGORIES[category][0],
+                                    group, None, **parameters)
+
+        cases = {
+            'stock_main': lambda: stock_chart(result_file_path = imagePath).main(),
+            'stock_render': lambda: stock_chart().render('moving'),
+            'many_stock_render': lambda: stock_chart(other_stocks = stocks[1:],
+                                                     other_file_paths = [prices[stock] for stock in stocks[1:]]).render('price'),
+            'census_main': lambda: census_chart(result_file_path = imagePath).main(),
+            'census_render': lambda: census_chart().render()}
+
+        warmUp = max(len(RENDERS) * 4, self._renders // 10)
+        sampleEvery = max(1, (self._renders - warmUp) // self._samples)
+        samples = []
+
+        for number in range(warmUp + self._renders):
+            cases[RENDERS[number % len(RENDERS)]]()
+            if number + 1 >= warmUp and (number + 1 - warmUp) % sampleEvery == 0:
+                samples.append([number + 1 - warmUp, current_rss_megabytes()])
+
+        growth = round(samples[-1][1] - samples[0][1], 3)
+        results = {'renders': self._renders, 'warm_up_renders': warmUp,
+                   'tolerance_megabytes': self._tolerance_megabytes,
+                   'warm_rss_megabytes': samples[0][1], 'final_rss_megabytes': samples[-1][1],
+                   'growth_megabytes': growth, 'samples': samples, 'failures': []}
+
+        if growth > self._tolerance_megabytes:
+            results['failures'].append('resident memory grew {0} MB over {1} renders, over the {2} MB tolerance'.format(
+                growth, self._renders, self._tolerance_megabytes))
+
+        # figures left in pyplot are the usual leak
+        if 'matplotlib.pyplot' in sys.modules:
+            openFigures = len(sys.modules['matplotlib.pyplot'].get_fignums())
+            results['open_pyplot_figures'] = openFigures
+            if openFigures > 0:
+                results['failures'].append('{0} figures left open in pyplot'.format(openFigures))
+
+        return results
+
+
+
+if __name__ == '__main__':
+    descrip = 'check memory stays flat over many chart renders in one process'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-n',
+                           '--renders',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=200,
+                           help='the amount of charts rendered after the warm up, raise it [ex. 2000] for a long soak [default = 200]')
+    arguments.add_argument('-m',
+                           '--tolerance_megabytes',
+                           action='store',
+                           type=float,
+                           required=False,
+                           default=25,
+                           help='the most resident memory may grow [default = 25]')
+    arguments.add_argument('-r',
+                           '--rows',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=250,
+                           help='the amount of price rows per stock [default = 250]')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    if variables['renders'] < 1:
+        arguments.error('--renders must be positive')
+
+    results = Memory_Check(variables['renders'], variables['tolerance_megabytes'], variables['rows']).main()
+    print(json.dumps(results, indent = 2))
+
+    if len(results['failures']) > 0:
+        sys.exit(1)
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/memory_check.py
+
+# long soak example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/memory_check.py -n 2000 -m 10
@@ -0,0 +1,237 @@
+# imports
+import argparse
+import json
+import os
+import struct
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+# extension of price store files, written next to the csv they come from
+STORE_EXTENSION = '.prices'
+
+# first bytes of every price store file
+STORE_MAGIC = b'PRICES01'
+
+# column blocks start on this byte boundary so every column maps aligned
+BLOCK_ALIGNMENT = 64
+
+# bytes kept for the header, the first column block starts after it
+HEADER_SIZE = 4096
+
+
+###########################################################################
+#####
+##### method to get the price store path that belongs to a csv file
+#####
+##### @param csv_path - the path to the stock price csv
+#####
+###########################################################################
+def store_path_for(csv_path):
+    return os.path.splitext(csv_path)[0] + STORE_EXTENSION
+
+
+###########################################################################
+#####
+##### method to find an up to date price store for a stock data file
+#####
+##### @param path - a price store, or a csv with a store written next to it
+#####
+##### @return the store path, or None when the csv has to be parsed
+#####
+###########################################################################
+def find_store(path):
+    if path.endswith(STORE_EXTENSION):
+        return path
+
+    storePath = store_path_for(path)
+    if os.path.exists(storePath) and os.stat(storePath).st_mtime_ns >= os.stat(path).st_mtime_ns:
+        return storePath
+
+    return None
+
+
+###########################################################################
+#####
+##### method to turn dates into the text the csv files use
+#####
+##### daily data is written as '%Y-%m-%d', anything with a time of day as
+##### '%Y-%m-%d %H:%M:%S'. text dates are passed through.
+#####
+##### @param dates - array or series of dates
+#####
+###########################################################################
+def date_text(dates):
+    values = np.asarray(dates)
+    if values.dtype.kind != 'M':
+        return values
+
+    values = values.astype('datetime64[ns]')
+    isDaily = (values.view('int64') % (24 * 60 * 60 * 10 ** 9) == 0).all()
+    if isDaily:
+        return np.datetime_as_string(values, unit = 'D').astype(object)
+
+    return np.char.replace(np.datetime_as_string(values, unit = 's'), 'T', ' ').astype(object)
+
+
+###########################################################################
+#####
+##### method to convert a stock price csv into a price store
+#####
+##### the store is a small json header followed by one aligned block per
+##### column: Date as int64 epoch nanoseconds, every other column float64.
+##### it is written to a temporary file and moved into place, so readers
+##### never see half a store.
+#####
+##### @param csv_path - the path to the stock price csv
+##### @param store_path - where to write the store [default = next to the csv]
+#####
+##### @return the store path
+#####
+###########################################################################
+def convert_csv(csv_path, store_path = None):
+    if store_path == None:
+        store_path = store_path_for(csv_path)
+
+    data = pd.read_csv(csv_path)
+    if 'Date' not in data.columns:
+        raise ValueError('{0} has no Date column'.format(csv_path))
+
+    blocks = [['Date', pd.to_datetime(data['Date']).to_numpy(dtype = 'datetime64[ns]').view('int64')]]
+    for column in data.columns:
+        if column != 'Date':
+            blocks.append([column, pd.to_numeric(data[column], errors = 'coerce').to_numpy(dtype = 'float64')])
+
+    # place every block after the header, aligned
+    columns = []
+    offset = HEADER_SIZE
+    for name, values in blocks:
+        columns.append({'name': name, 'dtype': values.dtype.str, 'offset': offset})
+        offset += -(-values.nbytes // BLOCK_ALIGNMENT) * BLOCK_ALIGNMENT
+
+    header = json.dumps({'rows': len(data), 'columns': columns}).encode()
+    if len(header) + 16 > HEADER_SIZE:
+        raise ValueError('{0} has too many columns for a price store'.format(csv_path))
+
+    temporaryPath = '{0}.{1}.tmp'.format(store_path, os.getpid())
+    with open(temporaryPath, 'wb') as file:
+        file.write(STORE_MAGIC + struct.pack('<Q', len(header)) + header)
+        for column, [name, values] in zip(columns, blocks):
+            file.write(b'\0' * (column['offset'] - file.tell()))
+            file.write(values.tobytes())
+    os.replace(temporaryPath, store_path)
+
+    return store_path
+
+
+# class to read a price store through memory maps, so loads do not parse
+# or copy the columns
+class Price_Store:
+
+    # initialize parameters
+    def __init__(self, store_path):
+        self._store_path = store_path
+
+        with open(store_path, 'rb') as file:
+            magic = file.read(len(STORE_MAGIC))
+            if magic != STORE_MAGIC:
+                raise ValueError('{0} is not a price store'.format(store_path))
+            headerLength = struct.unpack('<Q', file.read(8))[0]
+            header = json.loads(file.read(headerLength))
+
+        self.rows = header['rows']
+        self._columns = {column['name']: column for column in header['columns']}
+        self.columns = [column['name'] for column in header['columns']]
+
+
+    ###########################################################################
+    #####
+    ##### method to map one column of the store
+    #####
+    ##### @param name - the column name [ex. 'Close']
+    #####
+    ##### @return read only array backed by the file, Date as datetime64[ns]
+    #####
+    ###########################################################################
+    def column(self, name):
+        if name not in self._columns:
+            raise KeyError('{0} has no column {1}, expected one of {2}'.format(self._store_path, name, self.columns))
+
+        column = self._columns[name]
+        if self.rows == 0:
+            values = np.zeros(0, dtype = column['dtype'])
+        else:
+            values = np.memmap(self._store_path, dtype = column['dtype'], mode = 'r',
+                               offset = column['offset'], shape = (self.rows,))
+
+        if name == 'Date':
+            return values.view('datetime64[ns]')
+        return values
+
+
+    ###########################################################################
+    #####
+    ##### method to get columns as a dataframe, like pd.read_csv(usecols)
+    #####
+    ##### @param columns - the columns to read [default = all]
+    ##### @param index - the column to index by [default = None]
+    ##### @param rows - slice of the rows to read [default = all, see row_bounds]
+    #####
+    ###########################################################################
+    def frame(self, columns = None, index = None, rows = None):
+        if columns == None:
+            columns = self.columns
+        if rows == None:
+            rows = slice(None)
+
+        # slicing a memory map only maps the pages of those rows
+        data = pd.DataFrame({name: self.column(name)[rows] for name in columns}, copy = False)
+        if index != None:
+            data = data.set_index(index)
+
+        return data
+
+
+
+if __name__ == '__main__':
+    descrip = 'convert stock price csv files into memory mapped price stores'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-p',
+                           '--paths',
+                           action='store',
+                           type=str,
+                           nargs='+',
+                           required=True,
+                           help='the stock price csv files to convert')
+    arguments.add_argument('-o',
+                           '--output_folder',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='folder to write the stores to [default = next to each csv]')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    outputFolder = variables['output_folder']
+    if outputFolder != None:
+        os.makedirs(outputFolder, exist_ok = True)
+    for path in variables['paths']:
+        if not os.path.isfile(path):
+            arguments.error('stock data file {0} does not exist'.format(path))
+
+    for path in variables['paths']:
+        storePath = None
+        if outputFolder != None:
+            storePath = os.path.join(outputFolder, os.path.basename(store_path_for(path)))
+        storePath = convert_csv(path, storePath)
+        print('{0} -> {1} [{2} rows]'.format(path, storePath, Price_Store(storePath).rows))
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/price_store.py -p /Users/mtjen/Desktop/395/AAPL.csv /Users/mtjen/Desktop/395/ZS.csv
@@ -0,0 +1,241 @@
+# imports
+import argparse
+import io
+from date_range import csv_offset
+from lazy_import import lazy_import
+from summary_stats import summary_statistics
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+# class to read a price file in chunks, keeping running statistics and a
+# bar-resampled series small enough to plot, so memory stays bounded
+class Price_Stream:
+
+    # initialize parameters
+    def __init__(self, file_path, desired_variable, bar = 'D', chunk_size = 500000, start = None, stop = None):
+        self._file_path = file_path
+        self._desired_variable = desired_variable
+        self._bar = bar
+        self._chunk_size = chunk_size
+        self._start = start
+        self._stop = stop
+
+
+    ###########################################################################
+    #####
+    ##### method to stream the file, or only the rows from start to stop
+    #####
+    ##### the file is date sorted, so reading begins at the first row of
+    ##### the period and ends at the first chunk past it
+    #####
+    ##### @return [stats, bars]
+    #####         stats - dictionary of begin, close, mean, min, max, their
+    #####                 dates, count, and the bar positions of min and max
+    #####         bars - dataframe of open, high, low, close per bar,
+    #####                indexed by bar label
+    #####
+    ###########################################################################
+    def read(self):
+        stats = {'begin': np.nan, 'close': np.nan, 'mean': np.nan, 'min': np.nan, 'max': np.nan,
+                 'begin_date': None, 'close_date': None, 'min_date': None, 'max_date': None, 'count': 0}
+        total = 0.0
+        bars = []
+
+        with open(self._file_path, 'rb') as file:
+            names = pd.read_csv(io.BytesIO(file.readline()), nrows = 0).columns
+            if self._start is not None:
+                file.seek(csv_offset(self._file_path, self._start))
+
+            chunks = pd.read_csv(file,
+                                 header = None,
+                                 names = names,
+                                 usecols = ['Date', self._desired_variable],
+                                 chunksize = self._chunk_size)
+
+            for chunk in chunks:
+                pastStop = False
+                if self._stop is not None:
+                    inPeriod = pd.to_datetime(chunk['Date']).to_numpy() < self._stop
+                    pastStop = not inPeriod.all()
+                    chunk = chunk[inPeriod]
+
+                chunk = chunk.dropna()
+                if len(chunk) > 0:
+                    values = chunk[self._desired_variable].to_numpy(dtype = float)
+                    dates = chunk['Date'].to_numpy()
+
+                    total += values.sum()
+                    self._update_stats(stats, values, dates)
+
+                    bars.append(self._resample(chunk))
+
+                # the rest of the file is past the period
+                if pastStop == True:
+                    break
+
+        bars = self._merge_bars(bars)
+
+        # positions of the min and max in the bars, for charts
+        if stats['count'] > 0:
+            stats['mean'] = total / stats['count']
+            stats['min_index'] = bars.index.get_loc(self._bar_label(stats['min_date']))
+            stats['max_index'] = bars.index.get_loc(self._bar_label(stats['max_date']))
+
+        return [stats, bars]
+
+
+    ###########################################################################
+    #####
+    ##### method to fold one chunk into the running statistics
+    #####
+    ##### ties keep the earliest date for min and max
+    #####
+    ##### @param stats - the running statistics
+    ##### @param values - the chunk values
+    ##### @param dates - the chunk dates
+    #####
+    ###########################################################################
+    def _update_stats(self, stats, values, dates):
+        chunkStats = summary_statistics(values, dates = dates).iloc[0]
+
+        if stats['count'] == 0:
+            stats['begin'] = chunkStats['begin']
+            stats['begin_date'] = chunkStats['begin_date']
+
+        stats['close'] = chunkStats['close']
+        stats['close_date'] = chunkStats['close_date']
+
+        if stats['count'] == 0 or chunkStats['min'] < stats['min']:
+            stats['min'] = chunkStats['min']
+            stats['min_date'] = chunkStats['min_date']
+        if stats['count'] == 0 or chunkStats['max'] > stats['max']:
+            stats['max'] = chunkStats['max']
+            stats['max_date'] = chunkStats['max_date']
+
+        stats['count'] += chunkStats['count']
+
+
+    ###########################################################################
+    #####
+    ##### method to resample one chunk into open/high/low/close bars
+    #####
+    ##### @param chunk - the chunk of data
+    #####
+    ###########################################################################
+    def _resample(self, chunk):
+        series = pd.Series(chunk[self._desired_variable].to_numpy(dtype = float),
+                           index = pd.to_datetime(chunk['Date']))
+
+        return series.resample(self._bar).ohlc().dropna()
+
+
+    ###########################################################################
+    #####
+    ##### method to get the label of the bar a date falls in
+    #####
+    ##### @param date - the date
+    #####
+    ###########################################################################
+    def _bar_label(self, date):
+        single = pd.Series([0.0], index = pd.to_datetime([date]))
+        return single.resample(self._bar).ohlc().index[0]
+
+
+    ###########################################################################
+    #####
+    ##### method to join the bars of every chunk
+    #####
+    ##### a bar split across two chunks is combined back into one
+    #####
+    ##### @param bars - list of bar dataframes, in file order
+    #####
+    ###########################################################################
+    def _merge_bars(self, bars):
+        if len(bars) == 0:
+            return pd.DataFrame(columns = ['open', 'high', 'low', 'close'])
+
+        bars = pd.concat(bars)
+        grouped = bars.groupby(level = 0, sort = False)
+
+        merged = pd.DataFrame({'open': grouped['open'].first(),
+                               'high': grouped['high'].max(),
+                               'low': grouped['low'].min(),
+                               'close': grouped['close'].last()})
+        merged.index.name = 'Date'
+
+        return merged
+
+
+    ###########################################################################
+    #####
+    ##### method to get the bars as a chart dataframe [Date, variable]
+    #####
+    ##### @param bars - the bar dataframe from read
+    #####
+    ###########################################################################
+    def chart_data(self, bars):
+        dateFormat = '%Y-%m-%d'
+        if len(bars) > 0 and (bars.index.normalize() != bars.index).any():
+            dateFormat = '%Y-%m-%d %H:%M'
+
+        data = pd.DataFrame({'Date': bars.index.strftime(dateFormat),
+                             self._desired_variable: bars['close'].to_numpy()})
+
+        return data
+
+
+
+if __name__ == '__main__':
+    descrip = 'stream a price file into statistics and bars'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-p',
+                           '--path',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='the file path of the stock data')
+    arguments.add_argument('-v',
+                           '--desired_variable',
+                           type=str,
+                           required=True,
+                           help='the desired variable to summarize')
+    arguments.add_argument('-b',
+                           '--bar',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default='D',
+                           help='the bar size, a pandas frequency [ex. D, W, h] [default=D]')
+    arguments.add_argument('-c',
+                           '--chunk_size',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=500000,
+                           help='the amount of rows read at a time [default=500000]')
+    arguments.add_argument('-r',
+                           '--result_path',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None,
+                           help='the file path to write the bars to as .csv')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    stream = Price_Stream(variables['path'], variables['desired_variable'], variables['bar'], variables['chunk_size'])
+    stats, bars = stream.read()
+
+    for key, value in stats.items():
+        print('{0}: {1}'.format(key, value))
+    if variables['result_path'] != None:
+        bars.to_csv(variables['result_path'])
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/price_stream.py -p '/Users/mtjen/Desktop/395/AAPL.csv' -v 'Close' -b 'W'
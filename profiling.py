@@ -0,0 +1,171 @@
+# imports
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# resource is not available on windows, peak rss is left out there
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+###########################################################################
+#####
+##### method to get the peak resident memory of this process in megabytes
+#####
+##### ru_maxrss is in kilobytes on linux and in bytes on macOS
+#####
+###########################################################################
+def peak_rss_megabytes():
+    if resource == None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return round(peak / (1024 * 1024), 3)
+    return round(peak / 1024, 3)
+
+
+###########################################################################
+#####
+##### method to get the current resident memory of this process in megabytes
+#####
+##### read from /proc on linux; elsewhere the peak is the closest measure
+#####
+###########################################################################
+def current_rss_megabytes():
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return peak_rss_megabytes()
+
+    return round(pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 3)
+
+
+# class to record the wall time, cpu time and memory of each stage of a
+# chart job [load, compute, plot, save]
+#
+# stages run one after the other: begin() ends the stage before it, so the
+# chart code only marks where each stage starts. every finished stage is
+# passed to the hooks, so a scheduler can collect the same numbers when the
+# chart classes are used as a library.
+#
+# heavy modules load lazily, so their import time lands in the first stage
+# that uses them. tracemalloc slows allocation heavy stages down, turn it
+# off with trace_memory = False when only the times matter.
+class Stage_Profiler:
+
+    # initialize parameters
+    def __init__(self, enabled = True, trace_memory = True, hooks = None):
+        self._enabled = enabled
+        self._trace_memory = trace_memory and enabled
+        self._hooks = list(hooks) if hooks != None else []
+        self._stages = []
+        self._current = None
+        self._started_tracing = False
+
+
+    ###########################################################################
+    #####
+    ##### method to add a function called with every finished stage record
+    #####
+    ##### @param hook - function taking the stage record dictionary
+    #####
+    ###########################################################################
+    def add_hook(self, hook):
+        self._hooks.append(hook)
+
+
+    ###########################################################################
+    #####
+    ##### method to start a stage, ending the one before it
+    #####
+    ##### @param name - the stage name [ex. 'load', 'compute', 'plot', 'save']
+    ##### @param labels - extra values kept with the stage [ex. chart = 'price']
+    #####
+    ###########################################################################
+    def begin(self, name, **labels):
+        if self._enabled == False:
+            return
+
+        self.end()
+
+        if self._trace_memory == True:
+            if tracemalloc.is_tracing() == False:
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+
+        self._current = {'stage': name, 'labels': labels,
+                         'wall_start': time.perf_counter(), 'cpu_start': time.process_time()}
+
+
+    ###########################################################################
+    #####
+    ##### method to end the running stage, if any
+    #####
+    ###########################################################################
+    def end(self):
+        if self._enabled == False or self._current == None:
+            return
+
+        current = self._current
+        self._current = None
+
+        record = {'stage': current['stage']}
+        record.update(current['labels'])
+        record['wall_seconds'] = round(time.perf_counter() - current['wall_start'], 6)
+        record['cpu_seconds'] = round(time.process_time() - current['cpu_start'], 6)
+        record['peak_rss_mb'] = peak_rss_megabytes()
+        if self._trace_memory == True:
+            record['tracemalloc_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 3)
+
+        self._stages.append(record)
+        for hook in self._hooks:
+            hook(record)
+
+
+    ###########################################################################
+    #####
+    ##### method to end the running stage and stop memory tracing
+    #####
+    ###########################################################################
+    def close(self):
+        self.end()
+
+        if self._started_tracing == True:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+    ###########################################################################
+    #####
+    ##### method to get the trace of every finished stage plus totals
+    #####
+    ###########################################################################
+    def trace(self):
+        totals = {}
+        for record in self._stages:
+            total = totals.setdefault(record['stage'], {'wall_seconds': 0.0, 'cpu_seconds': 0.0})
+            total['wall_seconds'] = round(total['wall_seconds'] + record['wall_seconds'], 6)
+            total['cpu_seconds'] = round(total['cpu_seconds'] + record['cpu_seconds'], 6)
+
+        return {'stages': list(self._stages), 'totals': totals, 'peak_rss_mb': peak_rss_megabytes()}
+
+
+    ###########################################################################
+    #####
+    ##### method to write the trace to a json file
+    #####
+    ##### @param file_path - the path of the json file
+    #####
+    ###########################################################################
+    def write(self, file_path):
+        self.close()
+
+        with open(file_path, 'w') as file:
+            json.dump(self.trace(), file, indent = 2)
@@ -0,0 +1,284 @@
+# imports
+import argparse
+import hashlib
+import json
+import os
+import shutil
+
+
+###########################################################################
+#####
+##### method to get a short digest of chart parameters
+#####
+##### @param parameters - json serializable chart parameters
+##### @param length - the amount of hex characters to keep
+#####
+###########################################################################
+def parameter_digest(parameters, length = 12):
+    text = json.dumps(parameters, sort_keys = True, default = str)
+    return hashlib.sha256(text.encode()).hexdigest()[:length]
+
+
+###########################################################################
+#####
+##### method to save a figure through a temporary file
+#####
+##### the image is moved into place, so readers never see half an image and
+##### a cached image linked at the path is replaced instead of overwritten
+#####
+##### @param figure - the pyplot module or a figure
+##### @param path - the image path
+##### @param options - savefig options [ex. bbox_inches = 'tight']
+#####
+###########################################################################
+def save_figure(figure, path, **options):
+    root, extension = os.path.splitext(path)
+    temporaryPath = '{0}.{1}.tmp{2}'.format(root, os.getpid(), extension)
+    figure.savefig(temporaryPath, **options)
+    os.replace(temporaryPath, path)
+
+
+# class to keep rendered charts on disk keyed by their inputs and
+# parameters, so unchanged charts are linked instead of drawn again
+#
+# an input is identified by its size and modification time, or by a hash
+# of its bytes when hash_contents is set. the folder is kept under
+# max_megabytes by removing the least recently used images.
+class Render_Cache:
+
+    # initialize parameters
+    def __init__(self, cache_folder_path, max_megabytes = 256, hash_contents = False):
+        self._cache_folder_path = cache_folder_path
+        self._max_bytes = int(max_megabytes * 1024 * 1024)
+        self._hash_contents = hash_contents
+
+
+    ###########################################################################
+    #####
+    ##### method to get the cache key of a chart
+    #####
+    ##### @param parameters - every parameter that changes the image
+    ##### @param input_paths - the files the chart reads
+    #####
+    ###########################################################################
+    def key(self, parameters, input_paths):
+        inputs = []
+        for path in input_paths:
+            if path == None:
+                continue
+            if not os.path.exists(path):
+                inputs.append([os.path.abspath(path), None])
+            elif self._hash_contents == True:
+                inputs.append([os.path.abspath(path), self._file_hash(path)])
+            else:
+                status = os.stat(path)
+                inputs.append([os.path.abspath(path), status.st_size, status.st_mtime_ns])
+
+        return parameter_digest({'parameters': parameters, 'inputs': inputs}, 64)
+
+
+    ###########################################################################
+    #####
+    ##### method to put a cached image at an output path
+    #####
+    ##### the image is hard linked when possible and copied otherwise, and
+    ##### counts as recently used
+    #####
+    ##### @param key - the cache key
+    ##### @param output_path - where the image is wanted
+    #####
+    ##### @return True if the image was cached
+    #####
+    ###########################################################################
+    def fetch(self, key, output_path):
+        cachePath = self._cache_path(key, output_path)
+        if not os.path.exists(cachePath):
+            return False
+
+        try:
+            os.utime(cachePath)
+            self._publish(cachePath, output_path)
+        except FileNotFoundError:
+            # evicted by another process in between
+            return False
+
+        return True
+
+
+    ###########################################################################
+    #####
+    ##### method to add a rendered image to the cache
+    #####
+    ##### @param key - the cache key
+    ##### @param image_path - the rendered image
+    #####
+    ###########################################################################
+    def put(self, key, image_path):
+        os.makedirs(self._cache_folder_path, exist_ok = True)
+        self._publish(image_path, self._cache_path(key, image_path))
+
+        self.evict()
+
+
+    ###########################################################################
+    #####
+    ##### method to remove the least recently used images over the size limit
+    #####
+    ##### @return the amount of images removed
+    #####
+    ###########################################################################
+    def evict(self):
+        entries = self._entries()
+        total = sum(entry[2] for entry in entries)
+        removed = 0
+
+        for path, used, size in sorted(entries, key = lambda entry: entry[1]):
+            if total <= self._max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        return removed
+
+
+    ###########################################################################
+    #####
+    ##### method to delete every cached image
+    #####
+    ###########################################################################
+    def clear(self):
+        entries = self._entries()
+        for path, used, size in entries:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        return len(entries)
+
+
+    ###########################################################################
+    #####
+    ##### method to get the amount and total size of the cached images
+    #####
+    ###########################################################################
+    def stats(self):
+        entries = self._entries()
+        return {'entries': len(entries), 'bytes': sum(entry[2] for entry in entries),
+                'max_bytes': self._max_bytes}
+
+
+    ###########################################################################
+    #####
+    ##### method to list the cached images as [path, last use, size]
+    #####
+    ###########################################################################
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self._cache_folder_path):
+            return entries
+
+        for name in os.listdir(self._cache_folder_path):
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(self._cache_folder_path, name)
+            try:
+                status = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append([path, status.st_mtime_ns, status.st_size])
+
+        return entries
+
+
+    ###########################################################################
+    #####
+    ##### method to get the cache file of a key, keeping the image extension
+    #####
+    ##### @param key - the cache key
+    ##### @param image_path - a path with the image extension
+    #####
+    ###########################################################################
+    def _cache_path(self, key, image_path):
+        extension = os.path.splitext(image_path)[1].lower()
+        return os.path.join(self._cache_folder_path, key + extension)
+
+
+    ###########################################################################
+    #####
+    ##### method to link or copy an image into place
+    #####
+    ##### images are only ever replaced [see save_figure], never written in
+    ##### place, so the cache and the outputs can share one file
+    #####
+    ##### @param source_path - the image
+    ##### @param target_path - where the image is wanted
+    #####
+    ###########################################################################
+    def _publish(self, source_path, target_path):
+        if os.path.exists(target_path) and os.path.samefile(source_path, target_path):
+            return
+
+        temporaryPath = '{0}.{1}.tmp'.format(target_path, os.getpid())
+        try:
+            os.link(source_path, temporaryPath)
+        except OSError:
+            shutil.copyfile(source_path, temporaryPath)
+        os.replace(temporaryPath, target_path)
+
+
+    ###########################################################################
+    #####
+    ##### method to hash the bytes of an input file
+    #####
+    ##### @param path - the input file
+    #####
+    ###########################################################################
+    def _file_hash(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+
+        return digest.hexdigest()
+
+
+
+if __name__ == '__main__':
+    descrip = 'show or clear a folder of cached chart images'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-p',
+                           '--cache_path',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='the render cache folder [ex. <data folder>/.render_cache]')
+    arguments.add_argument('-m',
+                           '--max_megabytes',
+                           action='store',
+                           type=float,
+                           required=False,
+                           default=256,
+                           help='the size limit to evict down to [default = 256]')
+    arguments.add_argument('--clear',
+                           action='store_true',
+                           help='delete every cached image')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    cache = Render_Cache(variables['cache_path'], variables['max_megabytes'])
+    if variables['clear'] == True:
+        print('removed {0} cached images'.format(cache.clear()))
+    else:
+        print('evicted {0} cached images'.format(cache.evict()))
+        print(json.dumps(cache.stats(), indent = 2))
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/render_cache.py -p /Users/mtjen/Desktop/395/.render_cache -m 128
@@ -0,0 +1,383 @@
+# imports
+import argparse
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+from urllib.parse import parse_qsl, urlparse
+
+# render without a display, before pyplot is loaded by the chart modules
+import matplotlib
+matplotlib.use('Agg')
+
+from census import Census_Load_Error, Visualize_Census
+from census_panel import Census_Panel
+from census_schema import Census_Schema
+from frame_cache import LRU_Cache
+from visualize import ANALYTICS_CHARTS, CHARTS, Visualize_Stocks
+
+
+###########################################################################
+#####
+##### method to read a true/false request parameter
+#####
+##### @param value - the parameter text
+#####
+###########################################################################
+def _to_bool(value):
+    return str(value).strip().lower() in ['true', '1', 'yes']
+
+
+###########################################################################
+#####
+##### method to read a comma separated request parameter
+#####
+##### @param value - the parameter text
+#####
+###########################################################################
+def _to_list(value):
+    return [item for item in value.split(',') if item != '']
+
+
+# the only request parameters each endpoint takes and how to read them.
+# parameters that name files to write or caches to use [ex.
+# incremental_state_path, panel_path, use_cache] are left out, so a request
+# can only choose what is drawn
+PARAMETER_TYPES = {
+    'stock': {'stock_one': str,
+              'file_path_one': str,
+              'desired_variable': str,
+              'time_period': str,
+              'stock_two': str,
+              'file_path_two': str,
+              'days_per_average': lambda value: [int(days) for days in _to_list(value)],
+              'average_type': str,
+              'other_stocks': _to_list,
+              'other_file_paths': _to_list,
+              'join': str,
+              'fill_policy': str,
+              'stream': _to_bool,
+              'bar': str,
+              'chunk_size': int,
+              'downsample': str,
+              'plot_width': int,
+              'analytics': _to_bool,
+              'benchmark': str,
+              'beta_window': int},
+    'census': {'data_folder_path': str,
+               'is_wealth': _to_bool,
+               'table_number': int,
+               'category': str,
+               'sub_category': str,
+               'group': str,
+               'sub_group': str,
+               'workers': int}}
+
+# request parameters holding paths, which must be inside the data root
+PATH_PARAMETERS = {'stock': ['file_path_one', 'file_path_two', 'other_file_paths'],
+                   'census': ['data_folder_path']}
+
+# image formats and their content types
+CONTENT_TYPES = {'png': 'image/png', 'jpeg': 'image/jpeg', 'jpg': 'image/jpeg'}
+
+
+# class to keep the interpreter, parsed data and rendered images warm
+# between chart requests
+#
+# every path a request names is resolved against the data root set at
+# startup, and anything outside it is rejected, so a request can only read
+# [and cache parsed sheets next to] the data the service was started for
+class Render_Service:
+
+    # initialize parameters
+    def __init__(self, data_root, data_megabytes = 512, image_megabytes = 128):
+        self._data_root = os.path.realpath(data_root)
+        self._frame_cache = LRU_Cache(data_megabytes * 1024 * 1024)
+        self._image_cache = LRU_Cache(image_megabytes * 1024 * 1024)
+
+        # census schema and panel of each data folder, read once per version of their file
+        self._census_indexes = {}
+
+        # charts share the data cache and pandas plotting, so one is drawn at a time
+        self._render_lock = Lock()
+
+
+    ###########################################################################
+    #####
+    ##### method to get the image of a chart request
+    #####
+    ##### images are cached by every request parameter plus the modification
+    ##### times of the input files, so changed inputs are drawn again
+    #####
+    ##### @param kind - 'stock' or 'census'
+    ##### @param parameters - dictionary of request parameters
+    #####
+    ##### @return [image bytes, content type, True if served from cache]
+    #####
+    ###########################################################################
+    def render(self, kind, parameters):
+        parameters = dict(parameters)
+        imageFormat = parameters.pop('format', 'png').lower()
+        chart = parameters.pop('chart', 'price')
+
+        if imageFormat not in CONTENT_TYPES:
+            raise ValueError('unknown format {0}, expected one of {1}'.format(imageFormat, list(CONTENT_TYPES.keys())))
+        if kind == 'stock' and chart not in CHARTS + ANALYTICS_CHARTS:
+            raise ValueError('unknown chart {0}, expected one of {1}'.format(chart, CHARTS + ANALYTICS_CHARTS))
+
+        chartParameters = self._read_parameters(kind, parameters)
+        key = (kind, chart, imageFormat, tuple(sorted(parameters.items())),
+               self._input_versions(kind, chartParameters))
+
+        image = self._image_cache.get(key)
+        if image != None:
+            return [image, CONTENT_TYPES[imageFormat], True]
+
+        with self._render_lock:
+            if kind == 'stock':
+                visualization = Visualize_Stocks(frame_cache = self._frame_cache, **chartParameters)
+                image = visualization.render(chart, imageFormat)
+            else:
+                folder = chartParameters['data_folder_path']
+                visualization = Visualize_Census(frame_cache = self._frame_cache,
+                                                 schema = self._census_index(Census_Schema, folder),
+                                                 panel = self._census_index(Census_Panel, folder),
+                                                 **chartParameters)
+                image = visualization.render(imageFormat)
+
+        self._image_cache.put(key, image)
+
+        return [image, CONTENT_TYPES[imageFormat], False]
+
+
+    ###########################################################################
+    #####
+    ##### method to get the sizes and hit counts of both caches
+    #####
+    ###########################################################################
+    def cache_stats(self):
+        stats = {}
+
+        for name, cache in [['data', self._frame_cache], ['images', self._image_cache]]:
+            stats[name] = {'entries': len(cache), 'bytes': cache.size(),
+                           'hits': cache.hits, 'misses': cache.misses}
+
+        return stats
+
+
+    ###########################################################################
+    #####
+    ##### method to turn request parameters into chart class parameters
+    #####
+    ##### @param kind - 'stock' or 'census'
+    ##### @param parameters - dictionary of request parameters
+    #####
+    ###########################################################################
+    def _read_parameters(self, kind, parameters):
+        if kind not in PARAMETER_TYPES:
+            raise ValueError('unknown chart kind {0}'.format(kind))
+
+        types = PARAMETER_TYPES[kind]
+        unknown = sorted(name for name in parameters if name not in types)
+        if len(unknown) > 0:
+            raise ValueError('unknown {0} parameters {1}, expected any of {2}'.format(kind, unknown, list(types.keys())))
+
+        chartParameters = {}
+        for name, value in parameters.items():
+            chartParameters[name] = types[name](value)
+
+        for name in PATH_PARAMETERS[kind]:
+            if isinstance(chartParameters.get(name), list):
+                chartParameters[name] = [self._resolve(path) for path in chartParameters[name]]
+            elif chartParameters.get(name) != None:
+                chartParameters[name] = self._resolve(chartParameters[name])
+
+        # census charts default to the wealth tables like the command line,
+        # and to a grid of every sub_category or sub_group not given
+        if kind == 'census':
+            chartParameters.setdefault('is_wealth', True)
+            chartParameters.setdefault('sub_category', None)
+            chartParameters.setdefault('sub_group', None)
+
+            # the census classes add 'wealth/' and 'debt/' to the folder path
+            folder = chartParameters.get('data_folder_path')
+            if folder != None:
+                if not os.path.isdir(folder):
+                    raise FileNotFoundError('data folder {0} does not exist'.format(parameters['data_folder_path']))
+                chartParameters['data_folder_path'] = os.path.join(folder, '')
+
+        return chartParameters
+
+
+    ###########################################################################
+    #####
+    ##### method to resolve a request path against the data root
+    #####
+    ##### relative paths are taken from the root; links and '..' are
+    ##### resolved first, so neither can lead out of it
+    #####
+    ##### @param path - the path from the request
+    #####
+    ###########################################################################
+    def _resolve(self, path):
+        resolved = os.path.realpath(os.path.join(self._data_root, path))
+        if os.path.commonpath([resolved, self._data_root]) != self._data_root:
+            raise ValueError('path {0!r} is outside the data root'.format(path))
+
+        return resolved
+
+
+    ###########################################################################
+    #####
+    ##### method to get the schema index or panel of a census data folder,
+    ##### kept until its file changes
+    #####
+    ##### @param index_class - Census_Schema or Census_Panel
+    ##### @param data_folder_path - the resolved census data folder
+    #####
+    ###########################################################################
+    def _census_index(self, index_class, data_folder_path):
+        path = index_class.default_path(data_folder_path)
+        version = os.stat(path).st_mtime_ns if os.path.exists(path) else None
+
+        kept = self._census_indexes.get(path)
+        if kept == None or kept[0] != version:
+            kept = [version, index_class(path)]
+            self._census_indexes[path] = kept
+
+        return kept[1]
+
+
+    ###########################################################################
+    #####
+    ##### method to get the modification times of the files a chart reads
+    #####
+    ##### @param kind - 'stock' or 'census'
+    ##### @param parameters - the chart class parameters
+    #####
+    ###########################################################################
+    def _input_versions(self, kind, parameters):
+        if kind == 'stock':
+            paths = [parameters.get('file_path_one'), parameters.get('file_path_two')]
+            paths += parameters.get('other_file_paths') or []
+        else:
+            folder = 'wealth/' if parameters.get('is_wealth', True) == True else 'debt/'
+            paths = [parameters.get('data_folder_path', '') + folder + str(year) + '.xlsx'
+                     for year in range(2013, 2021)]
+
+        versions = []
+        for path in paths:
+            if path != None and os.path.exists(path):
+                versions.append(os.stat(path).st_mtime_ns)
+
+        return tuple(versions)
+
+
+
+# class to answer chart requests over http
+#
+#   GET /stock?stock_one=AAPL&file_path_one=...&desired_variable=Close&time_period=1Y&chart=price&format=png
+#   GET /census?data_folder_path=...&table_number=2&category=...&sub_category=...&group=...&sub_group=...
+#   GET /stats
+class Render_Handler(BaseHTTPRequestHandler):
+
+    service = None
+
+    # answer a GET request
+    def do_GET(self):
+        url = urlparse(self.path)
+        kind = url.path.strip('/')
+        parameters = dict(parse_qsl(url.query))
+
+        if kind == 'stats':
+            self._send(200, json.dumps(self.service.cache_stats()).encode(), 'application/json')
+            return
+
+        if kind not in ['stock', 'census']:
+            self._send(404, b'unknown endpoint, use /stock, /census or /stats', 'text/plain')
+            return
+
+        start = time.perf_counter()
+        try:
+            image, contentType, cached = self.service.render(kind, parameters)
+        except (TypeError, ValueError, KeyError, FileNotFoundError, Census_Load_Error) as error:
+            self._send(400, '{0}: {1}'.format(type(error).__name__, error).encode(), 'text/plain')
+            return
+
+        headers = {'X-Cache': 'hit' if cached else 'miss',
+                   'X-Render-Seconds': '{0:.4f}'.format(time.perf_counter() - start)}
+        self._send(200, image, contentType, headers)
+
+
+    ###########################################################################
+    #####
+    ##### method to send a response
+    #####
+    ##### @param status - the http status code
+    ##### @param body - the response bytes
+    ##### @param content_type - the content type of the body
+    ##### @param headers - any extra headers
+    #####
+    ###########################################################################
+    def _send(self, status, body, content_type, headers = {}):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+
+if __name__ == '__main__':
+    descrip = 'serve stock and census charts from a warm process'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-r',
+                           '--data_root',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='the folder every requested path must be inside, relative paths start from it')
+    arguments.add_argument('--host',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default='127.0.0.1',
+                           help='the address to listen on [default = 127.0.0.1]')
+    arguments.add_argument('--port',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=8395,
+                           help='the port to listen on [default = 8395]')
+    arguments.add_argument('--data_megabytes',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=512,
+                           help='the size of the parsed data cache [default = 512]')
+    arguments.add_argument('--image_megabytes',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=128,
+                           help='the size of the rendered image cache [default = 128]')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    if not os.path.isdir(variables['data_root']):
+        arguments.error('data root {0} does not exist'.format(variables['data_root']))
+
+    Render_Handler.service = Render_Service(variables['data_root'], variables['data_megabytes'], variables['image_megabytes'])
+    server = ThreadingHTTPServer((variables['host'], variables['port']), Render_Handler)
+    print('serving charts on http://{0}:{1}'.format(variables['host'], variables['port']))
+    server.serve_forever()
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/render_service.py -r /Users/mtjen/Desktop/395 --port 8395
+# curl 'http://127.0.0.1:8395/stock?stock_one=AAPL&file_path_one=AAPL.csv&desired_variable=Close&time_period=1Y' > AAPL.png
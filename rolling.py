@@ -0,0 +1,159 @@
+# imports
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+# supported moving average types
+AVERAGE_TYPES = ['simple', 'exponential', 'weighted']
+
+
+###########################################################################
+#####
+##### method to turn values into a 2d float matrix [rows x series]
+#####
+##### @param values - a list, array, series or dataframe of values
+#####
+###########################################################################
+def _as_matrix(values):
+    matrix = np.asarray(values, dtype = float)
+    isVector = matrix.ndim == 1
+    if isVector:
+        matrix = matrix.reshape(-1, 1)
+
+    return matrix, isVector
+
+
+###########################################################################
+#####
+##### method to check that a window size is usable
+#####
+##### @param window - the amount of days in the moving average
+#####
+###########################################################################
+def _check_window(window):
+    if int(window) != window or window < 1:
+        raise ValueError('moving average window must be a positive integer, got {0}'.format(window))
+
+    return int(window)
+
+
+###########################################################################
+#####
+##### method to compute simple moving averages in one cumulative-sum pass
+#####
+##### the value for row i is the mean of the window rows [i - window, i),
+##### so the first window rows are NaN, same as the original chart loop.
+##### a window holding a NaN value is NaN.
+#####
+##### @param values - the values [rows x series, or one series]
+##### @param window - the amount of days in the moving average
+#####
+###########################################################################
+def simple_moving_average(values, window):
+    window = _check_window(window)
+    matrix, isVector = _as_matrix(values)
+    rows = matrix.shape[0]
+    averages = np.full(matrix.shape, np.nan)
+
+    if rows > window:
+        valid = ~np.isnan(matrix)
+        sums = np.zeros((rows + 1, matrix.shape[1]))
+        counts = np.zeros((rows + 1, matrix.shape[1]), dtype = np.int64)
+        np.cumsum(np.where(valid, matrix, 0.0), axis = 0, out = sums[1:])
+        np.cumsum(valid, axis = 0, out = counts[1:])
+
+        windowSums = sums[window:rows] - sums[:rows - window]
+        windowCounts = counts[window:rows] - counts[:rows - window]
+        averages[window:] = np.where(windowCounts == window, windowSums / window, np.nan)
+
+    if isVector:
+        return averages[:, 0]
+    return averages
+
+
+###########################################################################
+#####
+##### method to compute exponential moving averages
+#####
+##### uses a smoothing factor of 2 / (window + 1) and is lined up the same
+##### way as the simple average, so the first window rows are NaN
+#####
+##### @param values - the values [rows x series, or one series]
+##### @param window - the amount of days in the moving average
+#####
+###########################################################################
+def exponential_moving_average(values, window):
+    window = _check_window(window)
+    matrix, isVector = _as_matrix(values)
+    averages = np.full(matrix.shape, np.nan)
+
+    if matrix.shape[0] > window:
+        smoothed = pd.DataFrame(matrix).ewm(span = window, adjust = False).mean().to_numpy()
+        averages[window:] = smoothed[window - 1:-1]
+
+    if isVector:
+        return averages[:, 0]
+    return averages
+
+
+###########################################################################
+#####
+##### method to compute linearly weighted moving averages
+#####
+##### the most recent day gets weight window, the oldest gets weight 1.
+##### computed with a strided window view so no rows are copied.
+#####
+##### @param values - the values [rows x series, or one series]
+##### @param window - the amount of days in the moving average
+#####
+###########################################################################
+def weighted_moving_average(values, window):
+    window = _check_window(window)
+    matrix, isVector = _as_matrix(values)
+    averages = np.full(matrix.shape, np.nan)
+
+    if matrix.shape[0] > window:
+        weights = np.arange(1, window + 1, dtype = float)
+        weights /= weights.sum()
+        windows = np.lib.stride_tricks.sliding_window_view(matrix[:-1], window, axis = 0)
+        averages[window:] = np.einsum('rsw,w->rs', windows, weights)
+
+    if isVector:
+        return averages[:, 0]
+    return averages
+
+
+###########################################################################
+#####
+##### method to compute moving averages for several windows at once
+#####
+##### @param values - the values [rows x series, or one series]
+##### @param windows - a window size or list of window sizes
+##### @param average_type - 'simple', 'exponential' or 'weighted'
+#####
+##### @return dictionary of window size to averages
+#####
+###########################################################################
+def moving_averages(values, windows, average_type = 'simple'):
+    methods = {'simple': simple_moving_average,
+               'exponential': exponential_moving_average,
+               'weighted': weighted_moving_average}
+    if average_type not in methods:
+        raise ValueError('unknown moving average type {0}, expected one of {1}'.format(
+            average_type, AVERAGE_TYPES))
+
+    if np.isscalar(windows):
+        windows = [windows]
+
+    matrix, isVector = _as_matrix(values)
+    if isVector:
+        matrix = matrix[:, 0]
+
+    averages = {}
+    for window in windows:
+        averages[window] = methods[average_type](matrix, window)
+
+    return averages
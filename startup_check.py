@@ -0,0 +1,114 @@
+# imports
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+# command line entry points to check
+ENTRY_POINTS = ['visualize.py', 'census.py', 'census_batch.py']
+
+# modules that must not load before a chart is drawn
+HEAVY_MODULES = ['numpy', 'pandas', 'matplotlib']
+
+
+# class to check the command lines start within an import-time budget
+class Startup_Check:
+
+    # initialize parameters
+    def __init__(self, budget_seconds = 0.5, repeats = 5):
+        self._budget_seconds = budget_seconds
+        self._repeats = repeats
+        self._folder = os.path.dirname(os.path.abspath(__file__))
+
+
+    # main method
+    def main(self):
+        results = {'budget_seconds': self._budget_seconds, 'entry_points': {}, 'failures': []}
+
+        for entryPoint in ENTRY_POINTS:
+            module = entryPoint.rsplit('.', 1)[0]
+            loaded = self._heavy_modules_loaded(module)
+            seconds = self._help_seconds(entryPoint)
+            results['entry_points'][entryPoint] = {'help_seconds': seconds, 'heavy_modules_on_import': loaded}
+
+            if len(loaded) > 0:
+                results['failures'].append('{0} imports {1} at module level'.format(entryPoint, loaded))
+            if seconds > self._budget_seconds:
+                results['failures'].append('{0} --help took {1:.3f}s, over the {2:.3f}s budget'.format(
+                    entryPoint, seconds, self._budget_seconds))
+
+        return results
+
+
+    ###########################################################################
+    #####
+    ##### method to find the heavy modules an import loads
+    #####
+    ##### @param module - the module to import
+    #####
+    ###########################################################################
+    def _heavy_modules_loaded(self, module):
+        code = 'import sys, json, {0}; print(json.dumps([name for name in {1} if name in sys.modules]))'.format(
+            module, HEAVY_MODULES)
+        output = subprocess.run([sys.executable, '-c', code], cwd = self._folder,
+                                capture_output = True, text = True, check = True)
+
+        return json.loads(output.stdout)
+
+
+    ###########################################################################
+    #####
+    ##### method to time '--help' of an entry point, best of the repeats
+    #####
+    ##### @param entry_point - the script to run
+    #####
+    ###########################################################################
+    def _help_seconds(self, entry_point):
+        best = None
+
+        for repeat in range(self._repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, entry_point, '--help'], cwd = self._folder,
+                           capture_output = True, check = True)
+            seconds = time.perf_counter() - start
+            if best == None or seconds < best:
+                best = seconds
+
+        return round(best, 4)
+
+
+
+if __name__ == '__main__':
+    descrip = 'check the command lines start within an import-time budget'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-b',
+                           '--budget_seconds',
+                           action='store',
+                           type=float,
+                           required=False,
+                           default=0.5,
+                           help='the most time --help may take [default = 0.5]')
+    arguments.add_argument('-n',
+                           '--repeats',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=5,
+                           help='the amount of timed runs, the best is kept [default = 5]')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    results = Startup_Check(variables['budget_seconds'], variables['repeats']).main()
+    print(json.dumps(results, indent = 2))
+
+    if len(results['failures']) > 0:
+        sys.exit(1)
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/startup_check.py -b 0.3
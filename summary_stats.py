@@ -0,0 +1,113 @@
+# imports
+import argparse
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+
+# statistics returned for every column
+STATISTICS = ['begin', 'close', 'mean', 'min', 'max', 'begin_date', 'close_date', 'min_date',
+              'max_date', 'begin_index', 'close_index', 'min_index', 'max_index', 'count']
+
+
+###########################################################################
+#####
+##### method to get summary statistics of one or many columns at once
+#####
+##### every statistic is a vectorized reduction over the whole matrix, so
+##### there is no per-row or per-column python loop. NaN values are
+##### skipped; begin/close are the first/last non-NaN values and ties for
+##### min/max keep the earliest row. a column with no values gets NaN
+##### statistics and indices of -1.
+#####
+##### @param data - a dataframe, series or array [rows x columns]
+##### @param columns - the columns of a dataframe to use [default = all but Date]
+##### @param dates - the dates of the rows [default = the Date column, if any]
+#####
+##### @return dataframe with one row per column and one column per statistic
+#####
+###########################################################################
+def summary_statistics(data, columns = None, dates = None):
+    if isinstance(data, pd.DataFrame):
+        if dates is None and 'Date' in data.columns:
+            dates = data['Date']
+        if columns == None:
+            columns = [column for column in data.columns if column != 'Date']
+        matrix = data[columns].to_numpy(dtype = float)
+    elif isinstance(data, pd.Series):
+        columns = [data.name]
+        matrix = data.to_numpy(dtype = float).reshape(-1, 1)
+    else:
+        matrix = np.asarray(data, dtype = float)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(-1, 1)
+        if columns == None:
+            columns = list(range(matrix.shape[1]))
+
+    # an empty input is summarized like a column with no values
+    if matrix.shape[0] == 0:
+        matrix = np.full((1, len(columns)), np.nan)
+        dates = None
+
+    rows = matrix.shape[0]
+    valid = ~np.isnan(matrix)
+    counts = valid.sum(axis = 0)
+    hasValues = counts > 0
+    rowNumbers = np.arange(rows).reshape(-1, 1)
+
+    # positions of the first, last, min and max values of every column
+    indices = {'begin': np.where(valid, rowNumbers, rows).min(axis = 0),
+               'close': np.where(valid, rowNumbers, -1).max(axis = 0),
+               'min': np.where(valid, matrix, np.inf).argmin(axis = 0),
+               'max': np.where(valid, matrix, -np.inf).argmax(axis = 0)}
+
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        means = np.where(valid, matrix, 0.0).sum(axis = 0) / counts
+
+    stats = pd.DataFrame({'mean': np.where(hasValues, means, np.nan), 'count': counts}, index = columns)
+    columnNumbers = np.arange(matrix.shape[1])
+    dateValues = None if dates is None else pd.Index(dates)
+
+    # take the value and date at every position at once
+    for name, positions in indices.items():
+        positions = np.where(hasValues, positions, -1)
+        stats[name] = np.where(hasValues, matrix[positions.clip(0), columnNumbers], np.nan)
+        stats[name + '_index'] = positions
+        if dateValues is None:
+            stats[name + '_date'] = None
+        else:
+            stats[name + '_date'] = np.where(hasValues, dateValues[positions.clip(0)].astype(object), None)
+
+    return stats[STATISTICS]
+
+
+
+if __name__ == '__main__':
+    descrip = 'print summary statistics of stock data without plotting'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-p',
+                           '--path',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='the file path of the stock data')
+    arguments.add_argument('-v',
+                           '--desired_variables',
+                           type=str,
+                           nargs='+',
+                           required=False,
+                           default=None,
+                           help='the variables to summarize [default = all but Date]')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    data = pd.read_csv(variables['path'])
+    print(summary_statistics(data, variables['desired_variables']).to_string())
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/summary_stats.py -p '/Users/mtjen/Desktop/395/AAPL.csv' -v 'Close' 'Open'
@@ -0,0 +1,222 @@
+# imports
+import argparse
+import os
+from lazy_import import lazy_import
+
+# heavy modules load on first use
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+openpyxl = lazy_import('openpyxl')
+
+
+# price columns written to every stock file, same as a yahoo finance download
+PRICE_COLUMNS = ['Date', 'Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+# census categories and sub categories written to every table
+CENSUS_CATEGORIES = {'Percent Owning Assets': ['Total', 'Interest Earning Assets', 'Stocks and Mutual Funds'],
+                     'Median Value of Holdings': ['Total', 'Interest Earning Assets', 'Stocks and Mutual Funds'],
+                     'Unsecured Debt': ['Total', 'Credit Card Debt', 'Student Loans']}
+
+# census groups and their sub groups, 'Total' is a group of its own
+CENSUS_GROUPS = {'Age of Householder': ['Less than 35 years', '35 to 44 years', '45 to 54 years',
+                                        '55 to 64 years', '65 years and over'],
+                 'Race and Hispanic Origin of Householder': ['White alone', 'Black alone', 'Asian alone',
+                                                             'Hispanic origin (any race)'],
+                 'Household Income Quintile': ['Lowest quintile', 'Second quintile', 'Third quintile',
+                                               'Fourth quintile', 'Highest quintile']}
+
+
+###########################################################################
+#####
+##### method to create a synthetic stock price dataframe
+#####
+##### prices follow a geometric random walk, so they stay positive and
+##### look like real daily closes
+#####
+##### @param rows - the amount of price rows
+##### @param start - the first date
+##### @param frequency - the pandas date frequency [ex. 'B' daily, 'min' minute]
+##### @param seed - the random seed
+#####
+###########################################################################
+def price_frame(rows, start = '2015-01-02', frequency = 'B', seed = 0):
+    random = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods = rows, freq = frequency)
+    close = 100 * np.exp(np.cumsum(random.normal(0, 0.01, rows)))
+    spread = np.abs(random.normal(0, 0.005, rows))
+
+    dateFormat = '%Y-%m-%d' if frequency in ['B', 'D'] else '%Y-%m-%d %H:%M:%S'
+    data = pd.DataFrame({'Date': dates.strftime(dateFormat),
+                         'Open': close * (1 + random.normal(0, 0.003, rows)),
+                         'High': close * (1 + spread),
+                         'Low': close * (1 - spread),
+                         'Close': close,
+                         'Adj Close': close,
+                         'Volume': random.integers(100000, 10000000, rows)})
+
+    return data[PRICE_COLUMNS]
+
+
+###########################################################################
+#####
+##### method to write synthetic stock price csv files
+#####
+##### @param folder_path - the folder to write into
+##### @param rows - the amount of price rows per file
+##### @param tickers - the amount of stock files
+##### @param frequency - the pandas date frequency [ex. 'B' daily, 'min' minute]
+##### @param seed - the random seed of the first file
+#####
+##### @return dictionary of stock symbol to file path
+#####
+###########################################################################
+def write_price_csvs(folder_path, rows, tickers = 1, frequency = 'B', seed = 0):
+    os.makedirs(folder_path, exist_ok = True)
+    paths = {}
+
+    for ticker in range(tickers):
+        stock = 'T{0:03d}'.format(ticker)
+        path = os.path.join(folder_path, stock + '.csv')
+        price_frame(rows, frequency = frequency, seed = seed + ticker).to_csv(path, index = False)
+        paths[stock] = path
+
+    return paths
+
+
+###########################################################################
+#####
+##### method to write one census table into a workbook sheet
+#####
+##### the layout matches the published tables read with header = [2, 3]:
+##### two title rows, a category row, a sub category row, then one row per
+##### sub group with an empty header row above every group
+#####
+##### @param workbook - the openpyxl workbook
+##### @param title - the table title
+##### @param random - the numpy random generator
+#####
+###########################################################################
+def _write_census_sheet(workbook, title, random):
+    sheet = workbook.create_sheet(title[:31])
+    sheet.append([title])
+    sheet.append(['Synthetic table, values are random'])
+
+    categoryRow = ['Characteristic']
+    subCategoryRow = [None]
+    merges = []
+    for category, subCategories in CENSUS_CATEGORIES.items():
+        merges.append([len(categoryRow) + 1, len(categoryRow) + len(subCategories)])
+        categoryRow += [category] + [None] * (len(subCategories) - 1)
+        subCategoryRow += subCategories
+    sheet.append(categoryRow)
+    sheet.append(subCategoryRow)
+
+    # categories span their sub categories, merged once the rows are written
+    for firstColumn, lastColumn in merges:
+        sheet.merge_cells(start_row = 3, start_column = firstColumn, end_row = 3, end_column = lastColumn)
+
+    values = len(subCategoryRow) - 1
+    sheet.append(['Total'] + [int(value) for value in random.integers(0, 100000, values)])
+    for group, subGroups in CENSUS_GROUPS.items():
+        sheet.append([group] + [None] * values)
+        for subGroup in subGroups:
+            sheet.append([subGroup] + [int(value) for value in random.integers(0, 100000, values)])
+
+
+###########################################################################
+#####
+##### method to write synthetic census workbooks
+#####
+##### writes data_folder_path/wealth/<year>.xlsx and debt/<year>.xlsx, the
+##### layout Visualize_Census expects
+#####
+##### @param folder_path - the census data folder to write into
+##### @param years - the data years
+##### @param tables - the amount of tables [sheets] per workbook
+##### @param seed - the random seed
+#####
+##### @return list of written workbook paths
+#####
+###########################################################################
+def write_census_workbooks(folder_path, years = range(2013, 2021), tables = 4, seed = 0):
+    random = np.random.default_rng(seed)
+    paths = []
+
+    for kind in ['wealth', 'debt']:
+        os.makedirs(os.path.join(folder_path, kind), exist_ok = True)
+        for year in years:
+            workbook = openpyxl.Workbook()
+            workbook.remove(workbook.active)
+            for table in range(tables):
+                _write_census_sheet(workbook, 'Table {0}. {1} {2}'.format(table, kind.title(), year), random)
+
+            path = os.path.join(folder_path, kind, '{0}.xlsx'.format(year))
+            workbook.save(path)
+            paths.append(path)
+
+    return paths
+
+
+
+if __name__ == '__main__':
+    descrip = 'write synthetic stock price csv files and census workbooks'
+    arguments = argparse.ArgumentParser(description = descrip)
+
+    arguments.add_argument('-o',
+                           '--output_path',
+                           action='store',
+                           type=str,
+                           required=True,
+                           help='folder to write into, stocks go in prices/ and census tables in census/')
+    arguments.add_argument('-n',
+                           '--rows',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=2520,
+                           help='the amount of price rows per stock [default = 2520]')
+    arguments.add_argument('-k',
+                           '--tickers',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=1,
+                           help='the amount of stock files [default = 1]')
+    arguments.add_argument('-f',
+                           '--frequency',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default='B',
+                           help='the pandas date frequency of the prices [default = B]')
+    arguments.add_argument('-t',
+                           '--tables',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=4,
+                           help='the amount of tables per census workbook, 0 for no census data [default = 4]')
+    arguments.add_argument('-s',
+                           '--seed',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=0,
+                           help='the random seed [default = 0]')
+
+    parsed = arguments.parse_args()
+    variables = vars(parsed)
+
+    outputPath = variables['output_path']
+    prices = write_price_csvs(os.path.join(outputPath, 'prices'), variables['rows'], variables['tickers'],
+                              variables['frequency'], variables['seed'])
+    print('wrote {0} stock files'.format(len(prices)))
+
+    if variables['tables'] > 0:
+        workbooks = write_census_workbooks(os.path.join(outputPath, 'census'), tables = variables['tables'],
+                                           seed = variables['seed'])
+        print('wrote {0} census workbooks'.format(len(workbooks)))
+
+
+# example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/synthetic_data.py -o /Users/mtjen/Desktop/395/synthetic -n 2520 -k 5
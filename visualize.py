@@ -1,9 +1,38 @@
 # imports
 import argparse
-import numpy as np
-import pandas as pd
+import os
+from analytics import log_returns, correlation_matrix, rolling_correlation_beta, summary
+from date_range import csv_last_date, parse_period, period_bounds, read_csv_range, row_bounds
 from datetime import datetime
-from matplotlib import pyplot as plot
+from downsample import DOWNSAMPLE_METHODS, downsample_indices
+from figures import figure_bytes, new_figure, release_figure
+from incremental import INCREMENTAL_AVERAGE_TYPES, Incremental_Indicators
+from lazy_import import lazy_import
+from price_store import Price_Store, STORE_EXTENSION, date_text, find_store
+from price_stream import Price_Stream
+from profiling import Stage_Profiler
+from render_cache import Render_Cache, parameter_digest, save_figure
+from rolling import AVERAGE_TYPES, moving_averages
+from summary_stats import summary_statistics
+
+# heavy modules load on first use, after the command line is checked
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+matplotlib = lazy_import('matplotlib')
+
+
+# ways to join tickers on date and to fill the gaps an outer join leaves
+JOIN_TYPES = ['inner', 'outer']
+FILL_POLICIES = ['none', 'ffill', 'bfill', 'drop']
+
+# charts drawn for every run
+CHARTS = ['price', 'moving']
+
+# charts drawn across many stocks when analytics are on
+ANALYTICS_CHARTS = ['correlation', 'beta']
+
+# most stocks that get their own legend entries
+LEGEND_LIMIT = 10
 
 
 # class to visualize stock price via graphs
@@ -12,7 +41,11 @@ class Visualize_Stocks:
     # initialize parameters
     def __init__(self, stock_one, file_path_one, desired_variable, time_period,
                  stock_two = None, file_path_two = None, result_file_path = None, 
-                 days_per_average = 7):
+                 days_per_average = 7, average_type = 'simple', other_stocks = None,
+                 other_file_paths = None, join = 'inner', fill_policy = 'none', stream = False,
+                 bar = 'D', chunk_size = 500000, frame_cache = None, downsample = 'lttb',
+                 plot_width = 640, profiler = None, incremental_state_path = None, render_cache = None,
+                 analytics = False, benchmark = None, beta_window = 60):
         self._stock_one = stock_one
         self._file_path_one = file_path_one
         self._desired_variable = desired_variable
@@ -20,12 +53,44 @@ class Visualize_Stocks:
         self._stock_two = stock_two
         self._file_path_two = file_path_two
         self._result_file_path = result_file_path
-        self._isTwoStocks = False
         self._days_per_average = days_per_average
+        self._average_type = average_type
+        self._join = join
+        self._fill_policy = fill_policy
+        self._stream = stream
+        self._bar = bar
+        self._chunk_size = chunk_size
+        self._frame_cache = frame_cache
+        self._downsample = downsample
+        self._plot_width = plot_width
+        self._profiler = profiler if profiler != None else Stage_Profiler(enabled = False)
+        self._incremental_state_path = incremental_state_path
+        self._known_averages = {}
+        self._render_cache = render_cache
+        self._start = None
+        self._stop = None
+        self._first_row = 0
+        self._analytics = analytics
+        self._benchmark = benchmark if benchmark != None else stock_one
+        self._beta_window = beta_window
+        self._stocks = [stock_one]
+        self._file_paths = [file_path_one]
         
-        # see if there are two stocks given to plot
+        # allow a single window or a list of windows
+        if np.isscalar(days_per_average):
+            self._days_per_average = [days_per_average]
+
+        # collect every stock given to plot
         if (file_path_two != None) and (stock_two != None):
-            self._isTwoStocks = True
+            self._stocks.append(stock_two)
+            self._file_paths.append(file_path_two)
+        if (other_stocks != None) and (other_file_paths != None):
+            if len(other_stocks) != len(other_file_paths):
+                raise ValueError('got {0} other stocks but {1} other file paths'.format(
+                    len(other_stocks), len(other_file_paths)))
+            self._stocks += list(other_stocks)
+            self._file_paths += list(other_file_paths)
+        self._isManyStocks = len(self._stocks) > 1
             
     
     # main method
@@ -43,32 +108,264 @@ class Visualize_Stocks:
             second = curr.strftime("%S")
             dateString = year + month + day + '_' + hour + minute + second
             
-            folder = self._file_path_one.rsplit('/', 1)[0]
-            path = folder + '/visualization_' + dateString + '.jpg'
+            # runs in the same second only share a name when they draw the same charts
+            folder = os.path.dirname(self._file_path_one)
+            path = os.path.join(folder, 'visualization_' + dateString + '_' + parameter_digest(self._chart_parameters()) + '.jpg')
+            
+        pathWoExt, extension = os.path.splitext(path)
+        pricePlotPath = pathWoExt + '_price' + extension
+        movingPlotPath = pathWoExt + '_moving' + extension
+        outputs = [['price', pricePlotPath], ['moving', movingPlotPath]]
+        if self._analytics == True:
+            outputs += [[chart, pathWoExt + '_' + chart + extension] for chart in ANALYTICS_CHARTS]
+            outputs.append(['summary', pathWoExt + '_summary.csv'])
+        
+        data = None
+        for chart, chartPath in outputs:
+            # unchanged charts are linked from the render cache
+            key = None
+            if self._render_cache != None:
+                key = self._render_cache.key(self._chart_parameters(chart, os.path.splitext(chartPath)[1]), self._file_paths)
+                if self._render_cache.fetch(key, chartPath) == True:
+                    continue
             
-        splitPath = path.rsplit('.')
-        pathWoExt = splitPath[0]
-        pricePlotPath = pathWoExt + '_price.' + splitPath[1]
-        movingPlotPath = pathWoExt + '_moving.' + splitPath[1]
+            if data is None:
+                self._profiler.begin('load')
+                data, stats = self._load_data()
+            if chart == 'summary':
+                self._write_summary(data, self._stocks, chartPath)
+            else:
+                chartFigure = self._draw(chart, data, stats)
+                self._profiler.begin('save', chart = chart)
+                try:
+                    save_figure(chartFigure, chartPath, bbox_inches='tight')
+                finally:
+                    release_figure(chartFigure)
+            if key != None:
+                self._render_cache.put(key, chartPath)
+        self._profiler.end()
+        
+    
+    ###########################################################################
+    #####
+    ##### method to render one chart to image bytes instead of a file
+    ##### 
+    ##### @param chart - 'price', 'moving', 'correlation' or 'beta'
+    ##### @param image_format - the image format [ex. 'png', 'jpeg']
+    #####
+    ###########################################################################
+    def render(self, chart = 'price', image_format = 'png'):
+        chartFigure = self.figure(chart)
+        
+        self._profiler.begin('save', chart = chart)
+        image = figure_bytes(chartFigure, image_format, bbox_inches='tight')
+        self._profiler.end()
         
+        return image
+    
+    
+    ###########################################################################
+    #####
+    ##### method to draw one chart into a new figure, for notebooks and
+    ##### callers that save it themselves
+    ##### 
+    ##### the figure is not kept by pyplot, it is freed once it is dropped
+    #####
+    ##### @param chart - 'price', 'moving', 'correlation' or 'beta'
+    #####
+    ###########################################################################
+    def figure(self, chart = 'price'):
+        if chart not in CHARTS + ANALYTICS_CHARTS:
+            raise ValueError('unknown chart {0}, expected one of {1}'.format(chart, CHARTS + ANALYTICS_CHARTS))
+        
+        self._profiler.begin('load')
+        data, stats = self._load_data()
+        
+        return self._draw(chart, data, stats)
+    
+    
+    ###########################################################################
+    #####
+    ##### method to get every parameter that changes the charts
+    ##### 
+    ##### @param chart - the chart or 'summary' [default = every chart]
+    ##### @param image_format - the image format [default = any]
+    #####
+    ###########################################################################
+    def _chart_parameters(self, chart = None, image_format = None):
+        return {'chart': chart, 'format': image_format, 'stocks': self._stocks,
+                'desired_variable': self._desired_variable, 'time_period': self._time_period,
+                'days_per_average': list(self._days_per_average), 'average_type': self._average_type,
+                'join': self._join, 'fill_policy': self._fill_policy, 'stream': self._stream,
+                'bar': self._bar, 'downsample': self._downsample, 'plot_width': self._plot_width,
+                'incremental': self._incremental_state_path != None, 'analytics': self._analytics,
+                'benchmark': self._benchmark, 'beta_window': self._beta_window}
+    
+    
+    ###########################################################################
+    #####
+    ##### method to load the chart data of the time period
+    #####
+    ##### rows just before the period are loaded too, so moving averages and
+    ##### rolling betas are warmed up on its first date; charts drop them
+    ##### [see _in_period]
+    #####
+    ##### @return [data, stats] - stats are only known here when streaming or
+    #####                          in incremental mode
+    #####
+    ###########################################################################
+    def _load_data(self):
+        stats = None
+        self._start, self._stop = self._period_bounds()
         
         # if one stock input
-        if self._isTwoStocks == False:
-            data = pd.read_csv(self._file_path_one, usecols = ['Date', self._desired_variable])
-            pricePlot = self._graph_one_stock(data, self._stock_one, self._file_path_one, self._desired_variable, self._time_period)
-            pricePlot.savefig(pricePlotPath, bbox_inches='tight')
-            movingPlot = self._one_graph_moving_average(data, self._desired_variable, self._days_per_average)
-            movingPlot.savefig(movingPlotPath, bbox_inches='tight')
+        if self._isManyStocks == False:
+            if self._stream == True:
+                stream = Price_Stream(self._file_path_one, self._desired_variable, self._bar, self._chunk_size,
+                                      self._start, self._stop)
+                stats, bars = stream.read()
+                data = stream.chart_data(bars)
+            elif self._incremental_state_path != None:
+                indicators = Incremental_Indicators(self._incremental_state_path, self._file_path_one,
+                                                    self._desired_variable, self._days_per_average,
+                                                    self._average_type)
+                data, stats, averages = indicators.update()
+                
+                # the state covers the whole file, keep the rows of the period
+                rows = row_bounds(data['Date'].to_numpy(), self._start, self._stop, self._lead_rows())
+                if rows.stop - rows.start < len(data):
+                    data = data.iloc[rows].reset_index(drop = True)
+                    averages = {days: values[rows] for days, values in averages.items()}
+                    stats = None
+                self._known_averages = averages
+            else:
+                data = self._read_csv(self._file_path_one, ['Date', self._desired_variable])
         else:
-            data = pd.read_csv(self._file_path_one, usecols = ['Date', self._desired_variable])
-            data['stockTwoVals'] = pd.read_csv(self._file_path_two, usecols = [self._desired_variable])
-            pricePlot = self._graph_two_stocks(data,self._stock_one, self._file_path_one, 
-                                               self._desired_variable, self._time_period,
-                                               self._stock_two, self._file_path_two)
-            pricePlot.savefig(pricePlotPath, bbox_inches='tight')
-            movingPlot = self._two_graph_moving_average(data, self._desired_variable, self._days_per_average)
-            movingPlot.savefig(movingPlotPath, bbox_inches='tight')
+            data = self._load_stocks(self._stocks, self._file_paths, self._desired_variable)
+        
+        # streamed bars start in the period, there are no warm up rows
+        self._first_row = 0
+        if self._start is not None and self._stream == False:
+            dates = data['Date']
+            if dates.dtype.kind != 'M':
+                dates = pd.to_datetime(dates)
+            self._first_row = int(np.searchsorted(dates.to_numpy(dtype = 'datetime64[ns]'), self._start))
+        if len(data) <= self._first_row:
+            raise ValueError('no {0} data in time period {1}'.format(', '.join(self._stocks), self._time_period))
+        
+        return [data, stats]
+    
+    
+    ###########################################################################
+    #####
+    ##### method to get the dates of the time period
+    #####
+    ##### relative periods [ex. 6M, YTD] count back from the latest last date
+    ##### of the stocks, read from the end of each file
+    #####
+    ##### @return [start, stop] as datetime64[ns], None where unbounded
+    #####
+    ###########################################################################
+    def _period_bounds(self):
+        if parse_period(self._time_period)['kind'] not in ['relative', 'ytd']:
+            return period_bounds(self._time_period)
+        
+        lastDates = []
+        for path in self._file_paths:
+            storePath = find_store(path)
+            if storePath != None:
+                dates = Price_Store(storePath).column('Date')
+                lastDate = dates[-1] if len(dates) > 0 else None
+            else:
+                lastDate = csv_last_date(path)
+            if lastDate is not None:
+                lastDates.append(lastDate)
+        
+        return period_bounds(self._time_period, max(lastDates) if len(lastDates) > 0 else None)
+    
+    
+    ###########################################################################
+    #####
+    ##### method to get the amount of rows loaded before the period, enough
+    ##### for the longest moving average or beta window
+    #####
+    ##### averages of a row use the window rows before it [see rolling.py]
+    #####
+    ###########################################################################
+    def _lead_rows(self):
+        leadRows = max(self._days_per_average)
+        if self._analytics == True and self._isManyStocks == True:
+            leadRows = max(leadRows, self._beta_window)
+        
+        return leadRows
+    
+    
+    ###########################################################################
+    #####
+    ##### method to drop the warm up rows loaded before the period
+    ##### 
+    ##### @param data - the dataframe of data
+    #####
+    ###########################################################################
+    def _in_period(self, data):
+        if self._first_row == 0:
+            return data
+        
+        return data.iloc[self._first_row:].reset_index(drop = True)
+    
+    
+    ###########################################################################
+    #####
+    ##### method to get the chart title text of the time period
+    ##### 
+    ##### @param period - the time period
+    #####
+    ###########################################################################
+    def _period_label(self, period):
+        parts = parse_period(period)
+        
+        if parts['kind'] == 'whole':
+            return 'All Dates'
+        if parts['kind'] == 'ytd':
+            return 'Year to Date'
+        if parts['kind'] == 'relative':
+            return 'Last {0}{1}'.format(parts['amount'], parts['unit'])
+        if parts['start'] != None and parts['end'] != None:
+            return '{0} to {1}'.format(parts['start'], parts['end'])
+        if parts['start'] != None:
+            return 'Dates from {0}'.format(parts['start'])
+        if parts['end'] != None:
+            return 'Dates to {0}'.format(parts['end'])
+        return 'All Dates'
+    
+    
+    ###########################################################################
+    #####
+    ##### method to draw one chart
+    ##### 
+    ##### @param chart - 'price', 'moving', 'correlation' or 'beta'
+    ##### @param data - the dataframe of data
+    ##### @param stats - statistics from Price_Stream, or None
+    #####
+    ##### @return a new figure, owned by the caller
+    #####
+    ###########################################################################
+    def _draw(self, chart, data, stats):
+        if chart in ANALYTICS_CHARTS and self._isManyStocks == False:
+            raise ValueError('the {0} chart needs more than one stock'.format(chart))
+        if chart == 'correlation':
+            return self._graph_correlation(data, self._stocks)
+        if chart == 'beta':
+            return self._graph_rolling_beta(data, self._stocks)
+        
+        if self._isManyStocks == False:
+            if chart == 'price':
+                return self._graph_one_stock(data, self._stock_one, self._file_path_one, self._desired_variable, self._time_period, stats)
+            return self._one_graph_moving_average(data, self._desired_variable, self._days_per_average)
         
+        if chart == 'price':
+            return self._graph_many_stocks(data, self._stocks, self._desired_variable, self._time_period)
+        return self._many_graph_moving_average(data, self._stocks, self._desired_variable, self._days_per_average)
      
     
     ###########################################################################
@@ -80,68 +377,74 @@ class Visualize_Stocks:
     ##### @param path - the path to the stock price data
     ##### @param variable - the variable to look at in the data [ex. 'Close']
     ##### @param period - the time period of the data
+    ##### @param stats - statistics from Price_Stream, computed here if None
     #####
     ###########################################################################
-    def _graph_one_stock(self, data, stock, path, variable, period):
-        # read data
-        data = pd.read_csv(path, usecols = ['Date', variable])
-        
-        # get key variable values
+    def _graph_one_stock(self, data, stock, path, variable, period, stats = None):
+        self._profiler.begin('compute', chart = 'price')
+        data = self._in_period(data)
         yLabel = variable + ' Price'
-        beginPrice = data[variable][0]
-        closePrice = data[variable][len(data) - 1]
-        averagePrice = data[variable].mean()
-        minPriceY = min(data[variable])
-        maxPriceY = max(data[variable])
-        
-        # find min and max indices
-        for index in range(len(data)):
-            minIndexFound = False
-            maxIndexFound = False
-            if data[variable][index] == minPriceY:
-                minPriceX = index
-                minPriceDate = data['Date'][index]
-                minIndexFound = True
-            if data[variable][index] == maxPriceY:
-                maxPriceX = index
-                maxPriceDate = data['Date'][index]
-                maxIndexFound = True
-            if (minIndexFound == True) and (maxIndexFound == True):
-                break
+        
+        # get key variable values, unless already known from streaming
+        if stats is None:
+            stats = summary_statistics(data, [variable]).loc[variable]
+
+        beginPrice = stats['begin']
+        closePrice = stats['close']
+        averagePrice = stats['mean']
+        minPriceY = stats['min']
+        maxPriceY = stats['max']
+        minPriceX = stats['min_index']
+        maxPriceX = stats['max_index']
+        minPriceDate = stats['min_date']
+        maxPriceDate = stats['max_date']
+        
+        # price store dates are datetimes, label them like the csv text
+        if isinstance(minPriceDate, pd.Timestamp):
+            minPriceDate, maxPriceDate = date_text(pd.to_datetime([minPriceDate, maxPriceDate]))
+        
+        # thin the line out to what the image can show, keeping min and max
+        data, rows = self._plot_rows(data, [variable], [minPriceX, maxPriceX])
+        minPriceX = rows.searchsorted(minPriceX)
+        maxPriceX = rows.searchsorted(maxPriceX)
         
         # plot points    
+        self._profiler.begin('plot', chart = 'price')
+        figure = new_figure()
+        ax = figure.subplots()
         data.plot(kind = 'line', 
                       x = 'Date', 
                       y = variable, 
                       color = 'blue',
-                      title = '{0} Price for Last {1}'.format(stock, period),
+                      title = '{0} Price for {1}'.format(stock, self._period_label(period)),
                       xlabel = 'Date', 
                       ylabel = yLabel,
-                      legend = False)
+                      legend = False,
+                      ax = ax)
 
         # plot beginning price line
-        plot.axhline(y = beginPrice, 
+        ax.axhline(y = beginPrice, 
                      color = 'orange', 
                      linestyle = 'dotted',
                      label = 'Open Price: {0}'.format(round(beginPrice, 2)))
         
         # plot close price line
-        plot.axhline(y = closePrice, 
+        ax.axhline(y = closePrice, 
                      linestyle = 'none',
                      label = 'Close Price: {0}'.format(round(closePrice, 2)))
 
         # plot average price line
-        plot.axhline(y = averagePrice, 
+        ax.axhline(y = averagePrice, 
                      linestyle = 'none',
                      label = 'Average Price: {0}'.format(round(averagePrice, 2)))
 
         # plot points for max and min prricees
-        plot.plot(maxPriceX, maxPriceY, color = 'green', marker=".", markersize = 15, label = 'Max Price: {0} [{1}]'.format(round(maxPriceY, 2), maxPriceDate))
-        plot.plot(minPriceX, minPriceY, color = 'red', marker=".", markersize = 15, label = 'Min Price: {0} [{1}]'.format(round(minPriceY, 2), minPriceDate))
+        ax.plot(maxPriceX, maxPriceY, color = 'green', marker=".", markersize = 15, label = 'Max Price: {0} [{1}]'.format(round(maxPriceY, 2), maxPriceDate))
+        ax.plot(minPriceX, minPriceY, color = 'red', marker=".", markersize = 15, label = 'Min Price: {0} [{1}]'.format(round(minPriceY, 2), minPriceDate))
 
-        plot.legend(bbox_to_anchor = (1, 1))
+        ax.legend(bbox_to_anchor = (1, 1))
         
-        return plot
+        return figure
     
     
     ###########################################################################
@@ -150,151 +453,409 @@ class Visualize_Stocks:
     ##### 
     ##### @param data - the dataframe of data
     ##### @param variable - the variable to look at in the data [ex. 'Close']
-    ##### @param daysPerAverage - the amount of days in the moving average
+    ##### @param daysPerAverage - the amount of days in the moving average [or a list of them]
     #####
     ###########################################################################
     def _one_graph_moving_average(self, data, variable, daysPerAverage):    
-        count = 0
-        moving = []
-        averages = []
-
-        # create array of moving average values
-        for val in data[variable]:
-            if count != daysPerAverage:
-                moving.append(val)
-                averages.append(None)
-                count += 1
-            else:
-                avg = np.mean(moving)
-                averages.append(avg)
-                del moving[0]
-                moving.append(val)
+        self._profiler.begin('compute', chart = 'moving')
+        if np.isscalar(daysPerAverage):
+            daysPerAverage = [daysPerAverage]
+
+        # create moving average values for every window in one pass each,
+        # reusing the ones incremental mode already has
+        missing = [days for days in daysPerAverage if days not in self._known_averages]
+        averages = moving_averages(data[variable].to_numpy(), missing, self._average_type)
+        averages.update(self._known_averages)
 
-        # add column to dataframe
-        data['Moving Average for {0} Days'.format(daysPerAverage)] = averages    
+        # add columns to dataframe
+        columns = []
+        for days in daysPerAverage:
+            column = self._moving_average_label(days)
+            data[column] = averages[days]
+            columns.append(column)
 
+        data, rows = self._plot_rows(self._in_period(data), [variable] + columns)
+        
+        self._profiler.begin('plot', chart = 'moving')
+        figure = new_figure()
+        ax = figure.subplots()
         data.plot(x = 'Date', 
-                  y = [variable, 'Moving Average for {0} Days'.format(daysPerAverage)])
+                  y = [variable] + columns,
+                  ax = ax)
 
-        plot.title('{0} Price and {1} Day Moving Average'.format(variable, daysPerAverage))
-        plot.xlabel('Date')
-        plot.ylabel(variable + ' Price')
+        ax.set_title('{0} Price and {1} Day Moving Average'.format(variable, self._days_label(daysPerAverage)))
+        ax.set_xlabel('Date')
+        ax.set_ylabel(variable + ' Price')
 
-        return plot
+        return figure
+        
+        
+    ###########################################################################
+    #####
+    ##### method to load many stocks joined on date
+    ##### 
+    ##### @param stocks - the stock symbols
+    ##### @param paths - the paths to the stock price data
+    ##### @param variable - the variable to look at in the data [ex. 'Close']
+    #####
+    ##### @return dataframe with a Date column and one column per stock
+    #####
+    ###########################################################################
+    def _load_stocks(self, stocks, paths, variable):
+        if self._join not in JOIN_TYPES:
+            raise ValueError('unknown join {0}, expected one of {1}'.format(self._join, JOIN_TYPES))
+        if self._fill_policy not in FILL_POLICIES:
+            raise ValueError('unknown fill policy {0}, expected one of {1}'.format(self._fill_policy, FILL_POLICIES))
+        
+        # read each file, then line every stock up on date in one join
+        if self._stream == True:
+            frames = [self._stream_bars(path, variable) for path in paths]
+        else:
+            frames = [self._read_csv(path, ['Date', variable], 'Date')[variable] for path in paths]
+        
+        # price stores index by datetime, csv files by date text
+        if len(set(frame.index.dtype.kind for frame in frames)) > 1:
+            frames = [frame.set_axis(pd.to_datetime(frame.index)) for frame in frames]
+        data = pd.concat(frames, axis = 1, join = self._join, keys = stocks).sort_index()
+        
+        if self._fill_policy == 'ffill':
+            data = data.ffill()
+        elif self._fill_policy == 'bfill':
+            data = data.bfill()
+        elif self._fill_policy == 'drop':
+            data = data.dropna()
+        
+        data.index.name = 'Date'
+        
+        return data.reset_index()
+    
+    
+    ###########################################################################
+    #####
+    ##### method to read stock data of the time period, going through the
+    ##### frame cache if given
+    ##### 
+    ##### an up to date price store next to the csv [see price_store.py] is
+    ##### memory mapped instead of parsing the csv. both are date sorted, so
+    ##### the period is found by binary search and only its rows are read.
+    #####
+    ##### @param path - the path to the stock price data
+    ##### @param columns - the columns to read
+    ##### @param index - the column to index by [default = None]
+    #####
+    ###########################################################################
+    def _read_csv(self, path, columns, index = None):
+        storePath = find_store(path)
+        if storePath != None:
+            store = Price_Store(storePath)
+            rows = row_bounds(store.column('Date'), self._start, self._stop, self._lead_rows())
+            return store.frame(columns, index, rows)
+        
+        if self._frame_cache == None:
+            return self._read_period(path, columns, index)
+        
+        key = ('csv', os.path.abspath(path), os.stat(path).st_mtime_ns, tuple(columns), index,
+               self._start, self._stop, self._lead_rows())
+        data = self._frame_cache.get(key)
+        if data is None:
+            data = self._read_period(path, columns, index)
+            self._frame_cache.put(key, data)
         
+        # charts add columns, so hand out a copy
+        return data.copy()
+    
+    
+    ###########################################################################
+    #####
+    ##### method to read the rows of the time period from a csv
+    ##### 
+    ##### @param path - the path to the stock price data
+    ##### @param columns - the columns to read
+    ##### @param index - the column to index by [default = None]
+    #####
+    ###########################################################################
+    def _read_period(self, path, columns, index = None):
+        if self._start is None and self._stop is None:
+            return pd.read_csv(path, usecols = columns, index_col = index)
+        
+        return read_csv_range(path, columns, self._start, self._stop, self._lead_rows(), index)
+    
+    
+    ###########################################################################
+    #####
+    ##### method to stream one stock into bar close prices indexed by date
+    ##### 
+    ##### @param path - the path to the stock price data
+    ##### @param variable - the variable to look at in the data [ex. 'Close']
+    #####
+    ###########################################################################
+    def _stream_bars(self, path, variable):
+        stream = Price_Stream(path, variable, self._bar, self._chunk_size, self._start, self._stop)
+        stats, bars = stream.read()
         
+        return stream.chart_data(bars).set_index('Date')[variable]
+    
+    
     ################################################################################
     #####
-    ##### method to graph two stocks
+    ##### method to graph many stocks
     ##### 
-    ##### @param stockOne - the stock symbol of the first stock
-    ##### @param pathOne - the path to the stock price data of the first stock
+    ##### @param data - the dataframe of data, with one column per stock
+    ##### @param stocks - the stock symbols
     ##### @param variable - the variable to look at in the data [ex. 'Close']
     ##### @param period - the time period of the data
-    ##### @param stockTwo - the stock symbol of the second stock
-    ##### @param pathTwo - the path to the stock price data of the second stock
     #####
     ################################################################################
-    def _graph_two_stocks(self, data, stockOne, pathOne, variable, period, stockTwo, pathTwo):       
-        # get key variable values
-        closePriceOne = data[variable][len(data) - 1]
-        closePriceTwo = data['stockTwoVals'][len(data) - 1]
-        avgPriceOne = data[variable].mean()
-        avgPriceTwo = data['stockTwoVals'].mean()
+    def _graph_many_stocks(self, data, stocks, variable, period):
+        self._profiler.begin('compute', chart = 'price')
+        data = self._in_period(data)
+        # get key variable values for every stock at once
+        stats = summary_statistics(data, stocks)
+        closePrices = stats['close'].to_numpy()
+        avgPrices = stats['mean'].to_numpy()
+        data, rows = self._plot_rows(data, stocks, list(stats['min_index']) + list(stats['max_index']))
         
-
         # determine colors of stock lines
-        colors = ['red', 'green']
-        if closePriceOne > closePriceTwo:
-            colors = ['green', 'red']
-
+        self._profiler.begin('plot', chart = 'price')
+        if len(stocks) == 2:
+            colors = ['red', 'green']
+            if closePrices[0] > closePrices[1]:
+                colors = ['green', 'red']
+        else:
+            colorMap = matplotlib.colormaps['viridis']
+            colors = [colorMap(index / (len(stocks) - 1)) for index in range(len(stocks))]
+        
         # plot the data
+        figure = new_figure()
+        ax = figure.subplots()
         data.plot(x = 'Date', 
-                  y = [variable, 'stockTwoVals'],
-                  label = [stockOne, stockTwo],
-                  color = colors)
-
-        plot.title('{0} Price for Last {1}: {2} v. {3}'.format(variable, period, stockOne, stockTwo))
-        plot.xlabel('Date')
-        plot.ylabel(variable + ' Price')
-
-        # plot close price line [one]
-        plot.axhline(y = closePriceOne, 
-                     linestyle = 'dotted',
-                     color = colors[0],
-                     label = 'Close Price {0}: {1}'.format(stockOne, round(closePriceOne, 2)))
-
-        # plot close price line [two]
-        plot.axhline(y = closePriceTwo, 
-                     linestyle = 'dotted',
-                     color = colors[1],
-                     label = 'Close Price {0}: {1}'.format(stockTwo, round(closePriceTwo, 2)))
+                  y = stocks,
+                  label = stocks,
+                  color = colors,
+                  legend = False,
+                  ax = ax)
         
-        # plot average price line [one]
-        plot.axhline(y = avgPriceOne, 
-                     linestyle = 'none',
-                     label = 'Average Price {0}: {1}'.format(stockOne, round(avgPriceOne, 2)))
+        title = ' v. '.join(stocks)
+        if len(stocks) > LEGEND_LIMIT:
+            title = '{0} stocks'.format(len(stocks))
+        ax.set_title('{0} Price for {1}: {2}'.format(variable, self._period_label(period), title))
+        ax.set_xlabel('Date')
+        ax.set_ylabel(variable + ' Price')
         
-        # plot average price line [two]
-        plot.axhline(y = avgPriceTwo, 
-                     linestyle = 'none',
-                     label = 'Average Price {0}: {1}'.format(stockTwo, round(avgPriceTwo, 2)))
-
-        plot.legend(bbox_to_anchor = (1, 1))
+        # too many stocks for a legend, draw every close price line in one call
+        if len(stocks) > LEGEND_LIMIT:
+            ax.hlines(closePrices, 0, len(data) - 1, colors = colors, linestyles = 'dotted')
+            return figure
         
-        return plot
+        # plot close price lines
+        for index in range(len(stocks)):
+            ax.axhline(y = closePrices[index], 
+                         linestyle = 'dotted',
+                         color = colors[index],
+                         label = 'Close Price {0}: {1}'.format(stocks[index], round(closePrices[index], 2)))
+        
+        # plot average price lines
+        for index in range(len(stocks)):
+            ax.axhline(y = avgPrices[index], 
+                         linestyle = 'none',
+                         label = 'Average Price {0}: {1}'.format(stocks[index], round(avgPrices[index], 2)))
+        
+        ax.legend(bbox_to_anchor = (1, 1))
+        
+        return figure
     
     
     ###########################################################################
     #####
-    ##### method to graph one stock moving average
+    ##### method to graph many stocks moving averages
     ##### 
-    ##### @param data - the dataframe of data
+    ##### @param data - the dataframe of data, with one column per stock
+    ##### @param stocks - the stock symbols
     ##### @param variable - the variable to look at in the data [ex. 'Close']
-    ##### @param daysPerAverage - the amount of days in the moving average
-    #####
-    ###########################################################################
-    def _two_graph_moving_average(self, data, variable, daysPerAverage):
-        count = 0
-        movingOne = []
-        movingTwo = []
-        averagesOne = []
-        averagesTwo = []
-
-        # create array of moving average values
-        for index in range(len(data)):
-            stockOneVal = data[variable][index]
-            stockTwoVal = data['stockTwoVals'][index]
-            if count != daysPerAverage:
-                movingOne.append(stockOneVal)
-                movingTwo.append(stockTwoVal)
-                averagesOne.append(None)
-                averagesTwo.append(None)
-                count += 1
-            else:
-                avgOne = np.mean(movingOne)
-                avgTwo = np.mean(movingTwo)
-                averagesOne.append(avgOne)
-                averagesTwo.append(avgTwo)
-                del movingOne[0]
-                del movingTwo[0]
-                movingOne.append(stockOneVal)
-                movingTwo.append(stockTwoVal)
-
-        # add column to dataframe
-        data['Moving Average for {0} Days {1}'.format(daysPerAverage, self._stock_one)] = averagesOne
-        data['Moving Average for {0} Days {1}'.format(daysPerAverage, self._stock_two)] = averagesTwo
-
+    ##### @param daysPerAverage - the amount of days in the moving average [or a list of them]
+    #####
+    ###########################################################################
+    def _many_graph_moving_average(self, data, stocks, variable, daysPerAverage):
+        self._profiler.begin('compute', chart = 'moving')
+        if np.isscalar(daysPerAverage):
+            daysPerAverage = [daysPerAverage]
+        
+        # create moving average values for every stock at once
+        averages = moving_averages(data[stocks].to_numpy(dtype = float), daysPerAverage, self._average_type)
+        
+        # add columns to dataframe
+        columns = []
+        frames = []
+        for days in daysPerAverage:
+            label = self._moving_average_label(days)
+            dayColumns = ['{0} {1}'.format(label, stock) for stock in stocks]
+            frames.append(pd.DataFrame(averages[days], columns = dayColumns, index = data.index))
+            columns += dayColumns
+        data = pd.concat([data] + frames, axis = 1)
+        
+        data, rows = self._plot_rows(self._in_period(data), columns)
+        
+        self._profiler.begin('plot', chart = 'moving')
+        figure = new_figure()
+        ax = figure.subplots()
         data.plot(x = 'Date', 
-                  y = ['Moving Average for {0} Days {1}'.format(daysPerAverage, self._stock_one), 
-                       'Moving Average for {0} Days {1}'.format(daysPerAverage, self._stock_two)])
-
-        plot.title('{0} Day Moving Average'.format(daysPerAverage))
-        plot.xlabel('Date')
-        plot.ylabel(variable + ' Price')
-
-        return plot
-
+                  y = columns,
+                  legend = len(stocks) <= LEGEND_LIMIT,
+                  ax = ax)
+        
+        ax.set_title('{0} Day Moving Average'.format(self._days_label(daysPerAverage)))
+        ax.set_xlabel('Date')
+        ax.set_ylabel(variable + ' Price')
+        
+        return figure
+    
+    
+    ###########################################################################
+    #####
+    ##### method to graph the correlation matrix of the stock log returns
+    ##### 
+    ##### @param data - the dataframe of data, with one column per stock
+    ##### @param stocks - the stock symbols
+    #####
+    ###########################################################################
+    def _graph_correlation(self, data, stocks):
+        self._profiler.begin('compute', chart = 'correlation')
+        data = self._in_period(data)
+        correlation = correlation_matrix(log_returns(data[stocks].to_numpy(dtype = float)))
+        
+        self._profiler.begin('plot', chart = 'correlation')
+        figure = new_figure()
+        ax = figure.subplots()
+        image = ax.imshow(correlation, cmap = 'RdBu_r', vmin = -1, vmax = 1, interpolation = 'nearest')
+        figure.colorbar(image, ax = ax, label = 'Correlation')
+        
+        # too many stocks to label every row and column
+        if len(stocks) <= LEGEND_LIMIT * 3:
+            ax.set_xticks(range(len(stocks)), stocks, rotation = 90)
+            ax.set_yticks(range(len(stocks)), stocks)
+        
+        title = ', '.join(stocks)
+        if len(stocks) > LEGEND_LIMIT:
+            title = '{0} stocks'.format(len(stocks))
+        ax.set_title('{0} Log Return Correlation for {1}: {2}'.format(self._desired_variable, self._period_label(self._time_period), title))
+        
+        return figure
+    
+    
+    ###########################################################################
+    #####
+    ##### method to graph the rolling beta of every stock against the benchmark
+    ##### 
+    ##### @param data - the dataframe of data, with one column per stock
+    ##### @param stocks - the stock symbols
+    #####
+    ###########################################################################
+    def _graph_rolling_beta(self, data, stocks):
+        self._profiler.begin('compute', chart = 'beta')
+        benchmark = stocks.index(self._benchmark)
+        returns = log_returns(data[stocks].to_numpy(dtype = float))
+        correlations, betas = rolling_correlation_beta(returns, benchmark, self._beta_window)
+        
+        # the benchmark line is always 1, leave it out
+        others = [stock for stock in stocks if stock != self._benchmark]
+        columns = ['Beta {0}'.format(stock) for stock in others]
+        betas = np.delete(betas, benchmark, axis = 1)
+        data = pd.concat([data[['Date']].iloc[1:].reset_index(drop = True),
+                          pd.DataFrame(betas, columns = columns)], axis = 1)
+        # the return into the first date of the period is its first beta
+        data = data.iloc[max(self._first_row - 1, 0):].reset_index(drop = True)
+        
+        data, rows = self._plot_rows(data, columns)
+        
+        self._profiler.begin('plot', chart = 'beta')
+        figure = new_figure()
+        ax = figure.subplots()
+        data.plot(x = 'Date', 
+                  y = columns,
+                  legend = len(others) <= LEGEND_LIMIT,
+                  ax = ax)
+        ax.axhline(y = 1, color = 'black', linestyle = 'dotted')
+        
+        ax.set_title('{0} Day Rolling Beta against {1}'.format(self._beta_window, self._benchmark))
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Beta')
+        
+        return figure
+    
+    
+    ###########################################################################
+    #####
+    ##### method to write the returns, correlation and beta of every stock
+    ##### against the benchmark as csv
+    ##### 
+    ##### @param data - the dataframe of data, with one column per stock
+    ##### @param stocks - the stock symbols
+    ##### @param path - the csv file path
+    #####
+    ###########################################################################
+    def _write_summary(self, data, stocks, path):
+        self._profiler.begin('compute', chart = 'summary')
+        data = self._in_period(data)
+        table = summary(data[stocks].to_numpy(dtype = float), stocks, self._benchmark)
+        
+        self._profiler.begin('save', chart = 'summary')
+        temporaryPath = '{0}.{1}.tmp'.format(path, os.getpid())
+        table.to_csv(temporaryPath, index = False)
+        os.replace(temporaryPath, path)
+    
+    
+    ###########################################################################
+    #####
+    ##### method to thin data out to about two points per pixel of the chart
+    ##### 
+    ##### the first and last rows are always kept, so open/close stay exact
+    #####
+    ##### @param data - the dataframe of data
+    ##### @param columns - the columns that will be plotted
+    ##### @param keep - row numbers that must stay [ex. the annotated min/max]
+    #####
+    ##### @return [plot data, kept row numbers of the original data]
+    #####
+    ###########################################################################
+    def _plot_rows(self, data, columns, keep = []):
+        points = 2 * self._plot_width
+        method = self._downsample
+        if method == None:
+            method = 'none'
+        
+        rows = downsample_indices(data[columns].to_numpy(dtype = float), points, method, keep)
+        if len(rows) < len(data):
+            data = data.iloc[rows].reset_index(drop = True)
+        
+        # only the kept price store dates are turned into text
+        if data['Date'].dtype.kind == 'M':
+            data = data.assign(Date = date_text(data['Date']))
+        
+        return [data, rows]
+    
+    
+    ###########################################################################
+    #####
+    ##### method to get the column label of a moving average
+    ##### 
+    ##### @param days - the amount of days in the moving average
+    #####
+    ###########################################################################
+    def _moving_average_label(self, days):
+        if self._average_type == 'simple':
+            return 'Moving Average for {0} Days'.format(days)
+        return '{0} Moving Average for {1} Days'.format(self._average_type.capitalize(), days)
+    
+    
+    ###########################################################################
+    #####
+    ##### method to get the title label of the moving average windows
+    ##### 
+    ##### @param daysPerAverage - the list of moving average windows
+    #####
+    ###########################################################################
+    def _days_label(self, daysPerAverage):
+        return '/'.join(str(days) for days in daysPerAverage)
 
 
 if __name__ == '__main__':
@@ -322,7 +883,7 @@ if __name__ == '__main__':
                            '--time_period',
                            type=str,
                            required=True,
-                           help='the time period of the data')
+                           help='the time period to chart: ALL, YTD, an amount and unit [ex. 1M, 6M, 1Y] or start:end dates [ex. 2020-01-01:2020-06-30]')
     arguments.add_argument('-s_2',
                            '--stock_two',
                            action='store',
@@ -337,6 +898,67 @@ if __name__ == '__main__':
                            required=False,
                            default=None, 
                            help='the file path of the second stock data')
+    arguments.add_argument('-s_n',
+                           '--other_stocks',
+                           action='store',
+                           type=str,
+                           nargs='+',
+                           required=False,
+                           default=None, 
+                           help='the symbols of any further stocks')
+    arguments.add_argument('-p_n',
+                           '--other_paths',
+                           action='store',
+                           type=str,
+                           nargs='+',
+                           required=False,
+                           default=None, 
+                           help='the file paths of any further stock data, in the same order')
+    arguments.add_argument('-j',
+                           '--join',
+                           action='store',
+                           type=str,
+                           choices=JOIN_TYPES,
+                           required=False,
+                           default='inner', 
+                           help='keep dates all stocks share [inner] or any stock has [outer] [default=inner]')
+    arguments.add_argument('-f',
+                           '--fill',
+                           action='store',
+                           type=str,
+                           choices=FILL_POLICIES,
+                           required=False,
+                           default='none', 
+                           help='how to fill dates a stock has no price for [default=none]')
+    arguments.add_argument('--stream',
+                           action='store_true',
+                           help='read the data in chunks and chart bars, for files too large for memory')
+    arguments.add_argument('-b',
+                           '--bar',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default='D', 
+                           help='the bar size when streaming, a pandas frequency [ex. D, W, h] [default=D]')
+    arguments.add_argument('--chunk_size',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=500000, 
+                           help='the amount of rows read at a time when streaming [default=500000]')
+    arguments.add_argument('--downsample',
+                           action='store',
+                           type=str,
+                           choices=DOWNSAMPLE_METHODS,
+                           required=False,
+                           default='lttb', 
+                           help='how to thin out long series before plotting [default=lttb]')
+    arguments.add_argument('--plot_width',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=640, 
+                           help='the chart width in pixels, about two points per pixel are plotted [default=640]')
     arguments.add_argument('-r',
                            '--result_path',
                            action='store',
@@ -348,9 +970,57 @@ if __name__ == '__main__':
                            '--days',
                            action='store',
                            type=int,
+                           nargs='+',
                            required=False,
-                           default=7, 
-                           help='the amount of days included in moving average [default=7]')
+                           default=[7], 
+                           help='the amount of days included in moving average, several allowed [default=7]')
+    arguments.add_argument('-a',
+                           '--average_type',
+                           action='store',
+                           type=str,
+                           choices=AVERAGE_TYPES,
+                           required=False,
+                           default='simple', 
+                           help='the type of moving average [default=simple]')
+    arguments.add_argument('--profile',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None, 
+                           help='json file to write the time and peak memory of each stage to')
+    arguments.add_argument('--profile_memory',
+                           action='store_true',
+                           help='also trace python allocations of each stage with tracemalloc, which slows the stages down')
+    arguments.add_argument('--incremental',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None, 
+                           help='state file to keep statistics and moving averages in, so only new rows are processed')
+    arguments.add_argument('--no_render_cache',
+                           action='store_true',
+                           help='always draw the charts instead of linking unchanged ones from <data folder>/.render_cache')
+    arguments.add_argument('--render_cache_megabytes',
+                           action='store',
+                           type=float,
+                           required=False,
+                           default=256, 
+                           help='the size limit of the render cache [default=256]')
+    arguments.add_argument('--analytics',
+                           action='store_true',
+                           help='also chart the return correlation and rolling beta and write a summary csv, for many stocks')
+    arguments.add_argument('--benchmark',
+                           action='store',
+                           type=str,
+                           required=False,
+                           default=None, 
+                           help='the stock to get beta against [default=the first stock]')
+    arguments.add_argument('--beta_window',
+                           action='store',
+                           type=int,
+                           required=False,
+                           default=60, 
+                           help='the amount of returns in each rolling beta window [default=60]')
 
     parsed = arguments.parse_args()
     variables = vars(parsed)
@@ -363,8 +1033,70 @@ if __name__ == '__main__':
     pathTwo = variables['path_two']
     result = variables['result_path']
     days = variables['days']
+    averageType = variables['average_type']
+    otherStocks = variables['other_stocks']
+    otherPaths = variables['other_paths']
+    join = variables['join']
+    fill = variables['fill']
+    stream = variables['stream']
+    bar = variables['bar']
+    chunkSize = variables['chunk_size']
+    downsample = variables['downsample']
+    plotWidth = variables['plot_width']
+    profilePath = variables['profile']
+    statePath = variables['incremental']
+    analytics = variables['analytics']
+    benchmark = variables['benchmark']
+    betaWindow = variables['beta_window']
+
+    if (otherStocks == None) != (otherPaths == None) or (otherStocks != None and len(otherStocks) != len(otherPaths)):
+        arguments.error('--other_stocks and --other_paths need the same amount of values')
+    if (stockTwo == None) != (pathTwo == None):
+        arguments.error('--stock_two and --path_two must be given together')
+
+    # check the inputs before any heavy module is loaded
+    for filePath in [pathOne, pathTwo] + (otherPaths or []):
+        if filePath != None and not os.path.isfile(filePath):
+            arguments.error('stock data file {0} does not exist'.format(filePath))
+        if stream == True and filePath != None and filePath.endswith(STORE_EXTENSION):
+            arguments.error('--stream reads csv files, price store {0} is loaded without parsing'.format(filePath))
+    if result != None and '.' not in os.path.basename(result):
+        arguments.error('result path {0} needs an image extension [ex. .jpg]'.format(result))
+    if min(days) < 1:
+        arguments.error('--days must be positive')
+    try:
+        parse_period(period)
+    except ValueError as error:
+        arguments.error(str(error))
+    if statePath != None and (stream == True or stockTwo != None or otherStocks != None):
+        arguments.error('--incremental works on one stock without --stream')
+    if statePath != None and averageType not in INCREMENTAL_AVERAGE_TYPES:
+        arguments.error('--incremental supports the {0} moving averages'.format(', '.join(INCREMENTAL_AVERAGE_TYPES)))
+    if analytics == True and stockTwo == None and otherStocks == None:
+        arguments.error('--analytics needs more than one stock')
+    if benchmark != None and benchmark not in [stockOne, stockTwo] + (otherStocks or []):
+        arguments.error('benchmark {0} is not one of the stocks'.format(benchmark))
+    if betaWindow < 2:
+        arguments.error('--beta_window must be at least 2')
+    if variables['profile_memory'] == True and profilePath == None:
+        arguments.error('--profile_memory needs --profile')
 
-    Visualize_Stocks(stockOne, pathOne, desiredVar, period, stockTwo, pathTwo, result, days).main()
+    profiler = None
+    if profilePath != None:
+        # tracemalloc slows the stages it times, so it is only on when asked for
+        profiler = Stage_Profiler(trace_memory = variables['profile_memory'])
+
+    renderCache = None
+    if variables['no_render_cache'] == False:
+        cachePath = os.path.join(os.path.dirname(os.path.abspath(pathOne)), '.render_cache')
+        renderCache = Render_Cache(cachePath, variables['render_cache_megabytes'])
+
+    Visualize_Stocks(stockOne, pathOne, desiredVar, period, stockTwo, pathTwo, result, days, averageType,
+                     otherStocks, otherPaths, join, fill, stream, bar, chunkSize, None, downsample,
+                     plotWidth, profiler, statePath, renderCache, analytics, benchmark, betaWindow).main()
+
+    if profiler != None:
+        profiler.write(profilePath)
 
 
 
@@ -372,5 +1104,8 @@ if __name__ == '__main__':
 # run one stock example
 # /usr/local/bin/python3 /Users/mtjen/Desktop/395/visualize.py -s_1 'AAPL' -p_1 '/Users/mtjen/Desktop/395/AAPL.csv' -v 'Close' -t '1Y' -r '/Users/mtjen/Desktop/395/AAPL_result.jpg' -d 25
 
+# run many stocks with analytics example
+# /usr/local/bin/python3 /Users/mtjen/Desktop/395/visualize.py -s_1 'SPY' -p_1 '/Users/mtjen/Desktop/395/SPY.csv' -v 'Close' -t '5Y' -s_n 'AAPL' 'ZS' -p_n '/Users/mtjen/Desktop/395/AAPL.csv' '/Users/mtjen/Desktop/395/ZS.csv' --analytics --beta_window 120
+
 # run two stocks example
 # /usr/local/bin/python3 /Users/mtjen/Desktop/395/visualize.py -s_1 'AAPL' -p_1 '/Users/mtjen/Desktop/395/AAPL.csv' -v 'Close' -t '1Y' -s_2 'ZS' -p_2 '/Users/mtjen/Desktop/395/ZS.csv'